@@ -0,0 +1,209 @@
+import time
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.responses import JSONResponse, RedirectResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import config
+from services.auth_service import verify_admin_token, verify_scrape_token, is_admin_route, is_scrape_route
+from services.request_logging import RequestSampler, log_request
+from services.metrics import REGISTRY
+from services.compression import (
+    CompressionStats, StreamCompressor, choose_encoding, compress, is_compressible
+)
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status")
+)
+
+PUBLIC_ADMIN_ENDPOINTS = {
+    ("/admin", "GET"),
+    ("/api/admin/login", "POST"),
+    ("/api/admin/logout", "POST"),
+    ("/api/admin/check-session", "GET"),
+    ("/api/stats/queue", "GET"),
+}
+
+
+class AdminProtectionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if is_admin_route(path) and (path, scope["method"]) not in PUBLIC_ADMIN_ENDPOINTS:
+            connection = HTTPConnection(scope)
+            authorized = verify_admin_token(connection.cookies.get("admin_session")) or (
+                is_scrape_route(path) and verify_scrape_token(connection.headers.get("authorization"))
+            )
+            if not authorized:
+                if path.startswith("/api/"):
+                    response = JSONResponse(
+                        status_code=401,
+                        content={"error": "Authentification admin requise"}
+                    )
+                else:
+                    response = RedirectResponse(url="/admin", status_code=302)
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
+
+
+class RequestLoggingMiddleware:
+    def __init__(self, app: ASGIApp, sampler: Optional[RequestSampler] = None, slow_ms: Optional[float] = None):
+        self.app = app
+        self.sampler = sampler or RequestSampler(config.REQUEST_LOG_SAMPLING)
+        self.slow_ms = config.REQUEST_LOG_SLOW_MS if slow_ms is None else slow_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if headers.get("x-replit-healthcheck"):
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        path = scope["path"]
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start_time
+            # Labelled by route template, not raw path, to keep series bounded.
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(duration, scope["method"], route, str(status))
+            client = scope.get("client")
+            log_request(
+                self.sampler, scope["method"], path, status, duration * 1000,
+                client[0] if client else None, headers, self.slow_ms
+            )
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        stats: Optional[CompressionStats] = None,
+        minimum_size: Optional[int] = None,
+        gzip_level: Optional[int] = None,
+        brotli_quality: Optional[int] = None
+    ):
+        self.app = app
+        self.stats = stats or CompressionStats()
+        self.minimum_size = config.COMPRESSION_MIN_BYTES if minimum_size is None else minimum_size
+        self.levels = {
+            "gzip": config.COMPRESSION_GZIP_LEVEL if gzip_level is None else gzip_level,
+            "br": config.COMPRESSION_BROTLI_QUALITY if brotli_quality is None else brotli_quality
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await self.app(scope, receive, _CompressionResponder(self, encoding, send).send)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.level = middleware.levels[encoding]
+        self._send = send
+        self.start_message: Optional[Message] = None
+        self.eligible = False
+        self.stream: Optional[StreamCompressor] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            status = message["status"]
+            self.eligible = (
+                200 <= status and status not in (204, 206, 304)
+                and "content-encoding" not in headers
+                and is_compressible(headers.get("content-type", ""))
+            )
+            if self.eligible:
+                self.start_message = message
+            else:
+                await self._send(message)
+            return
+
+        if not self.eligible or message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.stream is None and not more_body:
+            await self._send_whole(body)
+            return
+
+        if self.stream is None:
+            self.stream = StreamCompressor(self.encoding, self.level)
+            response_headers = MutableHeaders(scope=self.start_message)
+            del response_headers["Content-Length"]
+            response_headers["Content-Encoding"] = self.encoding
+            response_headers.add_vary_header("Accept-Encoding")
+            await self._send(self.start_message)
+
+        started = time.perf_counter()
+        chunk = self.stream.compress(body)
+        if not more_body:
+            chunk += self.stream.finish()
+        self.seconds += time.perf_counter() - started
+        self.bytes_in += len(body)
+        self.bytes_out += len(chunk)
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        if not more_body:
+            self.middleware.stats.record(self.encoding, self.bytes_in, self.bytes_out, self.seconds)
+
+    async def _send_whole(self, body: bytes):
+        response_headers = MutableHeaders(scope=self.start_message)
+        response_headers.add_vary_header("Accept-Encoding")
+
+        if len(body) < self.middleware.minimum_size:
+            self.middleware.stats.skipped_small += 1
+            await self._send(self.start_message)
+            await self._send({"type": "http.response.body", "body": body, "more_body": False})
+            return
+
+        started = time.perf_counter()
+        compressed = compress(body, self.encoding, self.level)
+        elapsed = time.perf_counter() - started
+
+        if len(compressed) < len(body):
+            response_headers["Content-Encoding"] = self.encoding
+            response_headers["Content-Length"] = str(len(compressed))
+            response_headers.append("Server-Timing", f"compress;dur={elapsed * 1000:.2f}")
+            self.middleware.stats.record(self.encoding, len(body), len(compressed), elapsed)
+            body = compressed
+
+        await self._send(self.start_message)
+        await self._send({"type": "http.response.body", "body": body, "more_body": False})
@@ -0,0 +1,10 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from services.json_encoding import dumps
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,17 +1,33 @@
-from fastapi import APIRouter, Query, HTTPException, Request, Header
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Query, HTTPException, Request, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
 from datetime import datetime, timezone, timedelta, date as date_type
 from typing import Optional, List
 from pydantic import BaseModel, validator
+import asyncio
 import os
 import time
 import config
-from services.cycle_detector import detect_cycles
-from services.volume_calculator import calculate_volume_m3
-from services.co2e_calculator import calculate_co2e_impact
+from services.cycles_service import build_pump_cycles, parse_fields, normalize_cycles
+from services.chart_service import build_power_chart, normalize_period, CHART_PERIODS
+from services.dashboard_service import attach_device_names, build_dashboard_bootstrap
+from services.export_service import stream_cycles_csv, stream_raw_copy, RAW_EXPORT_FORMATS
+from api.responses import FastJSONResponse
+from services.change_tracker import etag_matches
+from services.database import pool_stats
+from services.ingest_stats import record_ingest_rows, load_queue_stats
+from services.session_revocations import publish_revocation
+from services.statements import STATEMENTS, register
+from services.metrics import REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from services.disconnect_guard import ClientDisconnected, run_unless_disconnected
+from services.db_scheduler import (
+    AdmissionRejected, estimate_cost,
+    LANE_INGEST, LANE_ADMIN, LANE_EXPORT
+)
 from services.auth_service import (
     verify_admin_password, verify_csv_password,
-    create_admin_session, verify_admin_token, revoke_admin_session
+    create_admin_session, verify_admin_token, revoke_admin_session,
+    create_export_token, verify_export_token,
+    ADMIN_SESSION_DURATION, EXPORT_TOKEN_DURATION
 )
 from services.config_service import (
     get_all_devices_from_logs,
@@ -30,212 +46,252 @@ from services.config_versions_service import (
     get_config_history,
     add_config_version,
     update_current_config,
-    bulk_load_configs_for_period,
-    find_config_for_date_in_memory
+    parse_config_versions_csv,
+    validate_config_versions,
+    import_config_versions
 )
 
 router = APIRouter(prefix="/api")
 
 
-@router.get("/pump-cycles")
-async def get_pump_cycles(
-    request: Request,
-    channel: Optional[str] = Query(None, description="Filtrer par canal (ex: switch:1)"),
-    device_id: Optional[str] = Query(None, description="Filtrer par device_id"),
-    start_date: Optional[str] = Query(None, description="Date debut ISO (ex: 2026-02-01)"),
-    end_date: Optional[str] = Query(None, description="Date fin ISO (ex: 2026-02-14)"),
-    limit: int = Query(1000, ge=1, le=10000, description="Nombre max de cycles")
-):
-    db_pool = request.app.state.db_pool
+def _db_lane(request: Request, lane: str):
+    return request.app.state.db_scheduler.lane(lane)
 
-    try:
-        if not start_date:
-            start_dt = datetime.now(timezone.utc) - timedelta(days=config.DEFAULT_DAYS_HISTORY)
-        else:
-            start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
 
-        if not end_date:
-            end_dt = datetime.now(timezone.utc)
-        else:
-            end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
+def _read_scheduler(request: Request):
+    return request.app.state.replica_router.scheduler()
 
-        query = """
-            SELECT timestamp, channel, apower_w, device_id, current_a, voltage_v
-            FROM power_logs
-            WHERE timestamp >= $1 AND timestamp <= $2
-        """
-        params = [start_dt, end_dt]
 
-        if device_id:
-            query += " AND device_id = $" + str(len(params) + 1)
-            params.append(device_id)
+def _conditional(request: Request, *parts):
+    tracker = request.app.state.change_tracker
+    etag = tracker.etag(*parts)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        tracker.not_modified += 1
+        return etag, Response(status_code=304, headers=_cache_headers(etag))
+    return etag, None
 
-        if channel:
-            query += " AND channel = $" + str(len(params) + 1)
-            params.append(channel)
 
-        query += " ORDER BY device_id, channel, timestamp ASC"
+def _cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
 
-        async with db_pool.acquire() as conn:
-            records = await conn.fetch(query, *params)
 
-        print(f"📊 API: Fetched {len(records)} records for cycle detection", flush=True)
+def _config_changed(request: Request):
+    request.app.state.change_tracker.record_config_change()
 
-        records_list = [(r['timestamp'], r['channel'], r['apower_w'], r['device_id'], r['current_a'], r['voltage_v']) for r in records]
 
-        cycles = detect_cycles(
-            records_list,
-            gap_threshold_minutes=config.GAP_THRESHOLD_MINUTES,
-            min_duration_minutes=config.MIN_CYCLE_DURATION_MINUTES
-        )
+def _parse_utc(value: str, param: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Format {param} invalide. Attendu: ISO 8601")
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
 
-        print(f"🔍 API: Detected {len(cycles)} cycles", flush=True)
 
-        cycles = cycles[:limit]
+def _parse_since(since: Optional[str]) -> Optional[datetime]:
+    return _parse_utc(since, "since") if since else None
 
-        for cycle in cycles:
-            cycle['start_time'] = cycle['start_time'].strftime('%Y-%m-%dT%H:%M:%SZ')
-            if cycle['end_time']:
-                cycle['end_time'] = cycle['end_time'].strftime('%Y-%m-%dT%H:%M:%SZ')
-            else:
-                cycle['end_time'] = None
 
-        found_device_ids = list(set(r['device_id'] for r in records))
+def _cycle_fields(fields: Optional[str]):
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 
-        configs = await get_configs_map(db_pool)
+def _cycles_layout(result: dict, layout: str, fields) -> dict:
+    return normalize_cycles(result, fields) if layout == "normalized" else result
+
+
+def _pump_cycles_flight(request: Request, device_id, channel, start_date, end_date, limit, since_dt,
+                        configs=None, fields=None):
+    if not start_date:
+        start_dt = datetime.now(timezone.utc) - timedelta(days=config.DEFAULT_DAYS_HISTORY)
+    else:
+        start_dt = _parse_utc(start_date, "start_date")
 
-        configs_cache = {}
-        unique_pairs = set()
-        for cycle in cycles:
-            dev = cycle.get('device_id')
-            ch = cycle.get('channel')
-            if dev and ch:
-                unique_pairs.add((dev, ch))
-        for dev, ch in unique_pairs:
-            period_configs = await bulk_load_configs_for_period(
-                db_pool, dev, ch, start_dt.date(), end_dt.date()
+    if not end_date:
+        end_dt = datetime.now(timezone.utc)
+    else:
+        end_dt = _parse_utc(end_date, "end_date")
+
+    window_start = max(start_dt, since_dt) if since_dt else start_dt
+    cost = estimate_cost((end_dt - window_start).total_seconds() / 86400, device_id, channel)
+
+    async def compute():
+        async with _read_scheduler(request).admit(cost) as db_pool:
+            return await build_pump_cycles(
+                db_pool, device_id, channel, start_dt, end_dt, limit, since_dt,
+                query_timeout=config.PUMP_CYCLES_QUERY_TIMEOUT_SECONDS, configs=configs, fields=fields
             )
-            configs_cache[(dev, ch)] = period_configs
-
-        stats = {
-            "max_current": 0,
-            "min_current": float('inf'),
-            "max_power": 0,
-            "min_power": float('inf')
-        }
-
-        treated_water_m3 = 0.0
-        co2e_dbo5_weighted = []
-
-        for cycle in cycles:
-            pw = cycle.get('avg_power_w')
-            if pw is not None:
-                stats['max_power'] = max(stats['max_power'], pw)
-                stats['min_power'] = min(stats['min_power'], pw)
-            ca = cycle.get('avg_current_a')
-            if ca is not None:
-                stats['max_current'] = max(stats['max_current'], ca)
-                stats['min_current'] = min(stats['min_current'], ca)
-
-            dev = cycle.get('device_id')
-            ch = cycle.get('channel')
-
-            cycle_start = cycle.get('start_time')
-            if isinstance(cycle_start, str):
-                cycle_date = datetime.fromisoformat(cycle_start.replace('Z', '+00:00')).date()
-            else:
-                cycle_date = cycle_start.date() if cycle_start else start_dt.date()
 
-            versioned_config = find_config_for_date_in_memory(
-                configs_cache.get((dev, ch), []), cycle_date
+    flight_key = (
+        "pump-cycles", device_id or None, channel or None,
+        start_dt if start_date else None, end_dt if end_date else None, limit, since_dt,
+        tuple(sorted(fields)) if fields is not None else None
+    )
+    return request.app.state.single_flight.run(flight_key, compute)
+
+
+def _power_chart_flight(request: Request, device_id, channel, period, end_date, since_dt):
+    if end_date:
+        try:
+            end_dt = datetime.strptime(end_date, "%Y-%m-%d").replace(
+                hour=23, minute=59, second=59, tzinfo=timezone.utc
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Format end_date invalide. Attendu: YYYY-MM-DD")
+    else:
+        end_dt = datetime.now(timezone.utc)
+
+    chart_channel = channel if channel and channel != "all" else None
+    period = normalize_period(period)
+    cost = estimate_cost(CHART_PERIODS[period]["window"].total_seconds() / 86400, device_id, chart_channel)
+
+    async def compute():
+        async with _read_scheduler(request).admit(cost) as db_pool:
+            return await build_power_chart(
+                db_pool, device_id, channel, period, end_dt, since_dt,
+                query_timeout=config.POWER_CHART_QUERY_TIMEOUT_SECONDS
             )
 
-            pump_type = versioned_config['pump_type'] if versioned_config and versioned_config.get('pump_type') else 'relevage'
-            flow_rate = versioned_config['flow_rate'] if versioned_config else None
-            cycle['pump_type'] = pump_type
-
-            if pump_type == 'relevage' and flow_rate and cycle.get('duration_minutes'):
-                volume = calculate_volume_m3(flow_rate, cycle['duration_minutes'])
-                cycle['volume_m3'] = volume
-                if not cycle.get('is_ongoing'):
-                    treated_water_m3 += volume
-                    dbo5_for_cycle = versioned_config.get('dbo5', 570) if versioned_config else 570
-                    co2e_dbo5_weighted.append((volume, dbo5_for_cycle or 570))
-            else:
-                cycle['volume_m3'] = None
-
-        if stats['min_current'] == float('inf'):
-            stats['min_current'] = 0
-        if stats['min_power'] == float('inf'):
-            stats['min_power'] = 0
-        stats = {k: round(v, 1) for k, v in stats.items()}
-
-        num_days = (end_dt - start_dt).days + 1
-        treated_water_per_day = round(treated_water_m3 / num_days, 2) if num_days > 0 else 0
-
-        if co2e_dbo5_weighted and treated_water_m3 > 0:
-            total_co2e_avoided = 0.0
-            total_ch4_avoided = 0.0
-            for vol, dbo5_val in co2e_dbo5_weighted:
-                impact = calculate_co2e_impact(vol, dbo5_val)
-                total_co2e_avoided += impact['co2e_avoided_kg']
-                total_ch4_avoided += impact['ch4_avoided_kg']
-            co2e_impact = {
-                "co2e_avoided_kg": round(total_co2e_avoided, 2),
-                "reduction_percent": round(94.0, 1),
-                "ch4_avoided_kg": round(total_ch4_avoided, 2)
-            }
-        else:
-            co2e_impact = calculate_co2e_impact(0, 570)
-
-        return {
-            "total": len(cycles),
-            "device_ids": found_device_ids,
-            "configs": configs,
-            "stats": stats,
-            "treatment_stats": {
-                "treated_water_m3": round(treated_water_m3, 2),
-                "treated_water_per_day": treated_water_per_day,
-                "num_days": num_days
-            },
-            "co2e_impact": co2e_impact,
-            "filters": {
-                "device_id": device_id,
-                "channel": channel,
-                "start_date": start_dt.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                "end_date": end_dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-            },
-            "cycles": cycles
-        }
+    flight_key = ("power-chart", device_id, chart_channel, period, end_date, since_dt)
+    return request.app.state.single_flight.run(flight_key, compute)
+
 
+@router.get("/pump-cycles")
+async def get_pump_cycles(
+    request: Request,
+    channel: Optional[str] = Query(None, description="Filtrer par canal (ex: switch:1)"),
+    device_id: Optional[str] = Query(None, description="Filtrer par device_id"),
+    start_date: Optional[str] = Query(None, description="Date debut ISO (ex: 2026-02-01)"),
+    end_date: Optional[str] = Query(None, description="Date fin ISO (ex: 2026-02-14)"),
+    limit: int = Query(1000, ge=1, le=10000, description="Nombre max de cycles"),
+    since: Optional[str] = Query(None, description="Watermark ISO renvoye par l'appel precedent (mode delta)"),
+    fields: Optional[str] = Query(None, description="Champs a renvoyer, separes par des virgules (ex: start_time,volume_m3,stats)"),
+    layout: str = Query("rows", pattern="^(rows|normalized)$", description="normalized: cycles en tableaux, device_id/channel encodes par dictionnaire, sans configs")
+):
+    tracker = request.app.state.change_tracker
+    etag, not_modified = _conditional(
+        request, "pump-cycles", device_id, channel, start_date, end_date, limit, since, fields, layout,
+        tracker.ingest_marker(device_id, channel), tracker.config_generation
+    )
+    if not_modified:
+        return not_modified
+
+    try:
+        cycle_fields = _cycle_fields(fields)
+        result = await run_unless_disconnected(
+            request,
+            _pump_cycles_flight(
+                request, device_id, channel, start_date, end_date, limit, _parse_since(since), fields=cycle_fields
+            ),
+            config.DISCONNECT_POLL_INTERVAL_SECONDS
+        )
+        return FastJSONResponse(_cycles_layout(result, layout, cycle_fields), headers=_cache_headers(etag))
+
+    except (HTTPException, AdmissionRejected):
+        raise
+    except ClientDisconnected:
+        print("🔌 /api/pump-cycles: client disconnected, computation cancelled", flush=True)
+        return Response(status_code=499)
+    except asyncio.TimeoutError:
+        print(f"⏱️ /api/pump-cycles: query exceeded {config.PUMP_CYCLES_QUERY_TIMEOUT_SECONDS}s", flush=True)
+        raise HTTPException(status_code=504, detail="Délai de requête dépassé, réduisez la période")
     except Exception as e:
         print(f"❌ Error in /api/pump-cycles: {e}", flush=True)
         raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
 
 
+@router.get("/dashboard/bootstrap")
+async def get_dashboard_bootstrap(
+    request: Request,
+    channel: Optional[str] = Query(None, description="Filtrer par canal (ex: switch:1)"),
+    device_id: Optional[str] = Query(None, description="Filtrer par device_id"),
+    start_date: Optional[str] = Query(None, description="Date debut ISO (ex: 2026-02-01)"),
+    end_date: Optional[str] = Query(None, description="Date fin ISO (ex: 2026-02-14)"),
+    limit: int = Query(1000, ge=1, le=10000, description="Nombre max de cycles"),
+    chart_period: str = Query("24h", description="Periode du graphique (seulement avec device_id)"),
+    chart_end_date: Optional[str] = Query(None, description="Date fin du graphique (YYYY-MM-DD)"),
+    fields: Optional[str] = Query(None, description="Champs des cycles (voir /api/pump-cycles)"),
+    layout: str = Query("rows", pattern="^(rows|normalized)$", description="Format des cycles (voir /api/pump-cycles)")
+):
+    tracker = request.app.state.change_tracker
+    etag, not_modified = _conditional(
+        request, "dashboard-bootstrap", device_id, channel, start_date, end_date, limit, chart_period, chart_end_date,
+        fields, layout,
+        tracker.ingest_marker(device_id, channel), tracker.topology_generation, tracker.config_generation
+    )
+    if not_modified:
+        return not_modified
+
+    try:
+        cycle_fields = _cycle_fields(fields)
+        load_chart = None
+        if device_id:
+            load_chart = lambda: _power_chart_flight(request, device_id, channel, chart_period, chart_end_date, None)
+
+        result = await run_unless_disconnected(
+            request,
+            build_dashboard_bootstrap(
+                _read_scheduler(request).lane(LANE_ADMIN),
+                lambda configs: _pump_cycles_flight(
+                    request, device_id, channel, start_date, end_date, limit, None, configs, cycle_fields
+                ),
+                load_chart
+            ),
+            config.DISCONNECT_POLL_INTERVAL_SECONDS
+        )
+        result["cycles"] = _cycles_layout(result["cycles"], layout, cycle_fields)
+        return FastJSONResponse(result, headers=_cache_headers(etag))
+
+    except (HTTPException, AdmissionRejected):
+        raise
+    except ClientDisconnected:
+        print("🔌 /api/dashboard/bootstrap: client disconnected, computation cancelled", flush=True)
+        return Response(status_code=499)
+    except asyncio.TimeoutError:
+        print("⏱️ /api/dashboard/bootstrap: query timeout", flush=True)
+        raise HTTPException(status_code=504, detail="Délai de requête dépassé, réduisez la période")
+    except Exception as e:
+        print(f"❌ Error in /api/dashboard/bootstrap: {e}", flush=True)
+        raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
+
+
 @router.get("/devices")
 async def get_devices_public(request: Request):
-    db_pool = request.app.state.db_pool
+    tracker = request.app.state.change_tracker
+    etag, not_modified = _conditional(request, "devices", tracker.topology_generation, tracker.config_generation)
+    if not_modified:
+        return not_modified
+    db_pool = _read_scheduler(request).lane(LANE_ADMIN)
     try:
         devices = await get_all_devices_from_logs(db_pool)
         configs = await get_configs_map(db_pool)
-        for device in devices:
-            did = device['device_id']
-            if did in configs:
-                device['device_name'] = configs[did]['device_name']
-                device['channel_names'] = {ch: info['channel_name'] for ch, info in configs[did]['channels'].items()}
-            else:
-                device['device_name'] = None
-                device['channel_names'] = {}
-        return {"devices": devices}
+        return FastJSONResponse({"devices": attach_device_names(devices, configs)}, headers=_cache_headers(etag))
     except Exception as e:
         print(f"Error in /api/devices: {e}", flush=True)
         raise HTTPException(status_code=500, detail="Erreur serveur")
 
 
+@router.get("/configs")
+async def get_configs_public(request: Request):
+    etag, not_modified = _conditional(request, "configs", request.app.state.change_tracker.config_generation)
+    if not_modified:
+        return not_modified
+    try:
+        return FastJSONResponse({"configs": await get_configs_map(_db_lane(request, LANE_ADMIN))}, headers=_cache_headers(etag))
+    except Exception as e:
+        print(f"Error in /api/configs: {e}", flush=True)
+        raise HTTPException(status_code=500, detail="Erreur serveur")
+
+
 @router.get("/config/devices")
 async def get_devices_config(request: Request):
-    db_pool = request.app.state.db_pool
+    tracker = request.app.state.change_tracker
+    etag, not_modified = _conditional(request, "config-devices", tracker.topology_generation, tracker.config_generation)
+    if not_modified:
+        return not_modified
+    db_pool = _db_lane(request, LANE_ADMIN)
 
     try:
         devices = await get_all_devices_from_logs(db_pool)
@@ -258,7 +314,7 @@ async def get_devices_config(request: Request):
                 device['dco_mg_l'] = 1250
                 device['mes_mg_l'] = 650
 
-        return {"devices": devices}
+        return FastJSONResponse({"devices": devices}, headers=_cache_headers(etag))
     except Exception as e:
         print(f"❌ Error in /api/config/devices: {e}", flush=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -266,7 +322,7 @@ async def get_devices_config(request: Request):
 
 @router.post("/config/device")
 async def update_device_name(request: Request):
-    db_pool = request.app.state.db_pool
+    db_pool = _db_lane(request, LANE_ADMIN)
 
     try:
         body = await request.json()
@@ -287,7 +343,8 @@ async def update_device_name(request: Request):
             await upsert_device_name(db_pool, did, name)
             print(f"✅ Device name updated: {did} -> {name}", flush=True)
 
-        return {"success": True}
+        _config_changed(request)
+        return FastJSONResponse({"success": True})
     except HTTPException:
         raise
     except ValueError as e:
@@ -300,7 +357,7 @@ async def update_device_name(request: Request):
 
 @router.post("/config/channel")
 async def update_channel_name(request: Request):
-    db_pool = request.app.state.db_pool
+    db_pool = _db_lane(request, LANE_ADMIN)
 
     try:
         body = await request.json()
@@ -313,7 +370,8 @@ async def update_channel_name(request: Request):
 
         await upsert_channel_name(db_pool, did, ch, name)
         print(f"✅ Channel name updated: {did}/{ch} -> {name}", flush=True)
-        return {"success": True}
+        _config_changed(request)
+        return FastJSONResponse({"success": True})
     except HTTPException:
         raise
     except Exception as e:
@@ -323,12 +381,13 @@ async def update_channel_name(request: Request):
 
 @router.delete("/config/device/{device_id}")
 async def delete_device(request: Request, device_id: str):
-    db_pool = request.app.state.db_pool
+    db_pool = _db_lane(request, LANE_ADMIN)
 
     try:
         await delete_device_config(db_pool, device_id)
         print(f"✅ Device config deleted: {device_id}", flush=True)
-        return {"success": True}
+        _config_changed(request)
+        return FastJSONResponse({"success": True})
     except Exception as e:
         print(f"❌ Error deleting device: {e}", flush=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -336,11 +395,14 @@ async def delete_device(request: Request, device_id: str):
 
 @router.get("/config/pump-models")
 async def get_pump_models(request: Request):
-    db_pool = request.app.state.db_pool
+    etag, not_modified = _conditional(request, "pump-models", request.app.state.change_tracker.config_generation)
+    if not_modified:
+        return not_modified
+    db_pool = _db_lane(request, LANE_ADMIN)
 
     try:
         models = await get_all_pump_models(db_pool)
-        return models
+        return FastJSONResponse(models, headers=_cache_headers(etag))
     except Exception as e:
         print(f"❌ Error fetching pump models: {e}", flush=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -348,7 +410,7 @@ async def get_pump_models(request: Request):
 
 @router.post("/config/pump-model")
 async def create_pump_model_route(request: Request):
-    db_pool = request.app.state.db_pool
+    db_pool = _db_lane(request, LANE_ADMIN)
 
     try:
         body = await request.json()
@@ -362,7 +424,8 @@ async def create_pump_model_route(request: Request):
 
         new_id = await create_pump_model(db_pool, name, float(power_kw), float(current_ampere), float(flow_rate_hmt8) if flow_rate_hmt8 is not None else None)
         print(f"✅ Pump model created: {name} (id={new_id})", flush=True)
-        return {"success": True, "id": new_id}
+        _config_changed(request)
+        return FastJSONResponse({"success": True, "id": new_id})
     except HTTPException:
         raise
     except Exception as e:
@@ -372,7 +435,7 @@ async def create_pump_model_route(request: Request):
 
 @router.put("/config/pump-model/{pump_id}")
 async def update_pump_model_route(request: Request, pump_id: int):
-    db_pool = request.app.state.db_pool
+    db_pool = _db_lane(request, LANE_ADMIN)
 
     try:
         body = await request.json()
@@ -386,7 +449,8 @@ async def update_pump_model_route(request: Request, pump_id: int):
 
         await update_pump_model(db_pool, pump_id, name, float(power_kw), float(current_ampere), float(flow_rate_hmt8) if flow_rate_hmt8 is not None else None)
         print(f"✅ Pump model updated: {name} (id={pump_id})", flush=True)
-        return {"success": True}
+        _config_changed(request)
+        return FastJSONResponse({"success": True})
     except HTTPException:
         raise
     except Exception as e:
@@ -396,14 +460,15 @@ async def update_pump_model_route(request: Request, pump_id: int):
 
 @router.delete("/config/pump-model/{pump_id}")
 async def delete_pump_model_route(request: Request, pump_id: int):
-    db_pool = request.app.state.db_pool
+    db_pool = _db_lane(request, LANE_ADMIN)
 
     try:
         result = await delete_pump_model(db_pool, pump_id)
         if not result["success"]:
             raise HTTPException(status_code=400, detail=result["error"])
         print(f"✅ Pump model deleted: id={pump_id}", flush=True)
-        return result
+        _config_changed(request)
+        return FastJSONResponse(result)
     except HTTPException:
         raise
     except Exception as e:
@@ -421,14 +486,14 @@ async def admin_login(request: Request):
             raise HTTPException(status_code=401, detail="Mot de passe incorrect")
         token = create_admin_session()
         print("✅ Admin logged in successfully", flush=True)
-        response = JSONResponse(content={"success": True})
+        response = FastJSONResponse(content={"success": True})
         response.set_cookie(
             key="admin_session",
             value=token,
             httponly=True,
             secure=True,
             samesite="lax",
-            max_age=14400,
+            max_age=int(ADMIN_SESSION_DURATION.total_seconds()),
             path="/"
         )
         return response
@@ -441,9 +506,14 @@ async def admin_login(request: Request):
 @router.post("/admin/logout")
 async def admin_logout(request: Request):
     token = request.cookies.get("admin_session", "")
-    if token:
-        revoke_admin_session(token)
-    response = JSONResponse(content={"success": True})
+    revoked = revoke_admin_session(token) if token else None
+    if revoked:
+        try:
+            async with _db_lane(request, LANE_ADMIN).acquire() as conn:
+                await publish_revocation(conn, revoked)
+        except Exception as e:
+            print(f"⚠️ Session revoked on this instance only: {e}", flush=True)
+    response = FastJSONResponse(content={"success": True})
     response.delete_cookie(key="admin_session", path="/")
     return response
 
@@ -453,16 +523,138 @@ async def verify_export_password(request: Request):
     password = body.get("password", "")
     if not verify_csv_password(password):
         raise HTTPException(status_code=403, detail="Mot de passe incorrect")
-    return {"success": True}
+    response = FastJSONResponse(content={"success": True})
+    response.set_cookie(
+        key="export_session",
+        value=create_export_token(),
+        httponly=True,
+        secure=True,
+        samesite="lax",
+        max_age=int(EXPORT_TOKEN_DURATION.total_seconds()),
+        path="/api/export"
+    )
+    return response
+
+
+def _parse_export_date(value: Optional[str], default: datetime) -> datetime:
+    return _parse_utc(value, "de date") if value else default
+
+
+@router.get("/export/cycles.csv")
+async def export_cycles_csv(
+    request: Request,
+    device_id: Optional[str] = Query(None, description="Filtrer par device_id"),
+    channel: Optional[str] = Query(None, description="Filtrer par canal"),
+    start_date: Optional[str] = Query(None, description="Date debut ISO (ex: 2025-01-01T00:00:00Z)"),
+    end_date: Optional[str] = Query(None, description="Date fin ISO (ex: 2025-12-31T23:59:59Z)"),
+    compress: Optional[str] = Query(None, pattern="^gzip$", description="gzip: fichier .csv.gz")
+):
+    if not (verify_admin_token(request.cookies.get("admin_session"))
+            or verify_export_token(request.cookies.get("export_session"))):
+        raise HTTPException(status_code=401, detail="Authentification requise pour l'export")
+
+    now = datetime.now(timezone.utc)
+    end_dt = _parse_export_date(end_date, now)
+    start_dt = _parse_export_date(start_date, end_dt - timedelta(days=config.DEFAULT_DAYS_HISTORY))
+    if start_dt > end_dt:
+        raise HTTPException(status_code=400, detail="Période invalide: start_date après end_date")
+
+    filename = f"cycles_pompes_filtreplante_{now.strftime('%Y-%m-%d')}.csv"
+    if compress:
+        media_type = "application/gzip"
+        filename += ".gz"
+    else:
+        media_type = "text/csv; charset=utf-8"
+    print(f"📤 CSV export requested: {device_id or 'all'} / {channel or 'all'} {start_dt.date()} -> {end_dt.date()}", flush=True)
+
+    return StreamingResponse(
+        stream_cycles_csv(
+            _db_lane(request, LANE_EXPORT), device_id, channel, start_dt, end_dt,
+            config.COMPRESSION_GZIP_LEVEL if compress else None
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"}
+    )
+
+
+@router.get("/export/raw")
+async def export_raw_measurements(
+    request: Request,
+    device_id: str = Query(..., description="device_id a exporter"),
+    channels: Optional[str] = Query(None, description="Canaux separes par des virgules (defaut: tous)"),
+    start_date: str = Query(..., description="Date debut ISO (ex: 2025-01-01T00:00:00Z)"),
+    end_date: Optional[str] = Query(None, description="Date fin ISO (defaut: maintenant)"),
+    fmt: str = Query("csv", alias="format", description="csv ou binary (format COPY binaire PostgreSQL)"),
+    compress: Optional[str] = Query(None, pattern="^gzip$", description="gzip: fichier compresse")
+):
+    if not verify_admin_token(request.cookies.get("admin_session")):
+        raise HTTPException(status_code=401, detail="Authentification admin requise")
+    if fmt not in RAW_EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Format invalide. Attendu: csv ou binary")
+
+    now = datetime.now(timezone.utc)
+    start_dt = _parse_export_date(start_date, now)
+    end_dt = _parse_export_date(end_date, now)
+    if start_dt > end_dt:
+        raise HTTPException(status_code=400, detail="Période invalide: start_date après end_date")
+    channel_list = [c.strip() for c in channels.split(",") if c.strip()] if channels else None
+
+    filename = f"power_logs_{device_id}_{start_dt.strftime('%Y%m%d')}_{end_dt.strftime('%Y%m%d')}"
+    if fmt == "csv":
+        filename += ".csv"
+        media_type = "text/csv; charset=utf-8"
+    else:
+        filename += ".pgcopy"
+        media_type = "application/octet-stream"
+    if compress:
+        filename += ".gz"
+        media_type = "application/gzip"
+    print(f"📤 Raw export requested: {device_id} {channel_list or 'all'} {start_dt.isoformat()} -> {end_dt.isoformat()} ({fmt})", flush=True)
+
+    return StreamingResponse(
+        stream_raw_copy(
+            _db_lane(request, LANE_EXPORT), device_id, channel_list, start_dt, end_dt, fmt,
+            config.COMPRESSION_GZIP_LEVEL if compress else None
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"}
+    )
 
 @router.get("/admin/check-session")
 async def check_admin_session(request: Request):
     token = request.cookies.get("admin_session", "")
     if verify_admin_token(token):
-        return {"authenticated": True}
+        return FastJSONResponse({"authenticated": True})
     raise HTTPException(status_code=401, detail="Non authentifié")
 
 
+@router.get("/admin/query-stats")
+async def get_query_stats(request: Request):
+    return FastJSONResponse(request.app.state.query_stats.stats())
+
+
+@router.delete("/admin/query-stats")
+async def reset_query_stats(request: Request):
+    request.app.state.query_stats.reset()
+    return FastJSONResponse({"success": True})
+
+
+INGEST_INSERT_SQL = register("ingest.insert", """
+    INSERT INTO power_logs
+    (timestamp, device_id, channel, apower_w, voltage_v, current_a, energy_total_wh, idempotency_key)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+    ON CONFLICT (idempotency_key) WHERE idempotency_key IS NOT NULL
+    DO NOTHING
+    RETURNING id
+""", critical=True, writes=True)
+
+INGEST_BATCH_MESSAGES = REGISTRY.histogram(
+    "ingest_batch_messages", "Messages per ingest batch", buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000)
+)
+INGEST_BATCH_SECONDS = REGISTRY.histogram("ingest_batch_duration_seconds", "Ingest batch processing time")
+INGEST_ROWS = REGISTRY.counter("ingest_rows_total", "Ingested rows by device and outcome", ("device", "result"))
+
+
 class ShellyMessage(BaseModel):
     src: str
     timestamp: int
@@ -513,8 +705,9 @@ async def ingest_batch(
     duplicates = 0
     errors = 0
     devices = set()
+    live_readings = []
 
-    db_pool = request.app.state.db_pool
+    db_pool = _db_lane(request, LANE_INGEST)
 
     async with db_pool.acquire() as conn:
         for msg in batch.messages:
@@ -544,47 +737,93 @@ async def ingest_batch(
                 idempotency_key = f"{device_id}_{ch_num}_{minute_epoch}"
 
                 try:
-                    row_id = await conn.fetchval("""
-                        INSERT INTO power_logs
-                        (timestamp, device_id, channel, apower_w, voltage_v, current_a, energy_total_wh, idempotency_key)
-                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-                        ON CONFLICT (idempotency_key) WHERE idempotency_key IS NOT NULL
-                        DO NOTHING
-                        RETURNING id
-                    """, ts, device_id, channel, apower, voltage, current, energy_total, idempotency_key)
+                    row_id = await conn.fetchval(
+                        INGEST_INSERT_SQL,
+                        ts, device_id, channel, apower, voltage, current, energy_total, idempotency_key
+                    )
 
                     if row_id is None:
                         duplicates += 1
+                        INGEST_ROWS.inc(1, device_id, "duplicate")
                     else:
                         inserted += 1
+                        INGEST_ROWS.inc(1, device_id, "inserted")
+                        live_readings.append((ts, device_id, channel, apower, voltage, current))
 
                 except Exception as e:
                     print(f"\u274c Insert failed for {idempotency_key}: {e}", flush=True)
                     errors += 1
+                    INGEST_ROWS.inc(1, device_id, "error")
+
+        try:
+            await record_ingest_rows(conn, ((r[0], r[1]) for r in live_readings))
+        except Exception as e:
+            print(f"\u26a0\ufe0f Ingest stats not updated: {e}", flush=True)
+
+    request.app.state.change_tracker.record_ingest((r[1], r[2]) for r in live_readings)
+    request.app.state.live_broker.publish_readings(live_readings)
+    if errors == 0:
+        request.app.state.startup_profile.record_first_ingest()
 
     processing_time = time.time() - start_time
+    INGEST_BATCH_MESSAGES.observe(len(batch.messages))
+    INGEST_BATCH_SECONDS.observe(processing_time)
     print(f"\U0001f4e5 Batch: {inserted} new, {duplicates} dup, {errors} err, "
           f"{len(batch.messages)} msgs, {len(devices)} devices, {processing_time:.2f}s", flush=True)
 
-    return {
+    return FastJSONResponse({
         "inserted": inserted,
         "duplicates": duplicates,
         "errors": errors,
         "total_messages": len(batch.messages),
         "devices": len(devices),
         "processing_time": round(processing_time, 2)
-    }
+    })
+
+
+@router.websocket("/live")
+async def live_stream(
+    websocket: WebSocket,
+    device_id: Optional[str] = None,
+    channel: Optional[str] = None
+):
+    broker = websocket.app.state.live_broker
+    await websocket.accept()
+    subscriber = broker.subscribe(device_id, channel)
+
+    try:
+        await websocket.send_json({
+            "type": "snapshot",
+            "cycles": broker.open_cycles(datetime.now(timezone.utc), device_id, channel)
+        })
+        while True:
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), timeout=config.LIVE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                await websocket.send_json({"type": "ping"})
+                continue
+            if message is None:
+                await websocket.close(code=1013)
+                break
+            await websocket.send_json(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        broker.unsubscribe(subscriber)
 
 
 @router.get("/config/current")
 async def get_all_current_configs_route(request: Request):
-    db_pool = request.app.state.db_pool
+    etag, not_modified = _conditional(request, "config-current", request.app.state.change_tracker.config_generation)
+    if not_modified:
+        return not_modified
+    db_pool = _db_lane(request, LANE_ADMIN)
     try:
         configs = await get_all_current_configs(db_pool)
         for c in configs:
             if c.get('effective_from'):
                 c['effective_from'] = c['effective_from'].isoformat()
-        return {"configs": configs}
+        return FastJSONResponse({"configs": configs}, headers=_cache_headers(etag))
     except Exception as e:
         print(f"❌ Error fetching current configs: {e}", flush=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -592,7 +831,7 @@ async def get_all_current_configs_route(request: Request):
 
 @router.put("/config/current")
 async def update_current_config_route(request: Request):
-    db_pool = request.app.state.db_pool
+    db_pool = _db_lane(request, LANE_ADMIN)
     try:
         body = await request.json()
         device_id = body.get("device_id")
@@ -626,7 +865,8 @@ async def update_current_config_route(request: Request):
             dco=dco_val,
             mes=mes_val
         )
-        return {"success": True}
+        _config_changed(request)
+        return FastJSONResponse({"success": True})
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
@@ -642,7 +882,13 @@ async def get_config_history_route(
     device_id: str = Query(...),
     channel: str = Query(...)
 ):
-    db_pool = request.app.state.db_pool
+    etag, not_modified = _conditional(
+        request, "config-history", device_id, channel, request.app.state.change_tracker.config_generation
+    )
+    if not_modified:
+        return not_modified
+
+    db_pool = _db_lane(request, LANE_ADMIN)
     try:
         history = await get_config_history(db_pool, device_id, channel)
         for h in history:
@@ -652,7 +898,7 @@ async def get_config_history_route(
                 h['effective_to'] = h['effective_to'].isoformat()
             if h.get('created_at'):
                 h['created_at'] = h['created_at'].isoformat()
-        return {"history": history}
+        return FastJSONResponse({"history": history}, headers=_cache_headers(etag))
     except Exception as e:
         print(f"❌ Error fetching config history: {e}", flush=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -660,7 +906,7 @@ async def get_config_history_route(
 
 @router.post("/config/version")
 async def add_config_version_route(request: Request):
-    db_pool = request.app.state.db_pool
+    db_pool = _db_lane(request, LANE_ADMIN)
     try:
         body = await request.json()
         device_id = body.get("device_id")
@@ -697,7 +943,8 @@ async def add_config_version_route(request: Request):
             dco=dco_val,
             mes=mes_val
         )
-        return {"success": True}
+        _config_changed(request)
+        return FastJSONResponse({"success": True})
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
@@ -707,162 +954,123 @@ async def add_config_version_route(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/config/versions/import")
+async def import_config_versions_route(request: Request):
+    db_pool = _db_lane(request, LANE_ADMIN)
+    try:
+        if request.headers.get("content-type", "").startswith("text/csv"):
+            try:
+                items = parse_config_versions_csv((await request.body()).decode("utf-8"))
+            except UnicodeDecodeError:
+                raise HTTPException(400, "CSV invalide: encodage UTF-8 requis")
+        else:
+            body = await request.json()
+            items = body.get("versions") if isinstance(body, dict) else body
+            if not isinstance(items, list):
+                raise HTTPException(400, "versions requis (liste)")
+
+        versions = validate_config_versions(items, config.CONFIG_IMPORT_MAX_ROWS)
+        result = await import_config_versions(db_pool, versions)
+        _config_changed(request)
+        return FastJSONResponse({"success": True, **result})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Error importing config versions: {e}", flush=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/power-chart-data")
 async def get_power_chart_data(
     request: Request,
     device_id: str = Query(...),
     channel: str = Query(None),
     period: str = Query("24h"),
-    end_date: str = Query(None)
+    end_date: str = Query(None),
+    since: Optional[str] = Query(None, description="Watermark ISO renvoye par l'appel precedent (mode delta)")
 ):
-    db_pool = request.app.state.db_pool
+    chart_channel = channel if channel and channel != "all" else None
+    etag, not_modified = _conditional(
+        request, "power-chart", device_id, chart_channel, period, end_date, since,
+        request.app.state.change_tracker.ingest_marker(device_id, chart_channel)
+    )
+    if not_modified:
+        return not_modified
 
     try:
-        print(f"🔍 DEBUG Chart - end_date param: {end_date!r}, period: {period}", flush=True)
-
-        if end_date:
-            try:
-                end_dt = datetime.strptime(end_date, "%Y-%m-%d").replace(
-                    hour=23, minute=59, second=59, tzinfo=timezone.utc
-                )
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Format end_date invalide. Attendu: YYYY-MM-DD")
-        else:
-            end_dt = datetime.now(timezone.utc)
-
-        if period == "7d":
-            start_time = end_dt - timedelta(days=7)
-        elif period == "30d":
-            start_time = end_dt - timedelta(days=30)
-        else:
-            start_time = end_dt - timedelta(hours=24)
-            period = "24h"
+        print(f"🔍 DEBUG Chart - end_date param: {end_date!r}, period: {period}, since: {since!r}", flush=True)
 
-        print(f"🔍 DEBUG Chart - end_dt: {end_dt.isoformat()}, start_time: {start_time.isoformat()}", flush=True)
-
-        if channel and channel != "all":
-            params = [device_id, start_time, end_dt, channel]
-            channel_filter_sql = "AND channel = $4"
-        else:
-            params = [device_id, start_time, end_dt]
-            channel_filter_sql = ""
-
-        if period == "24h":
-            time_bucket_expr = "date_trunc('hour', timestamp) + INTERVAL '5 minutes' * FLOOR(EXTRACT(MINUTE FROM timestamp) / 5)"
-        elif period == "7d":
-            time_bucket_expr = "date_trunc('hour', timestamp)"
-        else:
-            time_bucket_expr = "date_trunc('day', timestamp) + INTERVAL '6 hours' * FLOOR(EXTRACT(HOUR FROM timestamp) / 6)"
-
-        query = f"""
-            SELECT
-                {time_bucket_expr} as time_bucket,
-                channel,
-                AVG(apower_w) as avg_power_w,
-                AVG(current_a) as avg_current_a
-            FROM power_logs
-            WHERE device_id = $1
-              AND timestamp >= $2
-              AND timestamp <= $3
-              {channel_filter_sql}
-            GROUP BY time_bucket, channel
-            ORDER BY time_bucket ASC
-        """
-
-        async with db_pool.acquire() as conn:
-            rows = await conn.fetch(query, *params)
-
-        if period == "7d":
-            bucket_delta = timedelta(hours=1)
-        elif period == "30d":
-            bucket_delta = timedelta(hours=6)
-        else:
-            bucket_delta = timedelta(minutes=5)
-
-        gap_threshold = bucket_delta * 1.5
-
-        data_by_channel = {}
-        for row in rows:
-            ch = row['channel']
-            if ch not in data_by_channel:
-                data_by_channel[ch] = []
-
-            ts = row['time_bucket']
-            pw = round(float(row['avg_power_w']), 2) if row['avg_power_w'] else 0
-            ca = round(float(row['avg_current_a']), 3) if row['avg_current_a'] else 0
-            data_by_channel[ch].append((ts, pw, ca))
-
-        for ch in data_by_channel:
-            points = data_by_channel[ch]
-            points.sort(key=lambda x: x[0])
-            existing_ts = {p[0] for p in points}
-
-            enriched = []
-            for idx, (ts, pw, ca) in enumerate(points):
-                if idx > 0:
-                    prev_ts = points[idx - 1][0]
-                    gap = ts - prev_ts
-                    if gap >= gap_threshold:
-                        z1 = prev_ts + bucket_delta
-                        if start_time <= z1 <= end_dt and z1 not in existing_ts:
-                            enriched.append((z1, 0, 0))
-                        z2 = ts - bucket_delta
-                        if z2 > z1 and start_time <= z2 <= end_dt and z2 not in existing_ts:
-                            enriched.append((z2, 0, 0))
-                enriched.append((ts, pw, ca))
-
-            if enriched:
-                last_ts = enriched[-1][0]
-                z_end = last_ts + bucket_delta
-                if z_end <= end_dt and z_end not in existing_ts:
-                    enriched.append((z_end, 0, 0))
-
-            enriched.sort(key=lambda x: x[0])
-
-            data_by_channel[ch] = {
-                'timestamps': [p[0].isoformat() for p in enriched],
-                'power_w': [p[1] for p in enriched],
-                'current_a': [p[2] for p in enriched],
-            }
-
-        start_date_str = start_time.strftime("%Y-%m-%d")
-        end_date_str = end_dt.strftime("%Y-%m-%d")
-
-        return {
-            "device_id": device_id,
-            "period": period,
-            "start_date": start_date_str,
-            "end_date": end_date_str,
-            "start_time_iso": start_time.isoformat(),
-            "end_time_iso": end_dt.isoformat(),
-            "data": data_by_channel
-        }
+        result = await run_unless_disconnected(
+            request,
+            _power_chart_flight(request, device_id, channel, period, end_date, _parse_since(since)),
+            config.DISCONNECT_POLL_INTERVAL_SECONDS
+        )
+        return FastJSONResponse(result, headers=_cache_headers(etag))
 
-    except HTTPException:
+    except (HTTPException, AdmissionRejected):
         raise
+    except ClientDisconnected:
+        print("🔌 /api/power-chart-data: client disconnected, computation cancelled", flush=True)
+        return Response(status_code=499)
+    except asyncio.TimeoutError:
+        print(f"⏱️ /api/power-chart-data: query exceeded {config.POWER_CHART_QUERY_TIMEOUT_SECONDS}s", flush=True)
+        raise HTTPException(status_code=504, detail="Délai de requête dépassé, réduisez la période")
     except Exception as e:
         print(f"❌ Error fetching chart data: {e}", flush=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/ready")
+async def readiness(request: Request):
+    profile = request.app.state.startup_profile
+    return FastJSONResponse({"ready": profile.ready}, status_code=200 if profile.ready else 503)
+
+
+@router.get("/stats/startup")
+async def startup_stats(request: Request):
+    return FastJSONResponse(request.app.state.startup_profile.stats())
+
+
+@router.get("/stats/pool")
+async def get_pool_stats(request: Request):
+    stats = request.app.state.db_scheduler.stats()
+    stats["pool"] = pool_stats(request.app.state.db_pool)
+    stats["statements"] = {
+        "registered": len(STATEMENTS),
+        "cache_size": config.DB_STATEMENT_CACHE_SIZE
+    }
+    router = request.app.state.replica_router
+    stats["replica"] = router.stats()
+    if router.replica is not None:
+        stats["replica"]["scheduler"] = router.replica.stats()
+        stats["replica"]["pool"] = pool_stats(router.replica.pool)
+    return FastJSONResponse(stats)
+
+
+@router.get("/stats/compression")
+async def compression_stats(request: Request):
+    return FastJSONResponse(request.app.state.compression_stats.stats())
+
+
+@router.get("/stats/conditional")
+async def conditional_stats(request: Request):
+    return FastJSONResponse(request.app.state.change_tracker.stats())
+
+
+@router.get("/stats/coalescing")
+async def coalescing_stats(request: Request):
+    return FastJSONResponse(request.app.state.single_flight.stats())
+
+
 @router.get("/stats/queue")
 async def queue_stats(request: Request):
-    db_pool = request.app.state.db_pool
+    db_pool = _db_lane(request, LANE_ADMIN)
     async with db_pool.acquire() as conn:
-        result = await conn.fetchrow("""
-            SELECT
-                COUNT(*) as total,
-                COUNT(*) FILTER (WHERE idempotency_key IS NOT NULL) as from_queue,
-                MAX(timestamp) as last_insert,
-                COUNT(DISTINCT device_id) as devices
-            FROM power_logs
-            WHERE timestamp > NOW() - INTERVAL '24 hours'
-        """)
-
-    return {
-        "period": "24h",
-        "total_logs": result['total'],
-        "from_queue": result['from_queue'],
-        "devices": result['devices'],
-        "last_insert": result['last_insert'].strftime('%Y-%m-%dT%H:%M:%SZ') if result['last_insert'] else None
-    }
+        return FastJSONResponse(await load_queue_stats(conn))
+
+
+@router.get("/admin/metrics")
+async def metrics():
+    return Response(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
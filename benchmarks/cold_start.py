@@ -0,0 +1,76 @@
+"""Time from process spawn to the first successful /api/ingest/batch.
+
+Starts `uvicorn main:app` in a fresh interpreter (DATABASE_URL must point at a
+reachable database), posts a one-message batch every few milliseconds until
+one returns 200, then stops the server. Repeated to smooth out noise; the
+server's own phase breakdown is printed with STARTUP_PROFILE=1.
+
+    DATABASE_URL=... python -m benchmarks.cold_start [runs]
+"""
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+API_KEY = "cold-start-benchmark"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def batch_body() -> bytes:
+    now = int(time.time())
+    return json.dumps({"messages": [{
+        "src": "cold-start-bench",
+        "timestamp": now,
+        "params": {"switch:0": {"apower": 0.0, "voltage": 230.0, "current": 0.0}}
+    }]}).encode()
+
+
+def first_ingest(port: int, deadline: float) -> float:
+    url = f"http://127.0.0.1:{port}/api/ingest/batch"
+    started = time.perf_counter()
+    env = dict(os.environ, INGEST_API_KEY=API_KEY)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    try:
+        while time.perf_counter() - started < deadline:
+            request = urllib.request.Request(
+                url, data=batch_body(), method="POST",
+                headers={"Content-Type": "application/json", "X-API-Key": API_KEY}
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=5) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            time.sleep(0.005)
+        raise RuntimeError("no successful ingest before the deadline")
+    finally:
+        server.terminate()
+        output, _ = server.communicate(timeout=10)
+        if os.getenv("STARTUP_PROFILE") == "1":
+            print(output)
+
+
+def main(runs: int):
+    if not os.getenv("DATABASE_URL"):
+        sys.exit("DATABASE_URL is required")
+    timings = [first_ingest(free_port(), 30) for _ in range(runs)]
+    print(f"{runs} cold starts, first successful ingest after spawn")
+    print(f"  median {statistics.median(timings):.0f} ms, min {min(timings):.0f} ms, max {max(timings):.0f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,95 @@
+"""Serialisation cost of a 10,000-cycle /api/pump-cycles payload.
+
+"legacy" reproduces the former path: format every cycle timestamp with
+strftime, then FastAPI's jsonable_encoder and Starlette's json.dumps render.
+"dumps" is services.json_encoding.dumps on the raw result (datetimes left in
+place), timed with orjson when installed and with the stdlib fallback.
+
+    python -m benchmarks.json_serialization [cycles]
+"""
+import copy
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from services import json_encoding
+
+
+def build_result(count: int):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    cycles = []
+    for i in range(count):
+        begin = start + timedelta(minutes=17 * i)
+        cycles.append({
+            "device_id": "shellypro4pm-a0dd6c9ef474",
+            "channel": f"switch:{i % 4}",
+            "start_time": begin,
+            "end_time": begin + timedelta(minutes=6, seconds=i % 60),
+            "duration_minutes": 6.3,
+            "avg_power_w": 1234.5 + i % 100,
+            "avg_current_a": 5.37,
+            "avg_voltage_v": 231.4,
+            "records_count": 38,
+            "is_ongoing": False,
+            "pump_type": "relevage",
+            "volume_m3": 1.575,
+            "co2e_avoided_kg": 0.213,
+            "ch4_avoided_kg": 0.0076
+        })
+    return {
+        "mode": "full",
+        "watermark": start,
+        "total": count,
+        "filters": {"device_id": None, "channel": None, "start_date": start, "end_date": start},
+        "cycles": cycles
+    }
+
+
+def legacy(result):
+    for cycle in result["cycles"]:
+        cycle["start_time"] = cycle["start_time"].strftime('%Y-%m-%dT%H:%M:%SZ')
+        cycle["end_time"] = cycle["end_time"].strftime('%Y-%m-%dT%H:%M:%SZ')
+    result["watermark"] = result["watermark"].strftime('%Y-%m-%dT%H:%M:%SZ')
+    for key in ("start_date", "end_date"):
+        result["filters"][key] = result["filters"][key].strftime('%Y-%m-%dT%H:%M:%SZ')
+    return JSONResponse(jsonable_encoder(result)).body
+
+
+def best_of(fn, make_input, repeat: int = 5):
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        payload = make_input()
+        started = time.perf_counter()
+        body = fn(payload)
+        best = min(best, time.perf_counter() - started)
+        size = len(body)
+    return best * 1000, size
+
+
+def main(count: int):
+    base = build_result(count)
+    make_input = lambda: copy.deepcopy(base)
+
+    rows = [("legacy (strftime + jsonable_encoder + json.dumps)",) + best_of(legacy, make_input)]
+    if json_encoding.orjson is not None:
+        rows.append(("dumps (orjson)",) + best_of(json_encoding.dumps, make_input))
+    saved = json_encoding.orjson
+    json_encoding.orjson = None
+    try:
+        rows.append(("dumps (stdlib fallback)",) + best_of(json_encoding.dumps, make_input))
+    finally:
+        json_encoding.orjson = saved
+
+    baseline = rows[0][1]
+    print(f"{count} cycles")
+    print(f"{'path':<52} {'ms':>8} {'speedup':>8} {'bytes':>9}")
+    for name, ms, size in rows:
+        print(f"{name:<52} {ms:>8.1f} {baseline / ms:>7.1f}x {size:>9}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
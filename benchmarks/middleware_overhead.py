@@ -0,0 +1,147 @@
+"""Per-request overhead of the admin/logging middleware stack.
+
+Compares the former @app.middleware("http") (BaseHTTPMiddleware) layers with
+their print()-based logging against the raw ASGI middleware in
+api/middleware.py with queued, sampled logging, on a trivial JSON endpoint
+shaped like an ingestion call. Log output is captured and its volume reported.
+
+    python -m benchmarks.middleware_overhead [iterations]
+"""
+import asyncio
+import contextlib
+import io
+import sys
+import time
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, RedirectResponse
+
+from api.middleware import AdminProtectionMiddleware, RequestLoggingMiddleware
+from services.auth_service import verify_admin_token, is_admin_route
+from services.request_logging import setup_request_logging
+
+
+def build_bare_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/api/ingest/batch")
+    async def ingest():
+        return {"status": "ok", "inserted": 0}
+
+    return app
+
+
+def build_legacy_app() -> FastAPI:
+    app = build_bare_app()
+
+    @app.middleware("http")
+    async def admin_protection_middleware(request: Request, call_next):
+        path = request.url.path
+        if is_admin_route(path):
+            admin_session = request.cookies.get("admin_session")
+            if not verify_admin_token(admin_session):
+                if path.startswith("/api/"):
+                    return JSONResponse(status_code=401, content={"error": "Authentification admin requise"})
+                return RedirectResponse(url="/admin", status_code=302)
+        return await call_next(request)
+
+    @app.middleware("http")
+    async def log_requests(request: Request, call_next):
+        start_time = time.time()
+        now = datetime.now(timezone.utc)
+        client_ip = request.client.host if request.client else "unknown"
+        print(f"\U0001f50d [{now.strftime('%H:%M:%S.%f')[:-3]}] HTTP {request.method} {request.url.path}", flush=True)
+        print(f"   \U0001f4cd IP: {client_ip}", flush=True)
+        print(f"   \U0001f310 User-Agent: {request.headers.get('user-agent', 'unknown')}", flush=True)
+        print(f"   \U0001f517 Referer: {request.headers.get('referer', 'none')}", flush=True)
+        print(f"   \U0001f4cb Headers: {dict(request.headers)}", flush=True)
+        response = await call_next(request)
+        if request.url.path.startswith("/static/"):
+            response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+        duration = (time.time() - start_time) * 1000
+        print(f"   ✅ Status: {response.status_code} | Duration: {duration:.2f}ms", flush=True)
+        return response
+
+    return app
+
+
+def build_asgi_app() -> FastAPI:
+    app = build_bare_app()
+    app.add_middleware(AdminProtectionMiddleware)
+    app.add_middleware(RequestLoggingMiddleware)
+    return app
+
+
+async def call(app, body: bytes):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/ingest/batch",
+        "raw_path": b"/api/ingest/batch",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"localhost"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"user-agent", b"shelly-bench"),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 5000),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        return {"type": "http.disconnect"}
+
+    status = None
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def measure(app, iterations: int) -> float:
+    body = b'{"records": []}'
+    for _ in range(200):
+        await call(app, body)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await call(app, body)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+async def main(iterations: int):
+    apps = {
+        "bare": build_bare_app(),
+        "legacy (BaseHTTPMiddleware)": build_legacy_app(),
+        "raw ASGI": build_asgi_app(),
+    }
+    results = {}
+    for name, app in apps.items():
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            listener = setup_request_logging("INFO")
+            listener.start()
+            per_request = await measure(app, iterations)
+            listener.stop()
+        results[name] = (per_request, len(output.getvalue()))
+
+    baseline = results["bare"][0]
+    print(f"{'stack':<30} {'µs/request':>12} {'overhead µs':>12} {'log bytes':>12}")
+    for name, (per_request, log_bytes) in results.items():
+        print(f"{name:<30} {per_request:>12.1f} {per_request - baseline:>12.1f} {log_bytes:>12}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
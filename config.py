@@ -1,11 +1,83 @@
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL")
-DB_POOL_MIN_SIZE = 1
-DB_POOL_MAX_SIZE = 3
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "3"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+DB_MAX_INACTIVE_CONNECTION_LIFETIME = float(os.getenv("DB_MAX_INACTIVE_CONNECTION_LIFETIME", "300"))
+DB_REPLICA_POOL_MAX_SIZE = int(os.getenv("DB_REPLICA_POOL_MAX_SIZE", "3"))
+DB_REPLICA_ANALYTICS_MAX_CONCURRENCY = int(os.getenv("DB_REPLICA_ANALYTICS_MAX_CONCURRENCY", "2"))
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "30"))
+DB_REPLICA_CHECK_INTERVAL_SECONDS = float(os.getenv("DB_REPLICA_CHECK_INTERVAL_SECONDS", "5"))
+DB_INGEST_RESERVED_CONNECTIONS = int(os.getenv("DB_INGEST_RESERVED_CONNECTIONS", "1"))
+# Leaves one shared connection for admin and export; 1 with the default pool of 3.
+DB_ANALYTICS_MAX_CONCURRENCY = int(os.getenv(
+    "DB_ANALYTICS_MAX_CONCURRENCY", str(max(1, DB_POOL_MAX_SIZE - DB_INGEST_RESERVED_CONNECTIONS - 1))
+))
+DB_EXPORT_MAX_CONCURRENCY = int(os.getenv("DB_EXPORT_MAX_CONCURRENCY", "1"))
+
+# Analytics requests are priced in channel-days (services/db_scheduler.py
+# estimate_cost): days in the window × channels it covers, i.e. 1 for a
+# channel, ANALYTICS_CHANNELS_PER_DEVICE for a device, and that times
+# ANALYTICS_FLEET_DEVICES for the whole fleet.
+ANALYTICS_CHANNELS_PER_DEVICE = int(os.getenv("ANALYTICS_CHANNELS_PER_DEVICE", "4"))
+ANALYTICS_FLEET_DEVICES = int(os.getenv("ANALYTICS_FLEET_DEVICES", "4"))
+# Cost admitted at once before requests queue: one device over a month
+# (31 × 4 = 124 by default). A request alone is always admitted.
+ANALYTICS_BUDGET_DEVICE_DAYS = int(os.getenv("ANALYTICS_BUDGET_DEVICE_DAYS", "31"))
+ANALYTICS_COST_BUDGET = ANALYTICS_BUDGET_DEVICE_DAYS * ANALYTICS_CHANNELS_PER_DEVICE
+# Largest single request, rejected above: the whole fleet over a leap year
+# (366 × 4 × 4 = 5856 by default).
+ANALYTICS_MAX_FLEET_DAYS = int(os.getenv("ANALYTICS_MAX_FLEET_DAYS", "366"))
+ANALYTICS_MAX_COST = ANALYTICS_MAX_FLEET_DAYS * ANALYTICS_CHANNELS_PER_DEVICE * ANALYTICS_FLEET_DEVICES
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "10"))
+PUMP_CYCLES_QUERY_TIMEOUT_SECONDS = 30
+POWER_CHART_QUERY_TIMEOUT_SECONDS = 15
+DISCONNECT_POLL_INTERVAL_SECONDS = 0.5
 
 SHELLY_DEVICE_ID = "shellypro4pm-a0dd6c9ef474"
 
 GAP_THRESHOLD_MINUTES = 4
 MIN_CYCLE_DURATION_MINUTES = 2
 DEFAULT_DAYS_HISTORY = 30
+
+# Single instance only: /api/live subscribers see the readings ingested by
+# their own process, and ETag generations (services/change_tracker.py) are
+# bumped only by writes on this process. With several instances, run ingest
+# on the one serving /api/live; other instances serve stale 304s for at most
+# ETAG_TIME_BUCKET_SECONDS.
+LIVE_QUEUE_MAX_SIZE = 100
+LIVE_HEARTBEAT_SECONDS = 30
+
+REQUEST_LOG_LEVEL = os.getenv("REQUEST_LOG_LEVEL", "INFO")
+REQUEST_LOG_SLOW_MS = 1000
+REQUEST_LOG_SAMPLING = {
+    "/api/ingest/batch": 20,
+    "/api/stats/": 10,
+    "/api/admin/metrics": 10,
+    "/static/": 10,
+}
+
+ETAG_TIME_BUCKET_SECONDS = 60
+
+COMPRESSION_MIN_BYTES = 1024
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+CONFIG_IMPORT_MAX_ROWS = 5000
+
+EXPORT_CURSOR_PREFETCH = 2000
+EXPORT_CHUNK_ROWS = 500
+EXPORT_COPY_QUEUE_CHUNKS = 16
+
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "0") == "1"
+
+QUERY_SLOW_MS = float(os.getenv("QUERY_SLOW_MS", "500"))
+QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv("QUERY_EXPLAIN_SAMPLE_RATE", "0"))
+QUERY_EXPLAIN_COOLDOWN_SECONDS = 300
+QUERY_EXPLAIN_TIMEOUT_SECONDS = 30
+# Off: plans only. On: EXPLAIN (ANALYZE, BUFFERS), which runs the sampled
+# slow read a second time before the request that triggered it returns.
+QUERY_EXPLAIN_ANALYZE = os.getenv("QUERY_EXPLAIN_ANALYZE", "0") == "1"
+QUERY_STATS_HISTORY = 50
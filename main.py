@@ -1,82 +1,94 @@
-from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import PlainTextResponse, JSONResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+import functools
+import os
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import PlainTextResponse, RedirectResponse
 from datetime import datetime, timezone
 
 import config
-from services.database import create_db_pool, close_db_pool, create_tables
-from services.auth_service import verify_admin_token, is_admin_route
-from services.error_handler import generic_exception_handler, http_exception_handler
+from services.database import create_db_pool, close_db_pool, warm_pool
+from services.statements import ConnectionPreparer, STATEMENTS
+from services.migrations import run_migrations
+from services.auth_service import verify_admin_token
+from services.error_handler import generic_exception_handler, http_exception_handler, admission_rejected_handler
+from services.db_scheduler import PoolScheduler, AdmissionRejected
+from services.replica_router import ReplicaRouter
+from services.session_revocations import RevocationListener, load_revocations
+from services.query_stats import QueryStats
+from services.live_stream import LiveBroker
+from services.single_flight import SingleFlight
+from services.change_tracker import ChangeTracker
+from services.request_logging import setup_request_logging
+from services.static_assets import StaticAssetManifest
+from services.compression import CompressionStats
+from services.json_encoding import encoder_name
+from services.startup_profile import StartupProfile
 from api.routes import router as api_router
+from api.responses import FastJSONResponse
+from api.middleware import AdminProtectionMiddleware, CompressionMiddleware, RequestLoggingMiddleware
 
-app = FastAPI()
-
-app.mount("/static", StaticFiles(directory="web/static"), name="static")
-
-templates = Jinja2Templates(directory="web/templates")
-
-app.include_router(api_router)
-
-app.add_exception_handler(Exception, generic_exception_handler)
-app.add_exception_handler(HTTPException, http_exception_handler)
+startup_profile = StartupProfile(config.STARTUP_PROFILE, origin=_import_started)
+startup_profile.record("imports", _import_started)
 
+app = FastAPI(default_response_class=FastJSONResponse)
+app.state.startup_profile = startup_profile
 
-@app.middleware("http")
-async def admin_protection_middleware(request: Request, call_next):
-    path = request.url.path
+request_log_listener = setup_request_logging(config.REQUEST_LOG_LEVEL)
 
-    if is_admin_route(path):
-        admin_session = request.cookies.get("admin_session")
+app.state.live_broker = LiveBroker(
+    config.GAP_THRESHOLD_MINUTES,
+    config.MIN_CYCLE_DURATION_MINUTES,
+    config.LIVE_QUEUE_MAX_SIZE
+)
+app.state.single_flight = SingleFlight()
+app.state.change_tracker = ChangeTracker(config.ETAG_TIME_BUCKET_SECONDS)
+app.state.query_stats = QueryStats(
+    config.QUERY_SLOW_MS,
+    explain_sample_rate=config.QUERY_EXPLAIN_SAMPLE_RATE,
+    explain_cooldown=config.QUERY_EXPLAIN_COOLDOWN_SECONDS,
+    explain_timeout=config.QUERY_EXPLAIN_TIMEOUT_SECONDS,
+    explain_analyze=config.QUERY_EXPLAIN_ANALYZE,
+    history=config.QUERY_STATS_HISTORY
+)
 
-        if not verify_admin_token(admin_session):
-            if path == "/admin" and request.method == "GET":
-                pass
-            elif path == "/api/admin/login" and request.method == "POST":
-                pass
-            elif path == "/api/admin/logout" and request.method == "POST":
-                pass
-            elif path == "/api/admin/check-session" and request.method == "GET":
-                pass
-            else:
-                if path.startswith("/api/"):
-                    return JSONResponse(
-                        status_code=401,
-                        content={"error": "Authentification admin requise"}
-                    )
-                return RedirectResponse(url="/admin", status_code=302)
+connection_preparer = ConnectionPreparer()
 
-    return await call_next(request)
+# Fingerprinting/precompression and Jinja2 are built by the warm-up once the
+# server accepts requests, or on first use if a page is requested earlier.
+static_assets = StaticAssetManifest("web/static", "/static", eager=False)
+app.mount("/static", static_assets, name="static")
 
+TEMPLATES_DIR = "web/templates"
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    if request.headers.get("x-replit-healthcheck"):
-        return await call_next(request)
 
-    start_time = time.time()
-    now = datetime.now(timezone.utc)
+@functools.cache
+def get_templates():
+    from fastapi.templating import Jinja2Templates
+    templates = Jinja2Templates(directory=TEMPLATES_DIR)
+    templates.env.globals["static_url"] = static_assets.url
+    return templates
 
-    client_ip = request.client.host if request.client else "unknown"
-    user_agent = request.headers.get("user-agent", "unknown")
-    referer = request.headers.get("referer", "none")
 
-    print(f"\U0001f50d [{now.strftime('%H:%M:%S.%f')[:-3]}] HTTP {request.method} {request.url.path}", flush=True)
-    print(f"   \U0001f4cd IP: {client_ip}", flush=True)
-    print(f"   \U0001f310 User-Agent: {user_agent}", flush=True)
-    print(f"   \U0001f517 Referer: {referer}", flush=True)
-    print(f"   \U0001f4cb Headers: {dict(request.headers)}", flush=True)
+def load_templates():
+    templates = get_templates()
+    for name in sorted(os.listdir(TEMPLATES_DIR)):
+        templates.get_template(name)
 
-    response = await call_next(request)
+app.include_router(api_router)
 
-    if request.url.path.startswith("/static/"):
-        response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+app.add_exception_handler(Exception, generic_exception_handler)
+app.add_exception_handler(HTTPException, http_exception_handler)
+app.add_exception_handler(AdmissionRejected, admission_rejected_handler)
 
-    duration = (time.time() - start_time) * 1000
-    print(f"   \u2705 Status: {response.status_code} | Duration: {duration:.2f}ms", flush=True)
+app.state.compression_stats = CompressionStats()
 
-    return response
+app.add_middleware(AdminProtectionMiddleware)
+app.add_middleware(CompressionMiddleware, stats=app.state.compression_stats)
+app.add_middleware(RequestLoggingMiddleware)
 
 
 @app.get("/robots.txt", response_class=PlainTextResponse)
@@ -91,12 +103,12 @@ async def root():
 
 @app.get("/dashboard")
 async def dashboard(request: Request):
-    return templates.TemplateResponse("dashboard.html", {"request": request}, headers={"Cache-Control": "no-cache"})
+    return get_templates().TemplateResponse(request, "dashboard.html", headers={"Cache-Control": "no-cache"})
 
 
 @app.get("/admin")
 async def admin_page(request: Request):
-    return templates.TemplateResponse("admin.html", {"request": request}, headers={"Cache-Control": "no-cache"})
+    return get_templates().TemplateResponse(request, "admin.html", headers={"Cache-Control": "no-cache"})
 
 
 @app.get("/admin/pumps")
@@ -104,7 +116,54 @@ async def admin_pumps_page(request: Request):
     token = request.cookies.get("admin_session", "")
     if not verify_admin_token(token):
         return RedirectResponse(url="/admin", status_code=302)
-    return templates.TemplateResponse("admin_pumps.html", {"request": request}, headers={"Cache-Control": "no-cache"})
+    return get_templates().TemplateResponse(request, "admin_pumps.html", headers={"Cache-Control": "no-cache"})
+
+
+async def connect_replica(router: ReplicaRouter):
+    replica_pool = await create_db_pool(
+        config.DATABASE_REPLICA_URL,
+        1,
+        config.DB_REPLICA_POOL_MAX_SIZE,
+        statement_cache_size=config.DB_STATEMENT_CACHE_SIZE,
+        max_inactive_lifetime=config.DB_MAX_INACTIVE_CONNECTION_LIFETIME,
+        init=ConnectionPreparer(read_only=True, full=True)
+    )
+    app.state.db_replica_pool = replica_pool
+    router.attach(PoolScheduler(
+        replica_pool,
+        config.DB_REPLICA_POOL_MAX_SIZE,
+        ingest_reserved=0,
+        analytics_max_concurrency=config.DB_REPLICA_ANALYTICS_MAX_CONCURRENCY,
+        analytics_cost_budget=config.ANALYTICS_COST_BUDGET,
+        analytics_max_cost=config.ANALYTICS_MAX_COST,
+        queue_timeout=config.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        query_stats=app.state.query_stats,
+        name="replica"
+    ))
+    await router.check()
+    app.state.replica_check_task = asyncio.create_task(router.run())
+    print(f"\u2705 Read replica: pool of {config.DB_REPLICA_POOL_MAX_SIZE}, max lag {config.DB_REPLICA_MAX_LAG_SECONDS:.0f}s", flush=True)
+
+
+async def warm_up(db_pool):
+    try:
+        connection_preparer.full = True
+        with startup_profile.phase("warm-up: pool connections + statements"):
+            size = await warm_pool(db_pool, connection_preparer)
+        print(f"\u2705 Warm-up: {size} pool connections open, {len(STATEMENTS)} statements prepared", flush=True)
+    except Exception as e:
+        print(f"\u26a0\ufe0f Warm-up: pool not fully warmed: {e}", flush=True)
+    if config.DATABASE_REPLICA_URL:
+        try:
+            with startup_profile.phase("warm-up: read replica"):
+                await connect_replica(app.state.replica_router)
+        except Exception as e:
+            print(f"\u26a0\ufe0f Read replica unavailable, reads stay on the primary: {e}", flush=True)
+    with startup_profile.phase("warm-up: static assets"):
+        await asyncio.to_thread(static_assets.ensure_built)
+    with startup_profile.phase("warm-up: templates"):
+        await asyncio.to_thread(load_templates)
+    startup_profile.mark_ready()
 
 
 @app.on_event("startup")
@@ -114,18 +173,59 @@ async def startup():
     print(f"\U0001f680 [{now.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]} UTC] APPLICATION STARTUP (COLD START)", flush=True)
     print("=" * 80, flush=True)
 
+    request_log_listener.start()
+
     if not config.DATABASE_URL:
         print("ERROR: DATABASE_URL not found!", flush=True)
         return
 
-    db_pool = await create_db_pool(config.DATABASE_URL, config.DB_POOL_MIN_SIZE, config.DB_POOL_MAX_SIZE)
+    with startup_profile.phase("pool connect"):
+        db_pool = await create_db_pool(
+            config.DATABASE_URL,
+            config.DB_POOL_MIN_SIZE,
+            config.DB_POOL_MAX_SIZE,
+            statement_cache_size=config.DB_STATEMENT_CACHE_SIZE,
+            max_inactive_lifetime=config.DB_MAX_INACTIVE_CONNECTION_LIFETIME,
+            init=connection_preparer
+        )
     app.state.db_pool = db_pool
-    await create_tables(db_pool)
+    app.state.db_scheduler = PoolScheduler(
+        db_pool,
+        config.DB_POOL_MAX_SIZE,
+        ingest_reserved=config.DB_INGEST_RESERVED_CONNECTIONS,
+        analytics_max_concurrency=config.DB_ANALYTICS_MAX_CONCURRENCY,
+        export_max_concurrency=config.DB_EXPORT_MAX_CONCURRENCY,
+        analytics_cost_budget=config.ANALYTICS_COST_BUDGET,
+        analytics_max_cost=config.ANALYTICS_MAX_COST,
+        queue_timeout=config.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        query_stats=app.state.query_stats
+    )
+    app.state.replica_router = ReplicaRouter(
+        app.state.db_scheduler,
+        max_lag_seconds=config.DB_REPLICA_MAX_LAG_SECONDS,
+        check_interval=config.DB_REPLICA_CHECK_INTERVAL_SECONDS
+    )
+    with startup_profile.phase("schema check"):
+        await run_migrations(db_pool)
+    async with db_pool.acquire() as conn:
+        await load_revocations(conn)
+    app.state.revocation_task = asyncio.create_task(RevocationListener(config.DATABASE_URL).run())
     print("\u2705 Database: PostgreSQL connected", flush=True)
     print("\u2705 Ingestion: HTTP batch /api/ingest/batch", flush=True)
-    print("\u2705 Request logging: ENABLED (detailed)", flush=True)
+    print("\u2705 Live stream: WebSocket /api/live", flush=True)
+    print(f"\u2705 Pool: {config.DB_POOL_MIN_SIZE}-{config.DB_POOL_MAX_SIZE} connections, "
+          f"statement cache {config.DB_STATEMENT_CACHE_SIZE}, {len(STATEMENTS)} registered statements", flush=True)
+    if config.DB_STATEMENT_CACHE_SIZE < len(STATEMENTS):
+        print("\u26a0\ufe0f DB_STATEMENT_CACHE_SIZE is below the number of registered statements; prepared statements will be evicted", flush=True)
+    print(f"\u2705 JSON encoder: {encoder_name()}", flush=True)
+    print(f"\u2705 Query stats: slow log above {config.QUERY_SLOW_MS:.0f} ms, EXPLAIN sample rate {config.QUERY_EXPLAIN_SAMPLE_RATE}", flush=True)
+    print(f"\u2705 Request logging: structured, level {config.REQUEST_LOG_LEVEL}, sampled {config.REQUEST_LOG_SAMPLING}", flush=True)
+    startup_profile.mark_accepting()
+    print(f"\u2705 Accepting requests {startup_profile.accepting_ms:.0f} ms after process start", flush=True)
     print("=" * 80, flush=True)
 
+    app.state.warm_up_task = asyncio.create_task(warm_up(db_pool))
+
 
 @app.on_event("shutdown")
 async def shutdown():
@@ -134,5 +234,12 @@ async def shutdown():
     print(f"\U0001f4a4 [{now.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]} UTC] APPLICATION SHUTDOWN", flush=True)
     print("=" * 80, flush=True)
 
+    for task_name in ('warm_up_task', 'replica_check_task', 'revocation_task'):
+        task = getattr(app.state, task_name, None)
+        if task is not None and not task.done():
+            task.cancel()
+
+    await close_db_pool(getattr(app.state, 'db_replica_pool', None))
     db_pool = getattr(app.state, 'db_pool', None)
     await close_db_pool(db_pool)
+    request_log_listener.stop()
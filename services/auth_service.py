@@ -1,15 +1,20 @@
+import base64
+import hashlib
+import hmac
 import secrets
 import os
-from datetime import datetime, timezone, timedelta
-from typing import Optional
+import time
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
 
 ADMIN_SESSION_DURATION = timedelta(hours=4)
+EXPORT_TOKEN_DURATION = timedelta(minutes=10)
+TOKEN_VERSION = "v1"
+EXPORT_TOKEN_VERSION = "x1"
 
-admin_sessions = {}
-
-
-def generate_admin_token() -> str:
-    return secrets.token_urlsafe(32)
+_revoked_nonces: Dict[str, int] = {}
+_signing_key_cache: Tuple[Optional[Tuple[str, str]], bytes] = (None, b"")
+_process_secret = secrets.token_bytes(32)
 
 
 def verify_admin_password(password: str) -> bool:
@@ -24,41 +29,106 @@ def verify_csv_password(password: str) -> bool:
     return verify_admin_password(password)
 
 
+def verify_scrape_token(authorization: Optional[str]) -> bool:
+    expected = os.environ.get("METRICS_SCRAPE_TOKEN")
+    if not expected or not authorization:
+        return False
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer":
+        return False
+    return hmac.compare_digest(token.strip().encode(), expected.encode())
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _signing_key() -> bytes:
+    global _signing_key_cache
+    source = (os.environ.get("ADMIN_SESSION_SECRET", ""), os.environ.get("ADMIN_CSV_PASSWORD", ""))
+    if _signing_key_cache[0] == source:
+        return _signing_key_cache[1]
+    secret, password = source
+    if secret:
+        key = hashlib.sha256(b"admin-session|" + secret.encode()).digest()
+    elif password:
+        key = hashlib.sha256(b"admin-session-from-password|" + password.encode()).digest()
+    else:
+        key = _process_secret
+    _signing_key_cache = (source, key)
+    return key
+
+
+def _sign(payload: str) -> str:
+    return _b64(hmac.new(_signing_key(), payload.encode(), hashlib.sha256).digest())
+
+
+def _parse_token(token: Optional[str], expected_version: str = TOKEN_VERSION) -> Optional[Tuple[int, str]]:
+    if not token or token.count(".") != 3:
+        return None
+    version, expires, nonce, signature = token.split(".")
+    if version != expected_version or not expires.isdigit():
+        return None
+    if not hmac.compare_digest(signature.encode(), _sign(f"{version}.{expires}.{nonce}").encode()):
+        return None
+    return int(expires), nonce
+
+
+def _issue_token(version: str, duration: timedelta) -> str:
+    expires_at = int(time.time() + duration.total_seconds())
+    payload = f"{version}.{expires_at}.{_b64(secrets.token_bytes(12))}"
+    return f"{payload}.{_sign(payload)}"
+
+
 def create_admin_session() -> str:
-    token = generate_admin_token()
-    now = datetime.now(timezone.utc)
-    admin_sessions[token] = {
-        "created_at": now,
-        "expires_at": now + ADMIN_SESSION_DURATION,
-        "type": "admin"
-    }
-    cleanup_expired_sessions()
-    return token
+    return _issue_token(TOKEN_VERSION, ADMIN_SESSION_DURATION)
+
+
+def create_export_token() -> str:
+    return _issue_token(EXPORT_TOKEN_VERSION, EXPORT_TOKEN_DURATION)
+
+
+def verify_export_token(token: Optional[str]) -> bool:
+    parsed = _parse_token(token, EXPORT_TOKEN_VERSION)
+    return parsed is not None and parsed[0] > time.time()
 
 
 def verify_admin_token(token: Optional[str]) -> bool:
-    if not token or token not in admin_sessions:
-        return False
-    session = admin_sessions[token]
-    now = datetime.now(timezone.utc)
-    if now > session["expires_at"]:
-        del admin_sessions[token]
+    parsed = _parse_token(token)
+    if parsed is None:
         return False
-    return session["type"] == "admin"
+    expires_at, nonce = parsed
+    return expires_at > time.time() and nonce not in _revoked_nonces
+
 
+def _purge_revoked(now: float):
+    expired = [nonce for nonce, expires_at in _revoked_nonces.items() if expires_at <= now]
+    for nonce in expired:
+        del _revoked_nonces[nonce]
 
-def cleanup_expired_sessions():
-    now = datetime.now(timezone.utc)
-    expired = [t for t, s in admin_sessions.items() if now > s["expires_at"]]
-    for t in expired:
-        del admin_sessions[t]
 
+def mark_revoked(nonce: str, expires_at: int):
+    now = time.time()
+    _purge_revoked(now)
+    if expires_at > now:
+        _revoked_nonces[nonce] = expires_at
 
-def revoke_admin_session(token: str):
-    if token in admin_sessions:
-        del admin_sessions[token]
+
+def revoke_admin_session(token: str) -> Optional[Tuple[int, str]]:
+    # Local denylist only; services/session_revocations.py shares it with
+    # the other instances.
+    parsed = _parse_token(token)
+    if parsed is None:
+        return None
+    expires_at, nonce = parsed
+    mark_revoked(nonce, expires_at)
+    return parsed
 
 
 def is_admin_route(path: str) -> bool:
-    admin_prefixes = ["/admin", "/api/config/"]
+    admin_prefixes = ["/admin", "/api/admin/", "/api/config/", "/api/stats/"]
     return any(path.startswith(prefix) for prefix in admin_prefixes)
+
+
+def is_scrape_route(path: str) -> bool:
+    return path == "/api/admin/metrics" or path.startswith("/api/stats/")
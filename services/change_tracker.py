@@ -0,0 +1,70 @@
+import hashlib
+import secrets
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ChangeTracker:
+    # Generations live in this process and only see its own writes. The boot
+    # id keeps ETags from matching across instances, and the time bucket caps
+    # how long another instance's writes can go unnoticed.
+    def __init__(self, time_bucket_seconds: int = 60):
+        self.boot_id = secrets.token_hex(4)
+        self.time_bucket_seconds = time_bucket_seconds
+        self.ingest_generation = 0
+        self.topology_generation = 0
+        self.config_generation = 0
+        self._device_generation: Dict[str, int] = {}
+        self._channel_generation: Dict[Tuple[str, str], int] = {}
+        self.not_modified = 0
+
+    def record_ingest(self, pairs: Iterable[Tuple[str, str]]):
+        pairs = set(pairs)
+        if not pairs:
+            return
+        self.ingest_generation += 1
+        generation = self.ingest_generation
+        for device_id, channel in pairs:
+            if (device_id, channel) not in self._channel_generation:
+                self.topology_generation += 1
+            self._channel_generation[(device_id, channel)] = generation
+            self._device_generation[device_id] = generation
+
+    def record_config_change(self):
+        self.config_generation += 1
+
+    def ingest_marker(self, device_id: Optional[str] = None, channel: Optional[str] = None) -> int:
+        if device_id and channel:
+            return self._channel_generation.get((device_id, channel), 0)
+        if device_id:
+            return self._device_generation.get(device_id, 0)
+        return self.ingest_generation
+
+    def etag(self, *parts) -> str:
+        bucket = int(time.time() // self.time_bucket_seconds)
+        raw = "|".join(str(part) for part in (self.boot_id, bucket) + parts)
+        return 'W/"' + hashlib.blake2b(raw.encode(), digest_size=10).hexdigest() + '"'
+
+    def stats(self) -> Dict:
+        return {
+            "boot_id": self.boot_id,
+            "ingest_generation": self.ingest_generation,
+            "topology_generation": self.topology_generation,
+            "config_generation": self.config_generation,
+            "not_modified": self.not_modified
+        }
@@ -0,0 +1,167 @@
+import asyncpg
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from services.statements import register
+
+CHART_PERIODS = {
+    "24h": {
+        "window": timedelta(hours=24),
+        "bucket": timedelta(minutes=5),
+        "bucket_expr": "date_trunc('hour', timestamp) + INTERVAL '5 minutes' * FLOOR(EXTRACT(MINUTE FROM timestamp) / 5)"
+    },
+    "7d": {
+        "window": timedelta(days=7),
+        "bucket": timedelta(hours=1),
+        "bucket_expr": "date_trunc('hour', timestamp)"
+    },
+    "30d": {
+        "window": timedelta(days=30),
+        "bucket": timedelta(hours=6),
+        "bucket_expr": "date_trunc('day', timestamp) + INTERVAL '6 hours' * FLOOR(EXTRACT(HOUR FROM timestamp) / 6)"
+    },
+}
+
+
+def _buckets_sql(period: str, by_channel: bool) -> str:
+    return f"""
+        SELECT
+            {CHART_PERIODS[period]["bucket_expr"]} as time_bucket,
+            channel,
+            AVG(apower_w) as avg_power_w,
+            AVG(current_a) as avg_current_a
+        FROM power_logs
+        WHERE device_id = $1
+          AND timestamp >= $2
+          AND timestamp <= $3
+          {"AND channel = $4" if by_channel else ""}
+        GROUP BY time_bucket, channel
+        ORDER BY time_bucket ASC
+    """
+
+
+BUCKET_STATEMENTS = {
+    (period, by_channel): register(
+        f"chart.buckets.{period}" + (".channel" if by_channel else ""), _buckets_sql(period, by_channel)
+    )
+    for period in CHART_PERIODS
+    for by_channel in (False, True)
+}
+
+
+def normalize_period(period: Optional[str]) -> str:
+    return period if period in CHART_PERIODS else "24h"
+
+
+def chart_window(period: str, end_dt: datetime) -> Tuple[datetime, timedelta]:
+    spec = CHART_PERIODS[period]
+    return end_dt - spec["window"], spec["bucket"]
+
+
+def floor_to_bucket(ts: datetime, bucket_delta: timedelta) -> datetime:
+    day_start = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    offset = (ts - day_start) // bucket_delta
+    return day_start + bucket_delta * offset
+
+
+def enrich_with_gaps(points, bucket_delta: timedelta, start_time: datetime, end_dt: datetime,
+                     fetch_from: Optional[datetime] = None):
+    gap_threshold = bucket_delta * 1.5
+    points.sort(key=lambda x: x[0])
+    existing_ts = {p[0] for p in points}
+
+    enriched = []
+    for idx, (ts, pw, ca) in enumerate(points):
+        if idx > 0:
+            prev_ts = points[idx - 1][0]
+            gap = ts - prev_ts
+            if gap >= gap_threshold:
+                z1 = prev_ts + bucket_delta
+                if start_time <= z1 <= end_dt and z1 not in existing_ts:
+                    enriched.append((z1, 0, 0))
+                z2 = ts - bucket_delta
+                if z2 > z1 and start_time <= z2 <= end_dt and z2 not in existing_ts:
+                    enriched.append((z2, 0, 0))
+        elif fetch_from is not None and ts - fetch_from >= gap_threshold:
+            z2 = ts - bucket_delta
+            if start_time <= z2 <= end_dt:
+                enriched.append((z2, 0, 0))
+        enriched.append((ts, pw, ca))
+
+    if enriched:
+        last_ts = enriched[-1][0]
+        z_end = last_ts + bucket_delta
+        if z_end <= end_dt and z_end not in existing_ts:
+            enriched.append((z_end, 0, 0))
+
+    enriched.sort(key=lambda x: x[0])
+    return enriched
+
+
+async def build_power_chart(
+    pool: asyncpg.Pool,
+    device_id: str,
+    channel: Optional[str],
+    period: str,
+    end_dt: datetime,
+    since_dt: Optional[datetime] = None,
+    query_timeout: Optional[float] = None
+) -> Dict:
+    period = normalize_period(period)
+    start_time, bucket_delta = chart_window(period, end_dt)
+
+    replace_from = None
+    fetch_from = start_time
+    if since_dt:
+        replace_from = max(floor_to_bucket(since_dt, bucket_delta), start_time)
+        fetch_from = max(replace_from - bucket_delta * 2, start_time)
+
+    by_channel = bool(channel and channel != "all")
+    query = BUCKET_STATEMENTS[(period, by_channel)]
+    params = [device_id, fetch_from, end_dt] + ([channel] if by_channel else [])
+
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(query, *params, timeout=query_timeout)
+
+    watermark = since_dt
+    data_by_channel = {}
+    for row in rows:
+        ch = row['channel']
+        if ch not in data_by_channel:
+            data_by_channel[ch] = []
+
+        ts = row['time_bucket']
+        pw = round(float(row['avg_power_w']), 2) if row['avg_power_w'] else 0
+        ca = round(float(row['avg_current_a']), 3) if row['avg_current_a'] else 0
+        data_by_channel[ch].append((ts, pw, ca))
+        if watermark is None or ts > watermark:
+            watermark = ts
+
+    for ch in data_by_channel:
+        enriched = enrich_with_gaps(
+            data_by_channel[ch], bucket_delta, start_time, end_dt,
+            fetch_from if since_dt and fetch_from > start_time else None
+        )
+        if replace_from is not None:
+            enriched = [p for p in enriched if p[0] >= replace_from]
+
+        data_by_channel[ch] = {
+            'timestamps': [p[0] for p in enriched],
+            'power_w': [p[1] for p in enriched],
+            'current_a': [p[2] for p in enriched],
+        }
+
+    result = {
+        "mode": "delta" if since_dt else "full",
+        "device_id": device_id,
+        "period": period,
+        "start_date": start_time.strftime("%Y-%m-%d"),
+        "end_date": end_dt.strftime("%Y-%m-%d"),
+        "start_time_iso": start_time,
+        "end_time_iso": end_dt,
+        "watermark": watermark,
+        "data": data_by_channel
+    }
+    if replace_from is not None:
+        result["replace_from"] = replace_from
+    return result
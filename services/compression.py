@@ -0,0 +1,98 @@
+import gzip
+import zlib
+from typing import Dict, Optional, Set
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_PREFIXES = (
+    "text/", "application/json", "application/javascript", "application/x-ndjson", "image/svg+xml"
+)
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> Set[str]:
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        fields = part.strip().split(";")
+        coding = fields[0].strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in fields[1:]:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding)
+    return accepted
+
+
+def choose_encoding(accept_encoding: Optional[str], available=("br", "gzip")) -> Optional[str]:
+    encodings = accepted_encodings(accept_encoding)
+    for candidate in available:
+        if candidate in encodings and (candidate != "br" or brotli is not None):
+            return candidate
+    return None
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_PREFIXES)
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+class StreamCompressor:
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=level)
+        else:
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+class CompressionStats:
+    def __init__(self):
+        self.responses = 0
+        self.skipped_small = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+        self.by_encoding: Dict[str, int] = {}
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int, seconds: float):
+        self.responses += 1
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        self.seconds += seconds
+        self.by_encoding[encoding] = self.by_encoding.get(encoding, 0) + 1
+
+    def stats(self) -> Dict:
+        return {
+            "responses": self.responses,
+            "skipped_small": self.skipped_small,
+            "by_encoding": dict(self.by_encoding),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+            "compress_ms_total": round(self.seconds * 1000, 2),
+            "compress_ms_avg": round(self.seconds * 1000 / self.responses, 3) if self.responses else None
+        }
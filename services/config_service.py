@@ -1,14 +1,62 @@
 import asyncpg
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+from services.statements import register
+
+DEVICE_CHANNELS_SQL = register("devices.channels", """
+    SELECT DISTINCT device_id, channel
+    FROM power_logs
+    ORDER BY device_id, channel
+""")
+
+CONFIGS_MAP_SQL = register("configs.map", """
+    SELECT dc.device_id, dc.device_name, dc.channel, dc.channel_name,
+           dc.pump_model_id, dc.flow_rate, dc.pump_type,
+           dc.dbo5_mg_l, dc.dco_mg_l, dc.mes_mg_l,
+           pm.id as pm_id, pm.name as pm_name, pm.power_kw as pm_power_kw,
+           pm.current_ampere as pm_current_ampere, pm.flow_rate_hmt8 as pm_flow_rate_hmt8
+    FROM device_config dc
+    LEFT JOIN pump_models pm ON dc.pump_model_id = pm.id
+""")
+
+
+# Every channel the device has logged gets a config row. Walks the
+# channels one index probe at a time (loose index scan) instead of reading
+# the device's whole history for a DISTINCT.
+INSERT_DEVICE_NAME_SQL = """
+    WITH RECURSIVE channels AS (
+        (SELECT channel FROM power_logs WHERE device_id = $1 ORDER BY channel LIMIT 1)
+        UNION ALL
+        SELECT (
+            SELECT p.channel FROM power_logs p
+            WHERE p.device_id = $1 AND p.channel > c.channel
+            ORDER BY p.channel LIMIT 1
+        )
+        FROM channels c
+        WHERE c.channel IS NOT NULL
+    )
+    INSERT INTO device_config (device_id, device_name, channel)
+    SELECT $1, $2, channel FROM channels WHERE channel IS NOT NULL
+    ON CONFLICT (device_id, channel)
+    DO UPDATE SET device_name = EXCLUDED.device_name, updated_at = NOW()
+"""
+
+UPSERT_CHANNELS_SQL = """
+    INSERT INTO device_config (device_id, device_name, channel, channel_name, pump_model_id, flow_rate, pump_type, dbo5_mg_l, dco_mg_l, mes_mg_l)
+    SELECT $1, $2, c.channel, c.channel_name, c.pump_model_id, c.flow_rate, c.pump_type, $3, $4, $5
+    FROM unnest($6::text[], $7::text[], $8::int[], $9::real[], $10::text[])
+        AS c(channel, channel_name, pump_model_id, flow_rate, pump_type)
+    ON CONFLICT (device_id, channel)
+    DO UPDATE SET channel_name = EXCLUDED.channel_name, pump_model_id = EXCLUDED.pump_model_id,
+                  device_name = EXCLUDED.device_name, flow_rate = EXCLUDED.flow_rate,
+                  pump_type = EXCLUDED.pump_type, dbo5_mg_l = EXCLUDED.dbo5_mg_l,
+                  dco_mg_l = EXCLUDED.dco_mg_l, mes_mg_l = EXCLUDED.mes_mg_l, updated_at = NOW()
+"""
 
 
 async def get_all_devices_from_logs(pool: asyncpg.Pool) -> List[Dict]:
     async with pool.acquire() as conn:
-        rows = await conn.fetch("""
-            SELECT DISTINCT device_id, channel
-            FROM power_logs
-            ORDER BY device_id, channel
-        """)
+        rows = await conn.fetch(DEVICE_CHANNELS_SQL)
 
     devices = {}
     for row in rows:
@@ -22,15 +70,7 @@ async def get_all_devices_from_logs(pool: asyncpg.Pool) -> List[Dict]:
 
 async def get_configs_map(pool: asyncpg.Pool) -> Dict:
     async with pool.acquire() as conn:
-        rows = await conn.fetch("""
-            SELECT dc.device_id, dc.device_name, dc.channel, dc.channel_name,
-                   dc.pump_model_id, dc.flow_rate, dc.pump_type,
-                   dc.dbo5_mg_l, dc.dco_mg_l, dc.mes_mg_l,
-                   pm.id as pm_id, pm.name as pm_name, pm.power_kw as pm_power_kw,
-                   pm.current_ampere as pm_current_ampere, pm.flow_rate_hmt8 as pm_flow_rate_hmt8
-            FROM device_config dc
-            LEFT JOIN pump_models pm ON dc.pump_model_id = pm.id
-        """)
+        rows = await conn.fetch(CONFIGS_MAP_SQL)
 
     configs = {}
     for row in rows:
@@ -66,17 +106,13 @@ async def get_configs_map(pool: asyncpg.Pool) -> Dict:
 
 async def upsert_device_name(pool: asyncpg.Pool, device_id: str, device_name: Optional[str]):
     async with pool.acquire() as conn:
-        channels = await conn.fetch("""
-            SELECT DISTINCT channel FROM power_logs WHERE device_id = $1
-        """, device_id)
-
-        for ch in channels:
+        async with conn.transaction():
+            await conn.execute(INSERT_DEVICE_NAME_SQL, device_id, device_name)
+            # Configured channels that have not logged anything yet.
             await conn.execute("""
-                INSERT INTO device_config (device_id, device_name, channel)
-                VALUES ($1, $2, $3)
-                ON CONFLICT (device_id, channel) 
-                DO UPDATE SET device_name = $2, updated_at = NOW()
-            """, device_id, device_name, ch['channel'])
+                UPDATE device_config SET device_name = $2, updated_at = NOW()
+                WHERE device_id = $1 AND device_name IS DISTINCT FROM $2
+            """, device_id, device_name)
 
 
 async def upsert_channel_name(pool: asyncpg.Pool, device_id: str, channel: str, channel_name: Optional[str]):
@@ -160,13 +196,25 @@ async def upsert_device_with_channels(pool: asyncpg.Pool, device_id: str, device
                 UPDATE device_config SET device_name = $2, dbo5_mg_l = $3, dco_mg_l = $4, mes_mg_l = $5, updated_at = NOW()
                 WHERE device_id = $1
             """, device_id, device_name, dbo5_mg_l, dco_mg_l, mes_mg_l)
-            for ch in channels:
-                fr = ch.get('flow_rate')
-                flow_rate_val = float(fr) if fr is not None and fr != '' else None
-                pump_type_val = ch.get('pump_type', 'relevage')
-                await conn.execute("""
-                    INSERT INTO device_config (device_id, device_name, channel, channel_name, pump_model_id, flow_rate, pump_type, dbo5_mg_l, dco_mg_l, mes_mg_l)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
-                    ON CONFLICT (device_id, channel)
-                    DO UPDATE SET channel_name = $4, pump_model_id = $5, device_name = $2, flow_rate = $6, pump_type = $7, dbo5_mg_l = $8, dco_mg_l = $9, mes_mg_l = $10, updated_at = NOW()
-                """, device_id, device_name, ch['channel'], ch.get('name'), ch.get('pump_model_id'), flow_rate_val, pump_type_val, dbo5_mg_l, dco_mg_l, mes_mg_l)
+            await conn.execute(UPSERT_CHANNELS_SQL, device_id, device_name, dbo5_mg_l, dco_mg_l, mes_mg_l, *channel_columns(channels))
+
+
+def channel_columns(channels: List[Dict]) -> Tuple[List, ...]:
+    # One array per column for UPSERT_CHANNELS_SQL. A channel listed twice
+    # keeps its last entry, as the old per-channel upserts did.
+    rows = {}
+    for ch in channels:
+        fr = ch.get('flow_rate')
+        rows[ch['channel']] = (
+            ch.get('name'),
+            ch.get('pump_model_id'),
+            float(fr) if fr is not None and fr != '' else None,
+            ch.get('pump_type', 'relevage')
+        )
+    return (
+        list(rows),
+        [row[0] for row in rows.values()],
+        [row[1] for row in rows.values()],
+        [row[2] for row in rows.values()],
+        [row[3] for row in rows.values()]
+    )
@@ -1,6 +1,27 @@
+import csv
+import io
 import asyncpg
-from typing import Optional, List, Dict
-from datetime import date, timedelta
+from typing import Optional, Iterable, List, Dict, Tuple
+from datetime import date, datetime, timedelta
+
+from services.statements import register
+
+VALID_PUMP_TYPES = ('relevage', 'sortie', 'autre')
+VERSION_FIELDS = ('channel_name', 'pump_model_id', 'flow_rate', 'pump_type', 'dbo5', 'dco', 'mes')
+VERSION_COLUMNS = ('device_id', 'channel') + VERSION_FIELDS + ('effective_from', 'effective_to', 'version')
+
+# Temporal join on the validity range (GiST): the version in force on each
+# (device, channel, day). Versions can overlap after an earlier-dated
+# replacement; like the former in-memory lookup, the latest effective_from
+# (then the highest version) wins.
+CYCLE_CONFIGS_SQL = register("cycles.configs", """
+    SELECT DISTINCT ON (k.device_id, k.channel, k.day)
+           k.device_id, k.channel, k.day, v.pump_type, v.flow_rate, v.dbo5
+    FROM unnest($1::text[], $2::text[], $3::date[]) AS k(device_id, channel, day)
+    JOIN device_config_versions v
+      ON v.device_id = k.device_id AND v.channel = k.channel AND v.validity @> k.day
+    ORDER BY k.device_id, k.channel, k.day, v.effective_from DESC, v.version DESC
+""")
 
 
 async def get_current_config(
@@ -260,31 +281,202 @@ async def update_current_config(
         print(f"✅ Current config updated: {device_id}/{channel}", flush=True)
 
 
-async def bulk_load_configs_for_period(
-    pool: asyncpg.Pool,
-    device_id: str,
-    channel: str,
-    start_date: date,
-    end_date: date
-) -> List[Dict]:
+async def load_configs_for_days(pool: asyncpg.Pool, keys: Iterable[Tuple[str, str, date]]) -> Dict[Tuple[str, str, date], Dict]:
+    keys = list(keys)
+    if not keys:
+        return {}
     async with pool.acquire() as conn:
-        rows = await conn.fetch("""
-            SELECT device_id, channel, flow_rate, pump_type,
-                   dbo5, dco, mes, effective_from, effective_to
-            FROM device_config_versions
-            WHERE device_id = $1
-              AND channel = $2
-              AND effective_from <= $4
-              AND (effective_to IS NULL OR effective_to >= $3)
-            ORDER BY effective_from DESC, version DESC
-        """, device_id, channel, start_date, end_date)
-        return [dict(row) for row in rows]
+        rows = await conn.fetch(
+            CYCLE_CONFIGS_SQL, [k[0] for k in keys], [k[1] for k in keys], [k[2] for k in keys]
+        )
+    return {(row['device_id'], row['channel'], row['day']): dict(row) for row in rows}
+
+
+def parse_config_versions_csv(text: str) -> List[Dict]:
+    # Same separator as our CSV exports (;), commas accepted too.
+    text = text.lstrip("\ufeff")
+    header = text.split("\n", 1)[0]
+    delimiter = ";" if ";" in header or "," not in header else ","
+    reader = csv.DictReader(io.StringIO(text), delimiter=delimiter)
+    missing = [c for c in ('device_id', 'channel', 'effective_from') if c not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"Colonnes requises manquantes: {', '.join(missing)}")
+    return [
+        {key.strip(): (value.strip() or None) if isinstance(value, str) else value for key, value in row.items() if key}
+        for row in reader
+    ]
+
+
+def _parse_number(value, convert, name: str):
+    if value is None or value == '':
+        return None
+    try:
+        return convert(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} invalide: {value}")
+
+
+def validate_config_versions(items: List[Dict], max_rows: int) -> List[Dict]:
+    if not items:
+        raise ValueError("Aucune version a importer: liste requise")
+    if len(items) > max_rows:
+        raise ValueError(f"Import invalide: {len(items)} lignes, maximum {max_rows}")
+
+    versions = []
+    errors = []
+    for line, item in enumerate(items, start=1):
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("objet invalide")
+            device_id = item.get('device_id')
+            channel = item.get('channel')
+            effective_from = item.get('effective_from')
+            if not device_id or not channel or not effective_from:
+                raise ValueError("device_id, channel et effective_from requis")
+            try:
+                effective_from = datetime.strptime(str(effective_from), '%Y-%m-%d').date()
+            except ValueError:
+                raise ValueError(f"effective_from invalide: {effective_from}")
+            flow_rate = _parse_number(item.get('flow_rate'), float, 'flow_rate')
+            if flow_rate is not None and flow_rate <= 0:
+                raise ValueError("Le debit doit etre positif (flow_rate invalide)")
+            pump_type = item.get('pump_type') or None
+            if pump_type is not None and pump_type not in VALID_PUMP_TYPES:
+                raise ValueError(f"pump_type invalide: {pump_type}")
+            versions.append({
+                'device_id': str(device_id),
+                'channel': str(channel),
+                'effective_from': effective_from,
+                'channel_name': item.get('channel_name') or None,
+                'pump_model_id': _parse_number(item.get('pump_model_id'), int, 'pump_model_id'),
+                'flow_rate': flow_rate,
+                'pump_type': pump_type,
+                'dbo5': _parse_number(item.get('dbo5'), int, 'dbo5'),
+                'dco': _parse_number(item.get('dco'), int, 'dco'),
+                'mes': _parse_number(item.get('mes'), int, 'mes')
+            })
+        except ValueError as e:
+            errors.append(f"Ligne {line}: {e}")
+
+    if errors:
+        shown = "; ".join(errors[:10])
+        more = f" (+{len(errors) - 10} autres)" if len(errors) > 10 else ""
+        raise ValueError(f"Import invalide: {shown}{more}")
+    return versions
+
+
+def plan_config_import(versions: List[Dict], current: Dict[Tuple[str, str], Dict]) -> Dict:
+    # Replays add_config_version's SCD Type 2 rules in memory, in request
+    # order, so the whole import becomes a handful of set-based writes:
+    # a version dated on or before the open one replaces it (version + 1),
+    # a later one closes it the day before and starts again at version 1.
+    deletes = []
+    closes = []
+    pending: Dict[Tuple[str, str], List[Dict]] = {}
+    state = dict(current)
+
+    for line, v in enumerate(versions, start=1):
+        key = (v['device_id'], v['channel'])
+        open_row = state.get(key)
+        row = {'device_id': v['device_id'], 'channel': v['channel'], 'effective_from': v['effective_from'], 'effective_to': None}
+        for field in VERSION_FIELDS:
+            inherited = open_row[field] if open_row else ('relevage' if field == 'pump_type' else None)
+            row[field] = v[field] if v[field] is not None else inherited
+
+        if open_row is None:
+            row['version'] = 1
+        elif v['effective_from'] <= open_row['effective_from']:
+            row['version'] = open_row['version'] + 1
+            if open_row.get('id') is not None:
+                deletes.append(open_row['id'])
+            else:
+                pending[key] = [r for r in pending[key] if r is not open_row]
+        else:
+            closing_date = v['effective_from'] - timedelta(days=1)
+            if closing_date <= open_row['effective_from']:
+                raise ValueError(
+                    f"Import invalide: ligne {line}, {v['device_id']}/{v['channel']} effective_from "
+                    f"{v['effective_from']} doit suivre la version du {open_row['effective_from']} d'au moins 2 jours"
+                )
+            row['version'] = 1
+            if open_row.get('id') is not None:
+                closes.append((open_row['id'], closing_date))
+            else:
+                open_row['effective_to'] = closing_date
+
+        pending.setdefault(key, []).append(row)
+        state[key] = row
+
+    inserts = [row for rows in pending.values() for row in rows]
+    final = [state[key] for key in pending]
+    return {"deletes": deletes, "closes": closes, "inserts": inserts, "final": final}
+
 
+def _columns(rows: List[Dict], fields: Tuple[str, ...]) -> List[List]:
+    return [[row[field] for row in rows] for field in fields]
 
-def find_config_for_date_in_memory(configs: List[Dict], target_date: date) -> Optional[Dict]:
-    for cfg in configs:
-        ef = cfg['effective_from']
-        et = cfg['effective_to']
-        if ef <= target_date and (et is None or et > target_date):
-            return cfg
-    return None
+
+async def import_config_versions(pool: asyncpg.Pool, versions: List[Dict]) -> Dict:
+    keys = sorted({(v['device_id'], v['channel']) for v in versions})
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            rows = await conn.fetch("""
+                SELECT v.id, v.device_id, v.channel, v.channel_name, v.pump_model_id,
+                       v.flow_rate, v.pump_type, v.dbo5, v.dco, v.mes,
+                       v.effective_from, v.version
+                FROM device_config_versions v
+                JOIN unnest($1::text[], $2::text[]) AS k(device_id, channel)
+                  ON v.device_id = k.device_id AND v.channel = k.channel
+                WHERE v.effective_to IS NULL
+                ORDER BY v.version
+                FOR UPDATE OF v
+            """, [k[0] for k in keys], [k[1] for k in keys])
+            current = {(r['device_id'], r['channel']): dict(r) for r in rows}
+            plan = plan_config_import(versions, current)
+
+            try:
+                if plan['deletes']:
+                    await conn.execute("""
+                        DELETE FROM device_config_versions WHERE id = ANY($1::int[])
+                    """, plan['deletes'])
+                if plan['closes']:
+                    await conn.execute("""
+                        UPDATE device_config_versions v
+                        SET effective_to = c.effective_to
+                        FROM unnest($1::int[], $2::date[]) AS c(id, effective_to)
+                        WHERE v.id = c.id
+                    """, [c[0] for c in plan['closes']], [c[1] for c in plan['closes']])
+                await conn.execute("""
+                    INSERT INTO device_config_versions (
+                        device_id, channel, channel_name, pump_model_id,
+                        flow_rate, pump_type, dbo5, dco, mes,
+                        effective_from, effective_to, version
+                    )
+                    SELECT * FROM unnest(
+                        $1::text[], $2::text[], $3::text[], $4::int[],
+                        $5::real[], $6::text[], $7::int[], $8::int[], $9::int[],
+                        $10::date[], $11::date[], $12::int[]
+                    )
+                """, *_columns(plan['inserts'], VERSION_COLUMNS))
+                await conn.execute("""
+                    UPDATE device_config dc
+                    SET channel_name = f.channel_name, pump_model_id = f.pump_model_id,
+                        flow_rate = f.flow_rate, pump_type = f.pump_type,
+                        dbo5_mg_l = f.dbo5, dco_mg_l = f.dco, mes_mg_l = f.mes, updated_at = NOW()
+                    FROM unnest(
+                        $1::text[], $2::text[], $3::text[], $4::int[],
+                        $5::real[], $6::text[], $7::int[], $8::int[], $9::int[]
+                    ) AS f(device_id, channel, channel_name, pump_model_id, flow_rate, pump_type, dbo5, dco, mes)
+                    WHERE dc.device_id = f.device_id AND dc.channel = f.channel
+                """, *_columns(plan['final'], ('device_id', 'channel') + VERSION_FIELDS))
+            except asyncpg.IntegrityConstraintViolationError as e:
+                raise ValueError(f"Import invalide: {e.detail or e}")
+
+    print(f"✅ Config versions imported: {len(versions)} versions, {len(plan['final'])} channels, "
+          f"{len(plan['closes'])} closed, {len(plan['deletes'])} replaced", flush=True)
+    return {
+        "imported": len(versions),
+        "channels": len(plan['final']),
+        "closed": len(plan['closes']),
+        "replaced": len(plan['deletes'])
+    }
@@ -118,3 +118,70 @@ def detect_cycles(
     cycles.sort(key=lambda x: x["start_time"], reverse=True)
 
     return cycles
+
+
+def _cycle_dict(dev_id, channel, start, end, powers, currents, voltages, is_ongoing):
+    return {
+        "device_id": dev_id,
+        "channel": channel,
+        "start_time": start,
+        "end_time": end if not is_ongoing else None,
+        "duration_minutes": round((end - start).total_seconds() / 60, 1),
+        "avg_power_w": round(sum(powers) / len(powers), 1),
+        "avg_current_a": round(sum(currents) / len(currents), 2),
+        "avg_voltage_v": _median_voltage(voltages),
+        "records_count": len(powers),
+        "is_ongoing": is_ongoing
+    }
+
+
+class StreamingCycleDetector:
+    # Same rules as detect_cycles, one record at a time. Records must arrive
+    # ordered by (device_id, channel, timestamp); only the open cycle is kept.
+
+    def __init__(self, gap_threshold_minutes: int = 4, min_duration_minutes: int = 2):
+        self.gap_threshold_minutes = gap_threshold_minutes
+        self.min_duration_minutes = min_duration_minutes
+        self._key = None
+        self._start = None
+        self._last = None
+        self._powers = []
+        self._currents = []
+        self._voltages = []
+
+    def feed(self, timestamp, channel, apower, device_id, current, voltage) -> List[Dict]:
+        key = (device_id, channel)
+        if key == self._key and (timestamp - self._last).total_seconds() / 60 < self.gap_threshold_minutes:
+            self._last = timestamp
+            self._powers.append(apower)
+            self._currents.append(current)
+            self._voltages.append(voltage)
+            return []
+
+        if key == self._key:
+            finished = self._close_by_gap()
+        else:
+            finished = self.finish()
+        self._key = key
+        self._start = self._last = timestamp
+        self._powers = [apower]
+        self._currents = [current]
+        self._voltages = [voltage]
+        return finished
+
+    def _close_by_gap(self) -> List[Dict]:
+        duration = (self._last - self._start).total_seconds() / 60
+        if duration < self.min_duration_minutes:
+            return []
+        return [_cycle_dict(*self._key, self._start, self._last, self._powers, self._currents, self._voltages, False)]
+
+    def finish(self) -> List[Dict]:
+        if self._key is None:
+            return []
+        duration = (self._last - self._start).total_seconds() / 60
+        is_ongoing = (datetime.now(timezone.utc) - self._last).total_seconds() / 60 < self.gap_threshold_minutes
+        cycle = None
+        if duration >= self.min_duration_minutes or is_ongoing:
+            cycle = _cycle_dict(*self._key, self._start, self._last, self._powers, self._currents, self._voltages, is_ongoing)
+        self._key = None
+        return [cycle] if cycle else []
@@ -0,0 +1,301 @@
+import asyncio
+import time
+import asyncpg
+from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import config
+from services.cycle_detector import detect_cycles
+from services.volume_calculator import calculate_volume_m3
+from services.co2e_calculator import calculate_co2e_impact
+from services.config_service import get_configs_map
+from services.config_versions_service import load_configs_for_days
+from services.statements import register
+from services.metrics import REGISTRY
+
+
+CYCLE_FIELDS = (
+    "device_id", "channel", "start_time", "end_time", "duration_minutes", "avg_power_w",
+    "avg_current_a", "avg_voltage_v", "records_count", "is_ongoing", "pump_type",
+    "volume_m3", "co2e_avoided_kg", "ch4_avoided_kg"
+)
+SECTION_FIELDS = ("device_ids", "configs", "stats", "treatment_stats", "co2e_impact", "filters")
+IMPACT_FIELDS = frozenset({"pump_type", "volume_m3", "co2e_avoided_kg", "ch4_avoided_kg", "treatment_stats", "co2e_impact"})
+DICTIONARY_COLUMNS = ("device_id", "channel")
+
+CYCLE_DETECTION_CPU_SECONDS = REGISTRY.histogram(
+    "cycle_detection_cpu_seconds", "CPU time spent in detect_cycles per request",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+
+def _readings_sql(by_device: bool, by_channel: bool) -> str:
+    query = """
+        SELECT timestamp, channel, apower_w, device_id, current_a, voltage_v
+        FROM power_logs
+        WHERE timestamp >= $1 AND timestamp <= $2"""
+    if by_device:
+        query += "\n          AND device_id = $3"
+    if by_channel:
+        query += f"\n          AND channel = ${4 if by_device else 3}"
+    return query + "\n        ORDER BY device_id, channel, timestamp ASC"
+
+
+READINGS_SUFFIXES = {
+    (False, False): "",
+    (True, False): ".device",
+    (False, True): ".channel",
+    (True, True): ".device_channel"
+}
+READINGS_STATEMENTS = {
+    shape: register("cycles.readings" + suffix, _readings_sql(*shape))
+    for shape, suffix in READINGS_SUFFIXES.items()
+}
+
+
+def readings_query(device_id: Optional[str], channel: Optional[str], start_dt: datetime, end_dt: datetime) -> Tuple[str, list]:
+    params = [start_dt, end_dt] + [value for value in (device_id, channel) if value]
+    return READINGS_STATEMENTS[(bool(device_id), bool(channel))], params
+
+
+def parse_fields(fields: Optional[str]) -> Optional[FrozenSet[str]]:
+    if not fields:
+        return None
+    requested = frozenset(f.strip() for f in fields.split(",") if f.strip())
+    unknown = requested - set(CYCLE_FIELDS) - set(SECTION_FIELDS)
+    if unknown:
+        raise ValueError(f"Champs invalides: {', '.join(sorted(unknown))}")
+    return requested
+
+
+def normalize_cycles(result: Dict, fields: Optional[FrozenSet[str]] = None) -> Dict:
+    columns = [f for f in CYCLE_FIELDS if fields is None or f in fields]
+    dictionaries = {name: [] for name in DICTIONARY_COLUMNS if name in columns}
+    codes = {name: {} for name in dictionaries}
+    rows = []
+    for cycle in result["cycles"]:
+        row = []
+        for column in columns:
+            value = cycle.get(column)
+            if column in codes:
+                code = codes[column].get(value)
+                if code is None:
+                    code = codes[column][value] = len(dictionaries[column])
+                    dictionaries[column].append(value)
+                value = code
+            row.append(value)
+        rows.append(row)
+
+    normalized = {k: v for k, v in result.items() if k not in ("cycles", "configs")}
+    normalized.update(layout="normalized", dictionaries=dictionaries, columns=columns, cycles=rows)
+    return normalized
+
+
+def last_fragment_starts(records_list: List[tuple], gap_threshold_minutes: int) -> Dict[Tuple[str, str], datetime]:
+    gap_seconds = gap_threshold_minutes * 60
+    starts = {}
+    previous = {}
+    for record in records_list:
+        key = (record[3], record[1])
+        ts = record[0]
+        prev_ts = previous.get(key)
+        if prev_ts is None or (ts - prev_ts).total_seconds() >= gap_seconds:
+            starts[key] = ts
+        previous[key] = ts
+    return starts
+
+
+async def detect_cycles_cooperatively(records_list: List[tuple]) -> List[Dict]:
+    cycles = []
+    group_start = 0
+    cpu_seconds = 0.0
+    for idx in range(1, len(records_list) + 1):
+        if idx < len(records_list) and records_list[idx][3] == records_list[group_start][3] \
+                and records_list[idx][1] == records_list[group_start][1]:
+            continue
+        started = time.thread_time()
+        cycles.extend(detect_cycles(
+            records_list[group_start:idx],
+            gap_threshold_minutes=config.GAP_THRESHOLD_MINUTES,
+            min_duration_minutes=config.MIN_CYCLE_DURATION_MINUTES
+        ))
+        cpu_seconds += time.thread_time() - started
+        group_start = idx
+        await asyncio.sleep(0)
+    CYCLE_DETECTION_CPU_SECONDS.observe(cpu_seconds)
+    cycles.sort(key=lambda x: x["start_time"], reverse=True)
+    return cycles
+
+
+async def build_pump_cycles(
+    pool: asyncpg.Pool,
+    device_id: Optional[str],
+    channel: Optional[str],
+    start_dt: datetime,
+    end_dt: datetime,
+    limit: int,
+    since_dt: Optional[datetime] = None,
+    query_timeout: Optional[float] = None,
+    configs: Optional[Dict] = None,
+    fields: Optional[FrozenSet[str]] = None
+) -> Dict:
+    def wanted(name: str) -> bool:
+        return fields is None or name in fields
+
+    need_impact = fields is None or bool(fields & IMPACT_FIELDS)
+    gap = timedelta(minutes=config.GAP_THRESHOLD_MINUTES)
+    fetch_from = max(start_dt, since_dt - gap) if since_dt else start_dt
+
+    query, params = readings_query(device_id, channel, fetch_from, end_dt)
+
+    async with pool.acquire() as conn:
+        records = await conn.fetch(query, *params, timeout=query_timeout)
+
+    print(f"📊 API: Fetched {len(records)} records for cycle detection", flush=True)
+
+    records_list = [(r['timestamp'], r['channel'], r['apower_w'], r['device_id'], r['current_a'], r['voltage_v']) for r in records]
+
+    cycles = await detect_cycles_cooperatively(records_list)
+
+    if since_dt:
+        cycles = [c for c in cycles if c['start_time'] >= since_dt]
+
+    print(f"🔍 API: Detected {len(cycles)} cycles", flush=True)
+
+    cycles = cycles[:limit]
+
+    fragment_starts = last_fragment_starts(records_list, config.GAP_THRESHOLD_MINUTES)
+    if fragment_starts:
+        watermark = min(fragment_starts.values())
+        if since_dt:
+            watermark = max(watermark, since_dt)
+    else:
+        watermark = since_dt or start_dt
+
+    # One temporal join for every (device, channel, day) the cycles touch.
+    config_keys = set()
+    for cycle in cycles if need_impact else ():
+        dev = cycle.get('device_id')
+        ch = cycle.get('channel')
+        if dev and ch:
+            cycle_start = cycle.get('start_time')
+            config_keys.add((dev, ch, cycle_start.date() if cycle_start else start_dt.date()))
+    cycle_configs = await load_configs_for_days(pool, config_keys)
+
+    stats = {
+        "max_current": 0,
+        "min_current": float('inf'),
+        "max_power": 0,
+        "min_power": float('inf')
+    }
+
+    treated_water_m3 = 0.0
+    total_co2e_avoided = 0.0
+    total_ch4_avoided = 0.0
+
+    for idx, cycle in enumerate(cycles):
+        if idx % 500 == 499:
+            await asyncio.sleep(0)
+
+        if wanted('stats'):
+            pw = cycle.get('avg_power_w')
+            if pw is not None:
+                stats['max_power'] = max(stats['max_power'], pw)
+                stats['min_power'] = min(stats['min_power'], pw)
+            ca = cycle.get('avg_current_a')
+            if ca is not None:
+                stats['max_current'] = max(stats['max_current'], ca)
+                stats['min_current'] = min(stats['min_current'], ca)
+
+        if not need_impact:
+            continue
+
+        dev = cycle.get('device_id')
+        ch = cycle.get('channel')
+
+        cycle_start = cycle.get('start_time')
+        cycle_date = cycle_start.date() if cycle_start else start_dt.date()
+
+        versioned_config = cycle_configs.get((dev, ch, cycle_date))
+
+        pump_type = versioned_config['pump_type'] if versioned_config and versioned_config.get('pump_type') else 'relevage'
+        flow_rate = versioned_config['flow_rate'] if versioned_config else None
+        cycle['pump_type'] = pump_type
+
+        if pump_type == 'relevage' and flow_rate and cycle.get('duration_minutes'):
+            volume = calculate_volume_m3(flow_rate, cycle['duration_minutes'])
+            cycle['volume_m3'] = volume
+            if not cycle.get('is_ongoing'):
+                treated_water_m3 += volume
+                dbo5_for_cycle = versioned_config.get('dbo5', 570) if versioned_config else 570
+                impact = calculate_co2e_impact(volume, dbo5_for_cycle or 570)
+                cycle['co2e_avoided_kg'] = impact['co2e_avoided_kg']
+                cycle['ch4_avoided_kg'] = impact['ch4_avoided_kg']
+                total_co2e_avoided += impact['co2e_avoided_kg']
+                total_ch4_avoided += impact['ch4_avoided_kg']
+        else:
+            cycle['volume_m3'] = None
+
+    if stats['min_current'] == float('inf'):
+        stats['min_current'] = 0
+    if stats['min_power'] == float('inf'):
+        stats['min_power'] = 0
+    stats = {k: round(v, 1) for k, v in stats.items()}
+
+    num_days = (end_dt - start_dt).days + 1
+    treated_water_per_day = round(treated_water_m3 / num_days, 2) if num_days > 0 else 0
+
+    if treated_water_m3 > 0:
+        co2e_impact = {
+            "co2e_avoided_kg": round(total_co2e_avoided, 2),
+            "reduction_percent": round(94.0, 1),
+            "ch4_avoided_kg": round(total_ch4_avoided, 2)
+        }
+    else:
+        co2e_impact = calculate_co2e_impact(0, 570)
+
+    filters = {
+        "device_id": device_id,
+        "channel": channel,
+        "start_date": start_dt,
+        "end_date": end_dt
+    }
+
+    if fields is not None:
+        cycles = [{k: c[k] for k in CYCLE_FIELDS if k in fields and k in c} for c in cycles]
+
+    if since_dt:
+        result = {
+            "mode": "delta",
+            "since": since_dt,
+            "watermark": watermark,
+            "total": len(cycles)
+        }
+        if wanted('filters'):
+            result["filters"] = filters
+        result["cycles"] = cycles
+        return result
+
+    result = {
+        "mode": "full",
+        "watermark": watermark,
+        "total": len(cycles)
+    }
+    if wanted('device_ids'):
+        result["device_ids"] = list(set(r['device_id'] for r in records))
+    if wanted('configs'):
+        result["configs"] = configs if configs is not None else await get_configs_map(pool)
+    if wanted('stats'):
+        result["stats"] = stats
+    if wanted('treatment_stats'):
+        result["treatment_stats"] = {
+            "treated_water_m3": round(treated_water_m3, 2),
+            "treated_water_per_day": treated_water_per_day,
+            "num_days": num_days
+        }
+    if wanted('co2e_impact'):
+        result["co2e_impact"] = co2e_impact
+    if wanted('filters'):
+        result["filters"] = filters
+    result["cycles"] = cycles
+    return result
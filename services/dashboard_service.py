@@ -0,0 +1,42 @@
+import asyncio
+import asyncpg
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from services.config_service import get_all_devices_from_logs, get_configs_map
+
+
+def attach_device_names(devices: List[Dict], configs: Dict) -> List[Dict]:
+    for device in devices:
+        did = device['device_id']
+        if did in configs:
+            device['device_name'] = configs[did]['device_name']
+            device['channel_names'] = {ch: info['channel_name'] for ch, info in configs[did]['channels'].items()}
+        else:
+            device['device_name'] = None
+            device['channel_names'] = {}
+    return devices
+
+
+async def build_dashboard_bootstrap(
+    pool: asyncpg.Pool,
+    load_cycles: Callable[[Dict], Awaitable[Dict]],
+    load_chart: Optional[Callable[[], Awaitable[Dict]]] = None
+) -> Dict:
+    async def devices_and_cycles():
+        devices, configs = await asyncio.gather(get_all_devices_from_logs(pool), get_configs_map(pool))
+        cycles = await load_cycles(configs)
+        return attach_device_names(devices, configs), cycles
+
+    chart = None
+    if load_chart is None:
+        devices, cycles = await devices_and_cycles()
+    else:
+        tasks = [asyncio.ensure_future(load_chart()), asyncio.ensure_future(devices_and_cycles())]
+        try:
+            chart, (devices, cycles) = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    return {"devices": devices, "cycles": cycles, "chart": chart}
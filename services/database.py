@@ -1,13 +1,33 @@
+import asyncio
 import asyncpg
-from typing import Optional
+from typing import Awaitable, Callable, Dict, Optional
 
 
-async def create_db_pool(database_url: str, min_size: int, max_size: int):
+async def _reset_connection(conn: asyncpg.Connection):
+    # asyncpg still rolls back any open transaction before calling this. The
+    # app never LISTENs, SETs session variables or keeps cursors/advisory locks
+    # past their block, so the default RESET ALL/UNLISTEN/CLOSE ALL round trip
+    # on every release is skipped.
+    pass
+
+
+async def create_db_pool(
+    database_url: str,
+    min_size: int,
+    max_size: int,
+    statement_cache_size: int = 100,
+    max_inactive_lifetime: float = 300.0,
+    init: Optional[Callable[[asyncpg.Connection], Awaitable[None]]] = None
+):
     try:
         pool = await asyncpg.create_pool(
             database_url,
             min_size=min_size,
-            max_size=max_size
+            max_size=max_size,
+            statement_cache_size=statement_cache_size,
+            max_inactive_connection_lifetime=max_inactive_lifetime,
+            init=init,
+            reset=_reset_connection
         )
         return pool
     except Exception as e:
@@ -15,163 +35,6 @@ async def create_db_pool(database_url: str, min_size: int, max_size: int):
         raise
 
 
-async def create_tables(pool: asyncpg.Pool):
-    async with pool.acquire() as conn:
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS device_config (
-                id SERIAL PRIMARY KEY,
-                device_id VARCHAR(100) NOT NULL,
-                device_name VARCHAR(100),
-                channel VARCHAR(20),
-                channel_name VARCHAR(100),
-                created_at TIMESTAMPTZ DEFAULT NOW(),
-                updated_at TIMESTAMPTZ DEFAULT NOW(),
-                UNIQUE(device_id, channel)
-            )
-        """)
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_device_config_device 
-            ON device_config(device_id)
-        """)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS pump_models (
-                id SERIAL PRIMARY KEY,
-                name TEXT NOT NULL,
-                power_kw REAL NOT NULL,
-                current_ampere REAL NOT NULL,
-                flow_rate_hmt8 REAL NULL,
-                created_at TIMESTAMPTZ DEFAULT NOW()
-            )
-        """)
-        await conn.execute("""
-            INSERT INTO pump_models (id, name, power_kw, current_ampere, flow_rate_hmt8)
-            VALUES (1, 'Pedrollo VXM 10/35', 0.75, 4.8, 18.0)
-            ON CONFLICT (id) DO NOTHING
-        """)
-        await conn.execute("""
-            INSERT INTO pump_models (id, name, power_kw, current_ampere, flow_rate_hmt8)
-            VALUES (2, 'Pedrollo DM/8', 0.55, 3.2, NULL)
-            ON CONFLICT (id) DO NOTHING
-        """)
-        await conn.execute("""
-            SELECT setval('pump_models_id_seq', GREATEST((SELECT MAX(id) FROM pump_models), 2))
-        """)
-        await conn.execute("""
-            ALTER TABLE device_config ADD COLUMN IF NOT EXISTS pump_model_id INTEGER REFERENCES pump_models(id)
-        """)
-        await conn.execute("""
-            ALTER TABLE device_config ADD COLUMN IF NOT EXISTS flow_rate REAL NULL
-        """)
-        await conn.execute("""
-            ALTER TABLE device_config ADD COLUMN IF NOT EXISTS pump_type TEXT NOT NULL DEFAULT 'relevage'
-        """)
-        await conn.execute("""
-            ALTER TABLE device_config ADD COLUMN IF NOT EXISTS dbo5_mg_l INTEGER DEFAULT 570
-        """)
-        await conn.execute("""
-            ALTER TABLE device_config ADD COLUMN IF NOT EXISTS dco_mg_l INTEGER DEFAULT 1250
-        """)
-        await conn.execute("""
-            ALTER TABLE device_config ADD COLUMN IF NOT EXISTS mes_mg_l INTEGER DEFAULT 650
-        """)
-        await conn.execute("""
-            ALTER TABLE power_logs ADD COLUMN IF NOT EXISTS idempotency_key TEXT
-        """)
-        await conn.execute("""
-            CREATE UNIQUE INDEX IF NOT EXISTS idx_power_logs_idempotency
-            ON power_logs(idempotency_key)
-            WHERE idempotency_key IS NOT NULL
-        """)
-
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS device_config_versions (
-                id SERIAL PRIMARY KEY,
-                device_id VARCHAR(100) NOT NULL,
-                channel VARCHAR(20) NOT NULL,
-                channel_name VARCHAR(100),
-                pump_model_id INTEGER REFERENCES pump_models(id) ON DELETE SET NULL,
-                flow_rate REAL,
-                pump_type VARCHAR(50),
-                dbo5 INTEGER,
-                dco INTEGER,
-                mes INTEGER,
-                effective_from DATE NOT NULL,
-                effective_to DATE,
-                created_at TIMESTAMPTZ DEFAULT NOW(),
-                version INTEGER NOT NULL DEFAULT 1,
-                CONSTRAINT flow_rate_positive CHECK (flow_rate IS NULL OR flow_rate > 0),
-                CONSTRAINT valid_date_range CHECK (effective_to IS NULL OR effective_to > effective_from),
-                CONSTRAINT pump_type_valid CHECK (pump_type IS NULL OR pump_type IN ('relevage', 'sortie', 'autre'))
-            )
-        """)
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_config_versions_lookup
-            ON device_config_versions(device_id, channel, effective_from DESC)
-        """)
-        try:
-            await conn.execute("""
-                CREATE UNIQUE INDEX idx_config_versions_active
-                ON device_config_versions(device_id, channel)
-                WHERE effective_to IS NULL
-            """)
-        except Exception:
-            pass
-
-    print("✅ Tables verified/created", flush=True)
-    await _migrate_to_config_versions(pool)
-
-
-async def _migrate_to_config_versions(pool: asyncpg.Pool):
-    async with pool.acquire() as conn:
-        count = await conn.fetchval("SELECT COUNT(*) FROM device_config_versions")
-        if count > 0:
-            print("✅ Migration device_config_versions already done, skip", flush=True)
-            return
-
-        configs = await conn.fetch("""
-            SELECT device_id, channel, channel_name, pump_model_id,
-                   flow_rate, pump_type, dbo5_mg_l, dco_mg_l, mes_mg_l
-            FROM device_config
-        """)
-
-        if not configs:
-            print("✅ No device_config to migrate", flush=True)
-            return
-
-        print("🔄 Migrating device_config → device_config_versions", flush=True)
-        migrated = 0
-        for cfg in configs:
-            device_id = cfg['device_id']
-            channel = cfg['channel']
-
-            first_measure = await conn.fetchval("""
-                SELECT MIN(timestamp)::date
-                FROM power_logs
-                WHERE device_id = $1 AND channel = $2
-            """, device_id, channel)
-
-            effective_from = first_measure if first_measure else '2025-01-01'
-
-            await conn.execute("""
-                INSERT INTO device_config_versions (
-                    device_id, channel, channel_name, pump_model_id,
-                    flow_rate, pump_type, dbo5, dco, mes,
-                    effective_from, effective_to, version
-                )
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, NULL, 1)
-            """,
-                device_id, channel,
-                cfg['channel_name'], cfg['pump_model_id'],
-                cfg['flow_rate'], cfg['pump_type'] or 'relevage',
-                cfg['dbo5_mg_l'], cfg['dco_mg_l'], cfg['mes_mg_l'],
-                effective_from
-            )
-            migrated += 1
-            print(f"  ✅ Migrated {device_id}/{channel} from {effective_from}", flush=True)
-
-        print(f"✅ Migration done: {migrated} configs migrated", flush=True)
-
-
 async def close_db_pool(pool: Optional[asyncpg.Pool]):
     if pool:
         try:
@@ -181,3 +44,46 @@ async def close_db_pool(pool: Optional[asyncpg.Pool]):
             print(f"Error closing pool: {e}", flush=True)
 
 
+async def warm_pool(pool: asyncpg.Pool, prepare: Optional[Callable[[asyncpg.Connection], Awaitable]] = None) -> int:
+    async def open_connection():
+        async with pool.acquire():
+            pass
+
+    # The idle connection is held only until the other slots are claimed, so
+    # a request arriving during warm-up gets it back without waiting for the
+    # new connections to open.
+    async with pool.acquire():
+        opening = [asyncio.ensure_future(open_connection()) for _ in range(pool.get_max_size() - 1)]
+        await asyncio.sleep(0)
+    await asyncio.gather(*opening)
+
+    if prepare is not None:
+        # Connections opened before the warm-up are topped up here. Every
+        # connection is claimed first so each one is visited; those that are
+        # already prepared are released at once without a round trip.
+        held = [await pool.acquire() for _ in range(pool.get_size())]
+
+        async def top_up(conn):
+            try:
+                await prepare(conn)
+            finally:
+                await pool.release(conn)
+
+        await asyncio.gather(*(top_up(conn) for conn in held))
+    return pool.get_size()
+
+
+def pool_stats(pool: Optional[asyncpg.Pool]) -> Dict:
+    if pool is None:
+        return {}
+    size = pool.get_size()
+    idle = pool.get_idle_size()
+    max_size = pool.get_max_size()
+    return {
+        "min_size": pool.get_min_size(),
+        "max_size": max_size,
+        "size": size,
+        "idle": idle,
+        "in_use": size - idle,
+        "utilisation": round((size - idle) / max_size, 3) if max_size else 0.0
+    }
@@ -0,0 +1,211 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+import config
+from services.metrics import REGISTRY
+from services.query_stats import InstrumentedConnection
+
+LANE_INGEST = "ingest"
+LANE_ANALYTICS = "analytics"
+LANE_ADMIN = "admin"
+LANE_EXPORT = "export"
+
+SCOPE_WEIGHT_CHANNEL = 1
+SCOPE_WEIGHT_DEVICE = config.ANALYTICS_CHANNELS_PER_DEVICE
+SCOPE_WEIGHT_FLEET = config.ANALYTICS_CHANNELS_PER_DEVICE * config.ANALYTICS_FLEET_DEVICES
+
+POOL_WAIT_SECONDS = REGISTRY.histogram(
+    "db_pool_wait_seconds", "Time from asking a lane for a connection to getting one",
+    ("pool", "lane"), (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, message: str, retry_after: int = 5):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionTooCostly(AdmissionRejected):
+    # Over the per-request ceiling: waiting will not help, the caller has to
+    # ask for less.
+    def __init__(self, message: str):
+        super().__init__(message, retry_after=0)
+
+
+def estimate_cost(window_days: float, device_id: Optional[str] = None, channel: Optional[str] = None) -> int:
+    if device_id and channel:
+        weight = SCOPE_WEIGHT_CHANNEL
+    elif device_id or channel:
+        weight = SCOPE_WEIGHT_DEVICE
+    else:
+        weight = SCOPE_WEIGHT_FLEET
+    return max(1, int(round(max(window_days, 0) * weight)))
+
+
+class _LaneAcquire:
+    def __init__(self, lane_pool: "LanePool"):
+        self._lane_pool = lane_pool
+        self._ctx = None
+        self._entered = False
+
+    async def __aenter__(self):
+        scheduler = self._lane_pool.scheduler
+        lane = self._lane_pool.name
+        started = time.perf_counter()
+        await scheduler._enter_lane(lane)
+        self._entered = True
+        try:
+            self._ctx = scheduler.pool.acquire()
+            conn = await self._ctx.__aenter__()
+        except BaseException:
+            scheduler._leave_lane(lane)
+            self._entered = False
+            raise
+        waited = time.perf_counter() - started
+        POOL_WAIT_SECONDS.observe(waited, scheduler.name, lane)
+        if scheduler.query_stats is None:
+            return conn
+        scheduler.query_stats.record_wait(f"{scheduler.name}.{lane}", waited)
+        return InstrumentedConnection(conn, scheduler.query_stats)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            return await self._ctx.__aexit__(exc_type, exc, tb)
+        finally:
+            if self._entered:
+                self._lane_pool.scheduler._leave_lane(self._lane_pool.name)
+
+
+class LanePool:
+    def __init__(self, scheduler: "PoolScheduler", name: str):
+        self.scheduler = scheduler
+        self.name = name
+
+    def acquire(self) -> _LaneAcquire:
+        return _LaneAcquire(self)
+
+
+class PoolScheduler:
+    def __init__(
+        self,
+        pool,
+        max_size: int,
+        ingest_reserved: int = config.DB_INGEST_RESERVED_CONNECTIONS,
+        analytics_max_concurrency: int = 1,
+        export_max_concurrency: int = config.DB_EXPORT_MAX_CONCURRENCY,
+        analytics_cost_budget: int = config.ANALYTICS_COST_BUDGET,
+        analytics_max_cost: int = config.ANALYTICS_MAX_COST,
+        queue_timeout: float = config.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        query_stats=None,
+        name: str = "primary"
+    ):
+        self.pool = pool
+        self.query_stats = query_stats
+        self.name = name
+        self.max_size = max_size
+        self.ingest_reserved = min(ingest_reserved, max_size - 1)
+        self.analytics_cost_budget = analytics_cost_budget
+        self.analytics_max_cost = analytics_max_cost
+        self.queue_timeout = queue_timeout
+
+        self._shared = asyncio.Semaphore(max_size - self.ingest_reserved)
+        self._lane_limits = {
+            LANE_ANALYTICS: asyncio.Semaphore(max(1, min(analytics_max_concurrency, max_size - self.ingest_reserved))),
+            LANE_EXPORT: asyncio.Semaphore(max(1, min(export_max_concurrency, max_size - self.ingest_reserved)))
+        }
+        self._lanes = {name: LanePool(self, name) for name in (LANE_INGEST, LANE_ANALYTICS, LANE_ADMIN, LANE_EXPORT)}
+        self._cost_in_use = 0
+        self._cost_changed = asyncio.Condition()
+
+        self.in_use = {name: 0 for name in self._lanes}
+        self.acquired = {name: 0 for name in self._lanes}
+        self.wait_seconds = {name: 0.0 for name in self._lanes}
+        self.peak_in_use = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+
+    def lane(self, name: str) -> LanePool:
+        return self._lanes[name]
+
+    @asynccontextmanager
+    async def admit(self, cost: int, lane: str = LANE_ANALYTICS):
+        if cost > self.analytics_max_cost:
+            self.rejected += 1
+            raise AdmissionTooCostly(f"Request cost {cost} exceeds limit {self.analytics_max_cost}")
+
+        async with self._cost_changed:
+            if not self._fits(cost):
+                self.queued += 1
+                try:
+                    await asyncio.wait_for(
+                        self._cost_changed.wait_for(lambda: self._fits(cost)),
+                        timeout=self.queue_timeout
+                    )
+                except asyncio.TimeoutError:
+                    self.rejected += 1
+                    raise AdmissionRejected("Analytics budget exhausted")
+            self._cost_in_use += cost
+            self.admitted += 1
+
+        try:
+            yield self.lane(lane)
+        finally:
+            async with self._cost_changed:
+                self._cost_in_use -= cost
+                self._cost_changed.notify_all()
+
+    def _fits(self, cost: int) -> bool:
+        return self._cost_in_use == 0 or self._cost_in_use + cost <= self.analytics_cost_budget
+
+    async def _enter_lane(self, lane: str):
+        started = time.perf_counter()
+        if lane != LANE_INGEST:
+            limit = self._lane_limits.get(lane)
+            try:
+                if limit is not None:
+                    await asyncio.wait_for(limit.acquire(), timeout=self.queue_timeout)
+                try:
+                    await asyncio.wait_for(self._shared.acquire(), timeout=self.queue_timeout)
+                except BaseException:
+                    if limit is not None:
+                        limit.release()
+                    raise
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise AdmissionRejected(f"No database connection available for lane {lane}")
+        self.wait_seconds[lane] += time.perf_counter() - started
+        self.in_use[lane] += 1
+        self.acquired[lane] += 1
+        self.peak_in_use = max(self.peak_in_use, sum(self.in_use.values()))
+
+    def _leave_lane(self, lane: str):
+        self.in_use[lane] -= 1
+        if lane != LANE_INGEST:
+            self._shared.release()
+            limit = self._lane_limits.get(lane)
+            if limit is not None:
+                limit.release()
+
+    def stats(self) -> Dict:
+        return {
+            "max_size": self.max_size,
+            "ingest_reserved": self.ingest_reserved,
+            "peak_in_use": self.peak_in_use,
+            "analytics_cost_in_use": self._cost_in_use,
+            "analytics_cost_budget": self.analytics_cost_budget,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "lanes": {
+                name: {
+                    "in_use": self.in_use[name],
+                    "acquired": self.acquired[name],
+                    "wait_seconds": round(self.wait_seconds[name], 3)
+                }
+                for name in self._lanes
+            }
+        }
@@ -0,0 +1,27 @@
+import asyncio
+from typing import Any, Awaitable
+
+from fastapi import Request
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def run_unless_disconnected(request: Request, awaitable: Awaitable[Any], poll_interval: float = 0.5) -> Any:
+    work = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({work}, timeout=poll_interval)
+            if done:
+                return work.result()
+            if await request.is_disconnected():
+                work.cancel()
+                try:
+                    await work
+                except asyncio.CancelledError:
+                    pass
+                raise ClientDisconnected()
+    finally:
+        if not work.done():
+            work.cancel()
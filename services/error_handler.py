@@ -2,6 +2,8 @@ from fastapi import Request, HTTPException
 from fastapi.responses import JSONResponse
 import traceback
 
+from services.db_scheduler import AdmissionTooCostly
+
 
 SAFE_ERROR_MESSAGES = {
     400: "Requête invalide",
@@ -9,8 +11,11 @@ SAFE_ERROR_MESSAGES = {
     403: "Accès refusé",
     404: "Ressource non trouvée",
     405: "Méthode non autorisée",
+    413: "Requête trop volumineuse, réduisez la période",
     422: "Données invalides",
     500: "Erreur interne du serveur",
+    503: "Serveur occupé, réessayez dans quelques instants",
+    504: "Délai de requête dépassé, réduisez la période",
 }
 
 
@@ -40,5 +45,18 @@ async def http_exception_handler(request: Request, exc: HTTPException):
         print(f"❌ HTTP {exc.status_code} on {request.method} {request.url.path}: {exc.detail}", flush=True)
     return JSONResponse(
         status_code=exc.status_code,
-        content={"error": safe_message}
+        content={"error": safe_message},
+        headers=getattr(exc, "headers", None)
+    )
+
+
+async def admission_rejected_handler(request: Request, exc: Exception):
+    print(f"⚠️ Admission rejected on {request.method} {request.url.path}: {exc}", flush=True)
+    if isinstance(exc, AdmissionTooCostly):
+        return JSONResponse(status_code=413, content={"error": SAFE_ERROR_MESSAGES[413]})
+    headers = {"Retry-After": str(exc.retry_after)} if getattr(exc, "retry_after", 0) else None
+    return JSONResponse(
+        status_code=503,
+        content={"error": SAFE_ERROR_MESSAGES[503]},
+        headers=headers
     )
@@ -0,0 +1,172 @@
+import asyncio
+import asyncpg
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+import config
+from services.compression import StreamCompressor
+from services.config_service import get_configs_map
+from services.cycle_detector import StreamingCycleDetector
+from services.cycles_service import readings_query
+
+RAW_EXPORT_FORMATS = ("csv", "binary")
+RAW_EXPORT_COLUMNS = "timestamp, device_id, channel, apower_w, current_a, voltage_v, energy_total_wh"
+
+CYCLES_CSV_HEADER = (
+    "Device;Canal;Date;Heure démarrage;Heure arrêt;Durée (min);Puissance moyenne (W);"
+    "Courant moyen (A);Voltage moyen (V);Statut\n"
+)
+
+
+def _number(value, digits: int) -> str:
+    return f"{value:.{digits}f}" if value is not None else ""
+
+
+def format_cycle_csv_row(cycle: Dict, configs: Dict) -> str:
+    device_id = cycle["device_id"] or "N/A"
+    device_config = configs.get(device_id) or {}
+    device_name = device_config.get("device_name") or device_id
+    channel_info = (device_config.get("channels") or {}).get(cycle["channel"])
+    channel_name = (channel_info or {}).get("channel_name") or cycle["channel"]
+
+    start = cycle["start_time"]
+    if cycle["is_ongoing"] or not cycle["end_time"]:
+        end_str = "-"
+    else:
+        end_str = cycle["end_time"].strftime("%Hh%M")
+
+    return ";".join((
+        device_name,
+        channel_name,
+        start.strftime("%d/%m/%Y"),
+        start.strftime("%Hh%M"),
+        end_str,
+        str(cycle["duration_minutes"]),
+        _number(cycle["avg_power_w"], 1),
+        _number(cycle["avg_current_a"], 1),
+        _number(cycle["avg_voltage_v"], 1),
+        "En cours" if cycle["is_ongoing"] else "Termine"
+    )) + "\n"
+
+
+async def _cycles_csv_chunks(
+    pool: asyncpg.Pool,
+    device_id: Optional[str],
+    channel: Optional[str],
+    start_dt: datetime,
+    end_dt: datetime
+) -> AsyncIterator[bytes]:
+    query, params = readings_query(device_id, channel, start_dt, end_dt)
+
+    yield CYCLES_CSV_HEADER.encode("utf-8")
+
+    configs = await get_configs_map(pool)
+    detector = StreamingCycleDetector(config.GAP_THRESHOLD_MINUTES, config.MIN_CYCLE_DURATION_MINUTES)
+    lines = []
+    records = 0
+    cycles = 0
+    async with pool.acquire() as conn:
+        async with conn.transaction(readonly=True):
+            async for r in conn.cursor(query, *params, prefetch=config.EXPORT_CURSOR_PREFETCH):
+                records += 1
+                for cycle in detector.feed(r[0], r[1], r[2], r[3], r[4], r[5]):
+                    lines.append(format_cycle_csv_row(cycle, configs))
+                if len(lines) >= config.EXPORT_CHUNK_ROWS:
+                    cycles += len(lines)
+                    yield "".join(lines).encode("utf-8")
+                    lines = []
+
+    for cycle in detector.finish():
+        lines.append(format_cycle_csv_row(cycle, configs))
+    cycles += len(lines)
+    if lines:
+        yield "".join(lines).encode("utf-8")
+    print(f"📤 CSV export: {cycles} cycles from {records} records", flush=True)
+
+
+async def stream_cycles_csv(
+    pool: asyncpg.Pool,
+    device_id: Optional[str],
+    channel: Optional[str],
+    start_dt: datetime,
+    end_dt: datetime,
+    gzip_level: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    chunks = _cycles_csv_chunks(pool, device_id, channel, start_dt, end_dt)
+    try:
+        if gzip_level is None:
+            async for chunk in chunks:
+                yield chunk
+            return
+        compressor = StreamCompressor("gzip", gzip_level)
+        async for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        await chunks.aclose()
+
+
+async def stream_raw_copy(
+    pool: asyncpg.Pool,
+    device_id: str,
+    channels: Optional[List[str]],
+    start_dt: datetime,
+    end_dt: datetime,
+    fmt: str = "csv",
+    gzip_level: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    query = f"""
+        SELECT {RAW_EXPORT_COLUMNS}
+        FROM power_logs
+        WHERE device_id = $1 AND timestamp >= $2 AND timestamp <= $3
+    """
+    params = [device_id, start_dt, end_dt]
+    if channels:
+        query += " AND channel = ANY($4::text[])"
+        params.append(channels)
+    query += " ORDER BY channel, timestamp"
+
+    # COPY output goes through a bounded queue: when the client reads slowly the
+    # sink blocks, asyncpg stops draining the socket and the server waits.
+    queue: asyncio.Queue = asyncio.Queue(maxsize=config.EXPORT_COPY_QUEUE_CHUNKS)
+
+    async def sink(chunk):
+        await queue.put(bytes(chunk))
+
+    async def copy_out():
+        async with pool.acquire() as conn:
+            await conn.copy_from_query(
+                query, *params, output=sink, format=fmt,
+                header=True if fmt == "csv" else None
+            )
+
+    def wake_reader(_task):
+        try:
+            queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+    copy_task = asyncio.ensure_future(copy_out())
+    copy_task.add_done_callback(wake_reader)
+    compressor = StreamCompressor("gzip", gzip_level) if gzip_level is not None else None
+    sent = 0
+    try:
+        while not (copy_task.done() and queue.empty()):
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            sent += len(chunk)
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+                if not chunk:
+                    continue
+            yield chunk
+        copy_task.result()
+        if compressor is not None:
+            yield compressor.finish()
+        print(f"📤 Raw export: {sent} bytes ({fmt}) for {device_id}", flush=True)
+    finally:
+        if not copy_task.done():
+            copy_task.cancel()
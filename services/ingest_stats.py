@@ -0,0 +1,59 @@
+import asyncpg
+from datetime import datetime
+from typing import Iterable, Tuple
+
+from services.statements import register
+
+# Ingest keeps per-hour, per-device row counts next to power_logs, so the
+# 24 h queue summary reads at most 25 rows per device instead of the log.
+# Rows written by ingest always carry an idempotency key, so they all count
+# as from_queue.
+RETENTION = "48 hours"
+
+RECORD_ROWS_SQL = register("ingest.hourly_stats", f"""
+    WITH batch AS (
+        SELECT date_trunc('hour', ts) AS hour, device_id, COUNT(*) AS rows, MAX(ts) AS last_reading
+        FROM unnest($1::timestamptz[], $2::text[]) AS b(ts, device_id)
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+    ), pruned AS (
+        DELETE FROM ingest_hourly_stats WHERE hour < NOW() - INTERVAL '{RETENTION}'
+    )
+    INSERT INTO ingest_hourly_stats (hour, device_id, rows, from_queue, last_reading)
+    SELECT hour, device_id, rows, rows, last_reading FROM batch
+    ON CONFLICT (hour, device_id) DO UPDATE
+    SET rows = ingest_hourly_stats.rows + EXCLUDED.rows,
+        from_queue = ingest_hourly_stats.from_queue + EXCLUDED.from_queue,
+        last_reading = GREATEST(ingest_hourly_stats.last_reading, EXCLUDED.last_reading)
+""", writes=True)
+
+QUEUE_STATS_SQL = register("ingest.queue_stats", """
+    SELECT
+        COALESCE(SUM(rows), 0) AS total,
+        COALESCE(SUM(from_queue), 0) AS from_queue,
+        MAX(last_reading) AS last_insert,
+        COUNT(DISTINCT device_id) AS devices
+    FROM ingest_hourly_stats
+    WHERE hour >= date_trunc('hour', NOW() - INTERVAL '24 hours')
+""")
+
+
+async def record_ingest_rows(conn: asyncpg.Connection, readings: Iterable[Tuple[datetime, str]]) -> None:
+    timestamps, devices = [], []
+    for ts, device_id in readings:
+        timestamps.append(ts)
+        devices.append(device_id)
+    if not timestamps:
+        return
+    await conn.execute(RECORD_ROWS_SQL, timestamps, devices)
+
+
+async def load_queue_stats(conn: asyncpg.Connection) -> dict:
+    result = await conn.fetchrow(QUEUE_STATS_SQL)
+    return {
+        "period": "24h",
+        "total_logs": result['total'],
+        "from_queue": result['from_queue'],
+        "devices": result['devices'],
+        "last_insert": result['last_insert'].strftime('%Y-%m-%dT%H:%M:%SZ') if result['last_insert'] else None
+    }
@@ -0,0 +1,160 @@
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+LIVE_QUEUE_MAX_SIZE = 100
+
+
+def _iso(ts: Optional[datetime]) -> Optional[str]:
+    return ts.strftime('%Y-%m-%dT%H:%M:%SZ') if ts else None
+
+
+class OpenCycleTracker:
+    def __init__(self, gap_threshold_minutes: int = 4, min_duration_minutes: int = 2):
+        self.gap_seconds = gap_threshold_minutes * 60
+        self.min_duration_minutes = min_duration_minutes
+        self._open: Dict[Tuple[str, str], Dict] = {}
+
+    def update(self, device_id: str, channel: str, ts: datetime,
+               apower: float, current: float) -> List[Dict]:
+        key = (device_id, channel)
+        state = self._open.get(key)
+        events = []
+
+        if state is not None and ts <= state['last_seen']:
+            return events
+
+        if state is not None and (ts - state['last_seen']).total_seconds() >= self.gap_seconds:
+            closed = self._snapshot(key, state, is_ongoing=False)
+            if closed['duration_minutes'] >= self.min_duration_minutes:
+                events.append(closed)
+            state = None
+
+        if state is None:
+            state = {'start_time': ts, 'last_seen': ts, 'count': 0, 'sum_power': 0.0, 'sum_current': 0.0}
+            self._open[key] = state
+
+        state['last_seen'] = ts
+        state['count'] += 1
+        state['sum_power'] += apower or 0
+        state['sum_current'] += current or 0
+        events.append(self._snapshot(key, state, is_ongoing=True))
+        return events
+
+    def open_cycles(self, now: datetime, device_id: Optional[str] = None,
+                    channel: Optional[str] = None) -> List[Dict]:
+        snapshots = []
+        for key, state in self._open.items():
+            if device_id and key[0] != device_id:
+                continue
+            if channel and key[1] != channel:
+                continue
+            if (now - state['last_seen']).total_seconds() < self.gap_seconds:
+                snapshots.append(self._snapshot(key, state, is_ongoing=True))
+        return snapshots
+
+    def _snapshot(self, key: Tuple[str, str], state: Dict, is_ongoing: bool) -> Dict:
+        duration = (state['last_seen'] - state['start_time']).total_seconds() / 60
+        return {
+            "device_id": key[0],
+            "channel": key[1],
+            "start_time": _iso(state['start_time']),
+            "end_time": None if is_ongoing else _iso(state['last_seen']),
+            "last_seen": _iso(state['last_seen']),
+            "duration_minutes": round(duration, 1),
+            "avg_power_w": round(state['sum_power'] / state['count'], 1),
+            "avg_current_a": round(state['sum_current'] / state['count'], 2),
+            "records_count": state['count'],
+            "is_ongoing": is_ongoing
+        }
+
+
+class LiveSubscriber:
+    def __init__(self, device_id: Optional[str] = None, channel: Optional[str] = None,
+                 max_size: int = LIVE_QUEUE_MAX_SIZE):
+        self.device_id = device_id
+        self.channel = channel
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self.dropped = False
+
+    @property
+    def key(self) -> Tuple[Optional[str], Optional[str]]:
+        return (self.device_id, self.channel)
+
+
+class LiveBroker:
+    # Fed by ingest_batch in this process: subscribers only see readings
+    # ingested by the instance they are connected to.
+    def __init__(self, gap_threshold_minutes: int = 4, min_duration_minutes: int = 2,
+                 queue_max_size: int = LIVE_QUEUE_MAX_SIZE):
+        self.tracker = OpenCycleTracker(gap_threshold_minutes, min_duration_minutes)
+        self.queue_max_size = queue_max_size
+        self._subscribers: Dict[Tuple[Optional[str], Optional[str]], set] = {}
+        self.dropped_total = 0
+
+    def subscribe(self, device_id: Optional[str] = None, channel: Optional[str] = None) -> LiveSubscriber:
+        subscriber = LiveSubscriber(device_id or None, channel or None, self.queue_max_size)
+        self._subscribers.setdefault(subscriber.key, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: LiveSubscriber):
+        subs = self._subscribers.get(subscriber.key)
+        if subs is None:
+            return
+        subs.discard(subscriber)
+        if not subs:
+            del self._subscribers[subscriber.key]
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(s) for s in self._subscribers.values())
+
+    def open_cycles(self, now: datetime, device_id: Optional[str] = None,
+                    channel: Optional[str] = None) -> List[Dict]:
+        return self.tracker.open_cycles(now, device_id, channel)
+
+    def publish_readings(self, readings: List[tuple]):
+        if not readings:
+            return
+
+        by_key: Dict[Tuple[str, str], Dict[str, list]] = {}
+        for ts, device_id, channel, apower, voltage, current in sorted(readings, key=lambda r: r[0]):
+            cycle_events = self.tracker.update(device_id, channel, ts, apower, current)
+            if not self._subscribers:
+                continue
+            bucket = by_key.setdefault((device_id, channel), {"readings": [], "cycles": {}})
+            bucket["readings"].append({
+                "timestamp": _iso(ts),
+                "apower_w": apower,
+                "voltage_v": voltage,
+                "current_a": current
+            })
+            for event in cycle_events:
+                bucket["cycles"][event["start_time"]] = event
+
+        for (device_id, channel), bucket in by_key.items():
+            message = {
+                "type": "update",
+                "device_id": device_id,
+                "channel": channel,
+                "readings": bucket["readings"],
+                "cycles": list(bucket["cycles"].values())
+            }
+            for sub_key in ((device_id, channel), (device_id, None), (None, channel), (None, None)):
+                for subscriber in list(self._subscribers.get(sub_key, ())):
+                    self._offer(subscriber, message)
+
+    def _offer(self, subscriber: LiveSubscriber, message: Dict):
+        try:
+            subscriber.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self._drop(subscriber)
+
+    def _drop(self, subscriber: LiveSubscriber):
+        subscriber.dropped = True
+        self.dropped_total += 1
+        self.unsubscribe(subscriber)
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(None)
+        print(f"⚠️ Live: dropped slow subscriber {subscriber.device_id or '*'}/{subscriber.channel or '*'}", flush=True)
@@ -0,0 +1,239 @@
+import time
+import asyncpg
+from typing import Awaitable, Callable, List, Tuple
+
+MIGRATION_LOCK_ID = 7242019001
+
+
+async def _initial_schema(conn: asyncpg.Connection):
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS device_config (
+            id SERIAL PRIMARY KEY,
+            device_id VARCHAR(100) NOT NULL,
+            device_name VARCHAR(100),
+            channel VARCHAR(20),
+            channel_name VARCHAR(100),
+            created_at TIMESTAMPTZ DEFAULT NOW(),
+            updated_at TIMESTAMPTZ DEFAULT NOW(),
+            UNIQUE(device_id, channel)
+        )
+    """)
+    await conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_device_config_device
+        ON device_config(device_id)
+    """)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS pump_models (
+            id SERIAL PRIMARY KEY,
+            name TEXT NOT NULL,
+            power_kw REAL NOT NULL,
+            current_ampere REAL NOT NULL,
+            flow_rate_hmt8 REAL NULL,
+            created_at TIMESTAMPTZ DEFAULT NOW()
+        )
+    """)
+    await conn.execute("""
+        INSERT INTO pump_models (id, name, power_kw, current_ampere, flow_rate_hmt8)
+        VALUES (1, 'Pedrollo VXM 10/35', 0.75, 4.8, 18.0)
+        ON CONFLICT (id) DO NOTHING
+    """)
+    await conn.execute("""
+        INSERT INTO pump_models (id, name, power_kw, current_ampere, flow_rate_hmt8)
+        VALUES (2, 'Pedrollo DM/8', 0.55, 3.2, NULL)
+        ON CONFLICT (id) DO NOTHING
+    """)
+    await conn.execute("""
+        SELECT setval('pump_models_id_seq', GREATEST((SELECT MAX(id) FROM pump_models), 2))
+    """)
+    await conn.execute("""
+        ALTER TABLE device_config
+            ADD COLUMN IF NOT EXISTS pump_model_id INTEGER REFERENCES pump_models(id),
+            ADD COLUMN IF NOT EXISTS flow_rate REAL NULL,
+            ADD COLUMN IF NOT EXISTS pump_type TEXT NOT NULL DEFAULT 'relevage',
+            ADD COLUMN IF NOT EXISTS dbo5_mg_l INTEGER DEFAULT 570,
+            ADD COLUMN IF NOT EXISTS dco_mg_l INTEGER DEFAULT 1250,
+            ADD COLUMN IF NOT EXISTS mes_mg_l INTEGER DEFAULT 650
+    """)
+    await conn.execute("""
+        ALTER TABLE power_logs ADD COLUMN IF NOT EXISTS idempotency_key TEXT
+    """)
+    await conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_power_logs_idempotency
+        ON power_logs(idempotency_key)
+        WHERE idempotency_key IS NOT NULL
+    """)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS device_config_versions (
+            id SERIAL PRIMARY KEY,
+            device_id VARCHAR(100) NOT NULL,
+            channel VARCHAR(20) NOT NULL,
+            channel_name VARCHAR(100),
+            pump_model_id INTEGER REFERENCES pump_models(id) ON DELETE SET NULL,
+            flow_rate REAL,
+            pump_type VARCHAR(50),
+            dbo5 INTEGER,
+            dco INTEGER,
+            mes INTEGER,
+            effective_from DATE NOT NULL,
+            effective_to DATE,
+            created_at TIMESTAMPTZ DEFAULT NOW(),
+            version INTEGER NOT NULL DEFAULT 1,
+            CONSTRAINT flow_rate_positive CHECK (flow_rate IS NULL OR flow_rate > 0),
+            CONSTRAINT valid_date_range CHECK (effective_to IS NULL OR effective_to > effective_from),
+            CONSTRAINT pump_type_valid CHECK (pump_type IS NULL OR pump_type IN ('relevage', 'sortie', 'autre'))
+        )
+    """)
+    await conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_config_versions_lookup
+        ON device_config_versions(device_id, channel, effective_from DESC)
+    """)
+    try:
+        async with conn.transaction():
+            await conn.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_config_versions_active
+                ON device_config_versions(device_id, channel)
+                WHERE effective_to IS NULL
+            """)
+    except asyncpg.PostgresError as e:
+        print(f"⚠️ idx_config_versions_active not created: {e}", flush=True)
+
+
+async def _backfill_config_versions(conn: asyncpg.Connection):
+    count = await conn.fetchval("SELECT COUNT(*) FROM device_config_versions")
+    if count > 0:
+        return
+
+    # One statement instead of a MIN(timestamp) round trip per config: the
+    # first measurement day of every channel comes from a single GROUP BY.
+    migrated = await conn.fetch("""
+        INSERT INTO device_config_versions (
+            device_id, channel, channel_name, pump_model_id,
+            flow_rate, pump_type, dbo5, dco, mes,
+            effective_from, effective_to, version
+        )
+        SELECT dc.device_id, dc.channel, dc.channel_name, dc.pump_model_id,
+               dc.flow_rate, COALESCE(NULLIF(dc.pump_type, ''), 'relevage'),
+               dc.dbo5_mg_l, dc.dco_mg_l, dc.mes_mg_l,
+               COALESCE(first_measure.day, DATE '2025-01-01'), NULL, 1
+        FROM device_config dc
+        LEFT JOIN (
+            SELECT device_id, channel, MIN(timestamp)::date AS day
+            FROM power_logs
+            GROUP BY device_id, channel
+        ) first_measure ON first_measure.device_id = dc.device_id AND first_measure.channel = dc.channel
+        RETURNING device_id, channel, effective_from
+    """)
+    if not migrated:
+        return
+
+    print("🔄 Migrated device_config → device_config_versions", flush=True)
+    for row in migrated:
+        print(f"  ✅ Migrated {row['device_id']}/{row['channel']} from {row['effective_from']}", flush=True)
+
+
+async def _config_versions_validity(conn: asyncpg.Connection):
+    # Same bounds as the lookup it serves: effective_from inclusive,
+    # effective_to exclusive, open-ended while NULL.
+    await conn.execute("""
+        ALTER TABLE device_config_versions
+        ADD COLUMN IF NOT EXISTS validity daterange
+            GENERATED ALWAYS AS (daterange(effective_from, effective_to, '[)')) STORED
+    """)
+    try:
+        async with conn.transaction():
+            await conn.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_config_versions_validity
+                ON device_config_versions USING gist (device_id, channel, validity)
+            """)
+    except asyncpg.PostgresError as e:
+        print(f"⚠️ btree_gist unavailable, indexing validity alone: {e}", flush=True)
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_config_versions_validity
+            ON device_config_versions USING gist (validity)
+        """)
+
+
+async def _ingest_hourly_stats(conn: asyncpg.Connection):
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS ingest_hourly_stats (
+            hour TIMESTAMPTZ NOT NULL,
+            device_id VARCHAR(100) NOT NULL,
+            rows BIGINT NOT NULL,
+            from_queue BIGINT NOT NULL,
+            last_reading TIMESTAMPTZ NOT NULL,
+            PRIMARY KEY (hour, device_id)
+        )
+    """)
+    await conn.execute("""
+        INSERT INTO ingest_hourly_stats (hour, device_id, rows, from_queue, last_reading)
+        SELECT date_trunc('hour', timestamp), device_id, COUNT(*),
+               COUNT(*) FILTER (WHERE idempotency_key IS NOT NULL), MAX(timestamp)
+        FROM power_logs
+        WHERE timestamp >= NOW() - INTERVAL '48 hours'
+        GROUP BY 1, 2
+        ON CONFLICT (hour, device_id) DO NOTHING
+    """)
+
+
+async def _revoked_admin_sessions(conn: asyncpg.Connection):
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS revoked_admin_sessions (
+            nonce TEXT PRIMARY KEY,
+            expires_at TIMESTAMPTZ NOT NULL
+        )
+    """)
+
+
+# Append only: never renumber or edit a step that has shipped.
+MIGRATIONS: List[Tuple[int, str, Callable[[asyncpg.Connection], Awaitable[None]]]] = [
+    (1, "initial_schema", _initial_schema),
+    (2, "backfill_config_versions", _backfill_config_versions),
+    (3, "config_versions_validity", _config_versions_validity),
+    (4, "ingest_hourly_stats", _ingest_hourly_stats),
+    (5, "revoked_admin_sessions", _revoked_admin_sessions),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+async def current_schema_version(conn: asyncpg.Connection) -> int:
+    try:
+        return await conn.fetchval("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    except asyncpg.UndefinedTableError:
+        return 0
+
+
+async def run_migrations(pool: asyncpg.Pool) -> int:
+    async with pool.acquire() as conn:
+        version = await current_schema_version(conn)
+        if version >= LATEST_VERSION:
+            print(f"✅ Schema up to date (v{version})", flush=True)
+            return version
+
+        await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+        try:
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                )
+            """)
+            version = await current_schema_version(conn)
+            for step_version, name, step in MIGRATIONS:
+                if step_version <= version:
+                    continue
+                started = time.perf_counter()
+                async with conn.transaction():
+                    await step(conn)
+                    await conn.execute(
+                        "INSERT INTO schema_version (version, name) VALUES ($1, $2)", step_version, name
+                    )
+                version = step_version
+                print(f"✅ Migration v{step_version} {name} applied ({(time.perf_counter() - started) * 1000:.0f} ms)", flush=True)
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+
+    print(f"✅ Schema migrated to v{version}", flush=True)
+    return version
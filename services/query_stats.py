@@ -0,0 +1,211 @@
+import asyncio
+import functools
+import random
+import re
+import time
+from collections import deque
+from typing import Callable, Dict, List
+
+import asyncpg
+
+from services.statements import NAMES
+
+_VERB_TABLE = re.compile(r"\b(?:from|into|update)\s+([a-z_][a-z0-9_.]*)", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=256)
+def _adhoc_name(sql: str) -> str:
+    words = sql.split(None, 1)
+    verb = words[0].lower() if words else "empty"
+    match = _VERB_TABLE.search(sql)
+    return f"{verb} {match.group(1).lower()}" if match else verb
+
+
+def query_name(sql: str) -> str:
+    return NAMES.get(sql) or _adhoc_name(sql)
+
+
+def _status_rows(status) -> int:
+    # "INSERT 0 3", "UPDATE 2", "DELETE 0"...
+    try:
+        return int(str(status).rsplit(" ", 1)[1])
+    except (IndexError, ValueError):
+        return 0
+
+
+class _Aggregate:
+    __slots__ = ("count", "total", "max", "rows", "errors", "slow")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.errors = 0
+        self.slow = 0
+
+
+class QueryStats:
+    def __init__(self, slow_ms: float = 500.0, explain_sample_rate: float = 0.0,
+                 explain_cooldown: float = 300.0, explain_timeout: float = 30.0, explain_analyze: bool = False,
+                 history: int = 50,
+                 sample: Callable[[], float] = random.random, clock: Callable[[], float] = time.monotonic):
+        self.slow_ms = slow_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_cooldown = explain_cooldown
+        self.explain_timeout = explain_timeout
+        self.explain_analyze = explain_analyze
+        self._sample = sample
+        self._clock = clock
+        self.queries: Dict[str, _Aggregate] = {}
+        self.waits: Dict[str, _Aggregate] = {}
+        self.slow_log = deque(maxlen=history)
+        self.explains = deque(maxlen=history)
+        self._explained_at: Dict[str, float] = {}
+
+    def record(self, name: str, seconds: float, rows: int = 0, failed: bool = False) -> bool:
+        agg = self.queries.get(name)
+        if agg is None:
+            agg = self.queries[name] = _Aggregate()
+        agg.count += 1
+        agg.total += seconds
+        agg.max = max(agg.max, seconds)
+        agg.rows += rows
+        if failed:
+            agg.errors += 1
+        elapsed_ms = seconds * 1000
+        if elapsed_ms < self.slow_ms:
+            return False
+        agg.slow += 1
+        self.slow_log.append({
+            "name": name,
+            "duration_ms": round(elapsed_ms, 1),
+            "rows": rows,
+            "failed": failed,
+            "at": time.time()
+        })
+        print(f"🐢 Slow query {name}: {elapsed_ms:.0f} ms, {rows} rows{' (failed)' if failed else ''}", flush=True)
+        return True
+
+    def record_wait(self, lane: str, seconds: float):
+        agg = self.waits.get(lane)
+        if agg is None:
+            agg = self.waits[lane] = _Aggregate()
+        agg.count += 1
+        agg.total += seconds
+        agg.max = max(agg.max, seconds)
+
+    def should_explain(self, name: str) -> bool:
+        if self.explain_sample_rate <= 0 or self._sample() >= self.explain_sample_rate:
+            return False
+        now = self._clock()
+        last = self._explained_at.get(name)
+        if last is not None and now - last < self.explain_cooldown:
+            return False
+        self._explained_at[name] = now
+        return True
+
+    def add_explain(self, name: str, duration_ms: float, plan: str):
+        self.explains.append({
+            "name": name,
+            "duration_ms": round(duration_ms, 1),
+            "plan": plan,
+            "at": time.time()
+        })
+
+    def reset(self):
+        self.queries.clear()
+        self.waits.clear()
+        self.slow_log.clear()
+        self.explains.clear()
+        self._explained_at.clear()
+
+    def stats(self) -> Dict:
+        queries = {
+            name: {
+                "count": agg.count,
+                "total_ms": round(agg.total * 1000, 1),
+                "mean_ms": round(agg.total * 1000 / agg.count, 2),
+                "max_ms": round(agg.max * 1000, 1),
+                "rows": agg.rows,
+                "errors": agg.errors,
+                "slow": agg.slow
+            }
+            for name, agg in sorted(self.queries.items(), key=lambda item: item[1].total, reverse=True)
+        }
+        return {
+            "slow_ms": self.slow_ms,
+            "explain_sample_rate": self.explain_sample_rate,
+            "explain_analyze": self.explain_analyze,
+            "queries": queries,
+            "pool_wait": {
+                lane: {
+                    "count": agg.count,
+                    "total_ms": round(agg.total * 1000, 1),
+                    "mean_ms": round(agg.total * 1000 / agg.count, 2),
+                    "max_ms": round(agg.max * 1000, 1)
+                }
+                for lane, agg in self.waits.items()
+            },
+            "slow_log": list(reversed(self.slow_log)),
+            "explains": list(reversed(self.explains))
+        }
+
+
+class InstrumentedConnection:
+    def __init__(self, conn: asyncpg.Connection, stats: QueryStats):
+        self._conn = conn
+        self._stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    async def fetch(self, query: str, *args, **kwargs) -> List:
+        return await self._run(self._conn.fetch, query, args, kwargs, len)
+
+    async def fetchrow(self, query: str, *args, **kwargs):
+        return await self._run(self._conn.fetchrow, query, args, kwargs, lambda row: 0 if row is None else 1)
+
+    async def fetchval(self, query: str, *args, **kwargs):
+        return await self._run(self._conn.fetchval, query, args, kwargs, lambda value: 0 if value is None else 1)
+
+    async def execute(self, query: str, *args, **kwargs) -> str:
+        return await self._run(self._conn.execute, query, args, kwargs, _status_rows)
+
+    async def executemany(self, command: str, args, **kwargs):
+        args = list(args)
+        return await self._run(self._conn.executemany, command, (args,), kwargs, lambda _: len(args))
+
+    async def _run(self, method, query: str, args, kwargs, count: Callable) -> object:
+        started = time.perf_counter()
+        try:
+            result = await method(query, *args, **kwargs)
+        except Exception:
+            self._stats.record(query_name(query), time.perf_counter() - started, failed=True)
+            raise
+        elapsed = time.perf_counter() - started
+        name = query_name(query)
+        if self._stats.record(name, elapsed, count(result)) and self._stats.should_explain(name):
+            await self._explain(name, query, args, elapsed * 1000)
+        return result
+
+    async def _explain(self, name: str, query: str, args, duration_ms: float):
+        # Plain EXPLAIN only plans the statement. With explain_analyze the
+        # slow query runs a second time, on this connection, inside a
+        # read-only transaction so it can never repeat a write. Skipped inside
+        # a caller's transaction, where a failing EXPLAIN would abort it, and
+        # for anything but reads.
+        if self._conn.is_in_transaction() or _adhoc_name(query).split()[0] not in ("select", "with"):
+            return
+        try:
+            if self._stats.explain_analyze:
+                async with self._conn.transaction(readonly=True):
+                    rows = await self._conn.fetch(
+                        "EXPLAIN (ANALYZE, BUFFERS) " + query, *args, timeout=self._stats.explain_timeout
+                    )
+            else:
+                rows = await self._conn.fetch("EXPLAIN " + query, *args, timeout=self._stats.explain_timeout)
+            plan = "\n".join(row[0] for row in rows)
+        except (asyncpg.PostgresError, asyncpg.InterfaceError, asyncio.TimeoutError) as e:
+            plan = f"EXPLAIN failed: {str(e) or type(e).__name__}"
+        self._stats.add_explain(name, duration_ms, plan)
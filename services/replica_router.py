@@ -0,0 +1,86 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+import asyncpg
+
+from services.statements import register
+
+# A primary reports zero lag, so both DSNs may point at the same server. A
+# standby that has replayed everything it received is also up to date, however
+# old its last replayed transaction is. NULL (nothing replayed yet) is stale.
+REPLICA_LAG_SQL = register("replica.lag", """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0.0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0.0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())::float8
+    END
+""")
+
+
+class ReplicaRouter:
+    def __init__(self, primary, max_lag_seconds: float = 30.0, check_interval: float = 5.0, check_timeout: float = 2.0):
+        self.primary = primary
+        self.replica = None
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.replica_ok = False
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.reads_replica = 0
+        self.reads_primary = 0
+        self.fallbacks = 0
+
+    def attach(self, replica):
+        self.replica = replica
+
+    def scheduler(self):
+        if self.replica is not None and self.replica_ok:
+            self.reads_replica += 1
+            return self.replica
+        if self.replica is not None:
+            self.fallbacks += 1
+        self.reads_primary += 1
+        return self.primary
+
+    async def check(self) -> bool:
+        was_ok = self.replica_ok
+        try:
+            async with self.replica.pool.acquire(timeout=self.check_timeout) as conn:
+                lag = await conn.fetchval(REPLICA_LAG_SQL, timeout=self.check_timeout)
+        except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError, asyncio.TimeoutError) as e:
+            self.replica_ok = False
+            self.lag_seconds = None
+            self.last_error = str(e) or type(e).__name__
+        else:
+            self.lag_seconds = lag
+            self.last_error = None if lag is not None else "no transaction replayed yet"
+            self.replica_ok = lag is not None and lag <= self.max_lag_seconds
+        self.checked_at = time.time()
+
+        if self.replica_ok and not was_ok:
+            print(f"✅ Read replica in use (lag {self.lag_seconds:.1f}s)", flush=True)
+        elif was_ok and not self.replica_ok:
+            reason = self.last_error or f"lag {self.lag_seconds:.1f}s > {self.max_lag_seconds:.0f}s"
+            print(f"⚠️ Read replica stale or unreachable ({reason}), reads fall back to the primary", flush=True)
+        return self.replica_ok
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check()
+
+    def stats(self) -> Dict:
+        return {
+            "configured": self.replica is not None,
+            "in_use": self.replica is not None and self.replica_ok,
+            "lag_seconds": None if self.lag_seconds is None else round(self.lag_seconds, 3),
+            "max_lag_seconds": self.max_lag_seconds,
+            "last_error": self.last_error,
+            "checked_at": self.checked_at,
+            "reads_replica": self.reads_replica,
+            "reads_primary": self.reads_primary,
+            "fallbacks": self.fallbacks
+        }
@@ -0,0 +1,93 @@
+import json
+import logging
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Mapping, Optional
+
+REQUEST_LOGGER_NAME = "shelly.requests"
+
+logger = logging.getLogger(REQUEST_LOGGER_NAME)
+
+
+class JsonLineFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + "Z",
+            "level": record.levelname,
+            "event": record.getMessage()
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class RequestSampler:
+    def __init__(self, every_by_prefix: Optional[Dict[str, int]] = None):
+        self._rules = sorted((every_by_prefix or {}).items(), key=lambda rule: len(rule[0]), reverse=True)
+        self._counters: Dict[str, int] = {}
+
+    def sample(self, path: str) -> int:
+        for prefix, every in self._rules:
+            if path.startswith(prefix):
+                if every <= 1:
+                    return 1
+                seen = self._counters.get(prefix, 0)
+                self._counters[prefix] = seen + 1
+                return every if seen % every == 0 else 0
+        return 1
+
+
+def setup_request_logging(level: str = "INFO") -> QueueListener:
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonLineFormatter())
+
+    logger.handlers = [QueueHandler(log_queue)]
+    logger.setLevel(level.upper())
+    logger.propagate = False
+
+    return QueueListener(log_queue, stream_handler, respect_handler_level=True)
+
+
+def log_request(
+    sampler: RequestSampler,
+    method: str,
+    path: str,
+    status: int,
+    duration_ms: float,
+    client: Optional[str],
+    headers: Mapping[str, str],
+    slow_ms: float = 1000
+):
+    slow = duration_ms >= slow_ms
+    sample_every = 1
+    if status < 400 and not slow:
+        sample_every = sampler.sample(path)
+        if not sample_every:
+            return
+
+    if status >= 500:
+        level = logging.ERROR
+    elif status >= 400 or slow:
+        level = logging.WARNING
+    else:
+        level = logging.INFO
+    if not logger.isEnabledFor(level):
+        return
+
+    fields = {
+        "method": method,
+        "path": path,
+        "status": status,
+        "duration_ms": round(duration_ms, 2),
+        "client": client or "unknown",
+        "user_agent": headers.get("user-agent", "unknown")
+    }
+    if sample_every > 1:
+        fields["sample_every"] = sample_every
+    if logger.isEnabledFor(logging.DEBUG):
+        fields["referer"] = headers.get("referer", "none")
+        fields["headers"] = dict(headers)
+
+    logger.log(level, "http_request", extra={"fields": fields})
@@ -0,0 +1,76 @@
+import asyncio
+import asyncpg
+from typing import Optional, Tuple
+
+from services.auth_service import mark_revoked
+
+# Admin sessions are verified locally (services/auth_service.py), so a logout
+# on one instance has to reach the denylist of every other one: revocations
+# are stored in Postgres for instances that start later and broadcast with
+# NOTIFY to the ones already running.
+CHANNEL = "admin_session_revoked"
+
+PUBLISH_SQL = f"""
+    WITH pruned AS (
+        DELETE FROM revoked_admin_sessions WHERE expires_at <= NOW()
+    ), saved AS (
+        INSERT INTO revoked_admin_sessions (nonce, expires_at)
+        VALUES ($1, to_timestamp($2::bigint))
+        ON CONFLICT (nonce) DO NOTHING
+    )
+    SELECT pg_notify('{CHANNEL}', $1 || ':' || $2::text)
+"""
+
+LOAD_SQL = """
+    SELECT nonce, EXTRACT(EPOCH FROM expires_at)::bigint AS expires_at
+    FROM revoked_admin_sessions
+    WHERE expires_at > NOW()
+"""
+
+
+async def publish_revocation(conn: asyncpg.Connection, revoked: Tuple[int, str]):
+    expires_at, nonce = revoked
+    await conn.execute(PUBLISH_SQL, nonce, expires_at)
+
+
+async def load_revocations(conn: asyncpg.Connection) -> int:
+    rows = await conn.fetch(LOAD_SQL)
+    for row in rows:
+        mark_revoked(row['nonce'], row['expires_at'])
+    return len(rows)
+
+
+def _on_notify(conn, pid: int, channel: str, payload: str):
+    nonce, _, expires_at = payload.rpartition(":")
+    if nonce and expires_at.isdigit():
+        mark_revoked(nonce, int(expires_at))
+
+
+class RevocationListener:
+    def __init__(self, dsn: str, retry_seconds: float = 5.0):
+        self.dsn = dsn
+        self.retry_seconds = retry_seconds
+        self.last_error: Optional[str] = None
+
+    async def listen_once(self):
+        conn = await asyncpg.connect(self.dsn)
+        closed = asyncio.Event()
+        conn.add_termination_listener(lambda _: closed.set())
+        try:
+            await conn.add_listener(CHANNEL, _on_notify)
+            # Reloaded after LISTEN so nothing revoked while disconnected is lost.
+            await load_revocations(conn)
+            self.last_error = None
+            await closed.wait()
+        finally:
+            if not conn.is_closed():
+                await conn.close()
+
+    async def run(self):
+        while True:
+            try:
+                await self.listen_once()
+            except (OSError, asyncpg.PostgresError) as e:
+                self.last_error = str(e)
+                print(f"⚠️ Session revocation listener disconnected: {e}", flush=True)
+            await asyncio.sleep(self.retry_seconds)
@@ -0,0 +1,94 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def process_age_seconds() -> Optional[float]:
+    # Linux only: covers interpreter start and the server's own imports, which
+    # run before main.py and cannot be timed from inside it.
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupProfile:
+    def __init__(self, enabled: bool = False, origin: Optional[float] = None,
+                 clock: Callable[[], float] = time.perf_counter, pre_main_ms: Optional[float] = None):
+        self.enabled = enabled
+        self._clock = clock
+        self.origin = clock() if origin is None else origin
+        if pre_main_ms is None:
+            age = process_age_seconds()
+            if age is not None:
+                pre_main_ms = max(0.0, age * 1000 - self._elapsed_ms())
+        self.pre_main_ms = pre_main_ms
+        self.phases: List[Tuple[str, float, float]] = []
+        self.accepting_ms: Optional[float] = None
+        self.ready_ms: Optional[float] = None
+        self.first_ingest_ms: Optional[float] = None
+
+    def _elapsed_ms(self) -> float:
+        return (self._clock() - self.origin) * 1000
+
+    def since_start_ms(self) -> float:
+        return (self.pre_main_ms or 0.0) + self._elapsed_ms()
+
+    def record(self, name: str, started: float):
+        duration = (self._clock() - started) * 1000
+        self.phases.append((name, (started - self.origin) * 1000, duration))
+        if self.enabled:
+            print(f"⏱️ Startup phase {name}: {duration:.1f} ms", flush=True)
+
+    @contextmanager
+    def phase(self, name: str):
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.record(name, started)
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_ms is not None
+
+    def mark_accepting(self):
+        self.accepting_ms = self.since_start_ms()
+
+    def mark_ready(self):
+        self.ready_ms = self.since_start_ms()
+        print(f"✅ Warm-up complete, ready {self.ready_ms:.0f} ms after process start", flush=True)
+        if self.enabled:
+            self.report()
+
+    def record_first_ingest(self) -> bool:
+        if self.first_ingest_ms is not None:
+            return False
+        self.first_ingest_ms = self.since_start_ms()
+        print(f"⏱️ First successful ingest {self.first_ingest_ms:.0f} ms after process start", flush=True)
+        return True
+
+    def report(self):
+        print("⏱️ Startup profile (ms from main.py import):", flush=True)
+        if self.pre_main_ms is not None:
+            print(f"   {'interpreter + server imports':<36} {self.pre_main_ms:>8.1f} (before main.py)", flush=True)
+        for name, offset, duration in self.phases:
+            print(f"   {name:<36} {duration:>8.1f} @ {offset:.1f}", flush=True)
+
+    def stats(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "pre_main_ms": None if self.pre_main_ms is None else round(self.pre_main_ms, 1),
+            "phases": [
+                {"name": name, "offset_ms": round(offset, 1), "duration_ms": round(duration, 1)}
+                for name, offset, duration in self.phases
+            ],
+            "accepting_ms": None if self.accepting_ms is None else round(self.accepting_ms, 1),
+            "ready_ms": None if self.ready_ms is None else round(self.ready_ms, 1),
+            "first_ingest_ms": None if self.first_ingest_ms is None else round(self.first_ingest_ms, 1)
+        }
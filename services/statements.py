@@ -0,0 +1,55 @@
+import asyncpg
+from typing import Dict, Iterable, List
+
+# Hot-path SQL, registered by name at import time by the modules that run it.
+# Each shape a query can take is a separate entry, so every connection sees a
+# fixed set of statement texts and can keep all of them prepared.
+STATEMENTS: Dict[str, str] = {}
+# Reverse lookup used to tag timings with the statement's logical name.
+NAMES: Dict[str, str] = {}
+# Prepared before a new connection runs its first query; the rest only once
+# startup is over, so cold starts do not wait for them.
+CRITICAL: List[str] = []
+# Not prepared on read-replica connections.
+WRITES: List[str] = []
+
+
+def register(name: str, sql: str, critical: bool = False, writes: bool = False) -> str:
+    if name in STATEMENTS:
+        raise ValueError(f"Statement already registered: {name}")
+    STATEMENTS[name] = sql
+    NAMES[sql] = name
+    if critical:
+        CRITICAL.append(name)
+    if writes:
+        WRITES.append(name)
+    return sql
+
+
+async def prepare(conn: asyncpg.Connection, names: Iterable[str]) -> int:
+    prepared = 0
+    for name in names:
+        try:
+            # executemany with no argument sets parses and caches the
+            # statement on this connection without executing it; already
+            # cached statements cost nothing.
+            await conn.executemany(STATEMENTS[name], [])
+            prepared += 1
+        except asyncpg.PostgresError as e:
+            print(f"⚠️ Statement {name} not prepared: {e}", flush=True)
+    return prepared
+
+
+class ConnectionPreparer:
+    def __init__(self, read_only: bool = False, full: bool = False):
+        self.read_only = read_only
+        self.full = full
+
+    def names(self) -> List[str]:
+        names = list(STATEMENTS) if self.full else list(CRITICAL)
+        if self.read_only:
+            names = [name for name in names if name not in WRITES]
+        return names
+
+    async def __call__(self, conn: asyncpg.Connection):
+        await prepare(conn, self.names())
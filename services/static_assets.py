@@ -0,0 +1,133 @@
+import hashlib
+import mimetypes
+import os
+import threading
+from typing import Dict
+
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import get_route_path
+from starlette.types import Receive, Scope, Send
+
+from services.change_tracker import etag_matches
+from services.compression import accepted_encodings, brotli, compress, is_compressible
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+MIN_COMPRESS_BYTES = 512
+
+
+class StaticAsset:
+    __slots__ = ("logical_path", "hashed_path", "media_type", "etag", "variants")
+
+    def __init__(self, logical_path: str, hashed_path: str, media_type: str, etag: str, variants: Dict[str, bytes]):
+        self.logical_path = logical_path
+        self.hashed_path = hashed_path
+        self.media_type = media_type
+        self.etag = etag
+        self.variants = variants
+
+
+def hashed_name(logical_path: str, digest: str) -> str:
+    base, ext = os.path.splitext(logical_path)
+    return f"{base}.{digest}{ext}"
+
+
+def _compress_variants(raw: bytes, media_type: str) -> Dict[str, bytes]:
+    variants = {"identity": raw}
+    if len(raw) < MIN_COMPRESS_BYTES or not is_compressible(media_type):
+        return variants
+    gz = compress(raw, "gzip", 9)
+    if len(gz) < len(raw):
+        variants["gzip"] = gz
+    if brotli is not None:
+        br = compress(raw, "br", 11)
+        if len(br) < len(raw):
+            variants["br"] = br
+    return variants
+
+
+class StaticAssetManifest:
+    def __init__(self, directory: str, url_prefix: str = "/static", eager: bool = True):
+        self.directory = directory
+        self.url_prefix = url_prefix.rstrip("/")
+        self.assets: Dict[str, StaticAsset] = {}
+        self.by_hashed: Dict[str, StaticAsset] = {}
+        self.built = False
+        self._build_lock = threading.Lock()
+        if eager:
+            self.build()
+
+    def ensure_built(self):
+        if self.built:
+            return
+        with self._build_lock:
+            if not self.built:
+                self.build()
+
+    def build(self):
+        assets = {}
+        for root, _dirs, files in os.walk(self.directory):
+            for filename in sorted(files):
+                full_path = os.path.join(root, filename)
+                logical_path = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    raw = f.read()
+                digest = hashlib.sha256(raw).hexdigest()[:12]
+                media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+                assets[logical_path] = StaticAsset(
+                    logical_path, hashed_name(logical_path, digest), media_type,
+                    f'"{digest}"', _compress_variants(raw, media_type)
+                )
+        self.assets = assets
+        self.by_hashed = {asset.hashed_path: asset for asset in assets.values()}
+        self.built = True
+        print(f"📦 Static assets: {len(assets)} files fingerprinted (brotli: {'yes' if brotli else 'no'})", flush=True)
+
+    def url(self, logical_path: str) -> str:
+        self.ensure_built()
+        logical_path = logical_path.lstrip("/")
+        asset = self.assets.get(logical_path)
+        return f"{self.url_prefix}/{asset.hashed_path if asset else logical_path}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return
+        if scope["method"] not in ("GET", "HEAD"):
+            await PlainTextResponse("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})(scope, receive, send)
+            return
+
+        self.ensure_built()
+        path = get_route_path(scope).lstrip("/")
+        asset = self.by_hashed.get(path)
+        cache_control = IMMUTABLE_CACHE_CONTROL
+        if asset is None:
+            asset = self.assets.get(path)
+            cache_control = REVALIDATE_CACHE_CONTROL
+        if asset is None:
+            await PlainTextResponse("Not Found", status_code=404)(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        headers = {"Cache-Control": cache_control, "ETag": asset.etag}
+        if len(asset.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+
+        if etag_matches(request_headers.get("if-none-match"), asset.etag):
+            await Response(status_code=304, headers=headers)(scope, receive, send)
+            return
+
+        encodings = accepted_encodings(request_headers.get("accept-encoding"))
+        encoding = "identity"
+        for candidate in ("br", "gzip"):
+            if candidate in asset.variants and candidate in encodings:
+                encoding = candidate
+                break
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+
+        body = asset.variants[encoding]
+        response = Response(content=body, media_type=asset.media_type, headers=headers)
+        if scope["method"] == "HEAD":
+            response.body = b""
+        await response(scope, receive, send)
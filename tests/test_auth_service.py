@@ -0,0 +1,88 @@
+import pytest
+from services import auth_service
+from services.auth_service import (
+    create_admin_session, verify_admin_token, revoke_admin_session, create_export_token, verify_export_token
+)
+
+
+@pytest.fixture(autouse=True)
+def session_secret(monkeypatch):
+    monkeypatch.setenv("ADMIN_SESSION_SECRET", "test-secret")
+    auth_service._revoked_nonces.clear()
+    yield
+    auth_service._revoked_nonces.clear()
+
+
+class TestAdminTokens:
+
+    def test_roundtrip(self):
+        assert verify_admin_token(create_admin_session())
+
+    def test_tokens_are_unique(self):
+        assert create_admin_session() != create_admin_session()
+
+    def test_rejects_missing_or_malformed(self):
+        assert not verify_admin_token(None)
+        assert not verify_admin_token("")
+        assert not verify_admin_token("abc")
+        assert not verify_admin_token("v1.notanumber.nonce.sig")
+        assert not verify_admin_token("v1.1.é.sig")
+
+    def test_rejects_tampered_expiry(self):
+        version, expires, nonce, signature = create_admin_session().split(".")
+        forged = f"{version}.{int(expires) + 3600}.{nonce}.{signature}"
+        assert not verify_admin_token(forged)
+
+    def test_rejects_other_secret(self, monkeypatch):
+        token = create_admin_session()
+        monkeypatch.setenv("ADMIN_SESSION_SECRET", "rotated")
+        assert not verify_admin_token(token)
+
+    def test_valid_across_instances_sharing_secret(self, monkeypatch):
+        token = create_admin_session()
+        monkeypatch.setattr(auth_service, "_signing_key_cache", (None, b""))
+        assert verify_admin_token(token)
+
+    def test_expired(self, monkeypatch):
+        token = create_admin_session()
+        now = auth_service.time.time()
+        monkeypatch.setattr(auth_service.time, "time", lambda: now + auth_service.ADMIN_SESSION_DURATION.total_seconds() + 1)
+        assert not verify_admin_token(token)
+
+
+class TestRevocation:
+
+    def test_revoked_token_rejected(self):
+        token = create_admin_session()
+        other = create_admin_session()
+        revoke_admin_session(token)
+        assert not verify_admin_token(token)
+        assert verify_admin_token(other)
+
+    def test_denylist_entries_expire(self, monkeypatch):
+        revoke_admin_session(create_admin_session())
+        assert len(auth_service._revoked_nonces) == 1
+        now = auth_service.time.time()
+        monkeypatch.setattr(auth_service.time, "time", lambda: now + auth_service.ADMIN_SESSION_DURATION.total_seconds() + 1)
+        revoke_admin_session(create_admin_session())
+        assert len(auth_service._revoked_nonces) == 1
+
+    def test_revoking_invalid_token_is_noop(self):
+        revoke_admin_session("garbage")
+        assert auth_service._revoked_nonces == {}
+
+
+class TestExportTokens:
+
+    def test_roundtrip(self):
+        assert verify_export_token(create_export_token())
+
+    def test_not_interchangeable_with_admin_sessions(self):
+        assert not verify_admin_token(create_export_token())
+        assert not verify_export_token(create_admin_session())
+
+    def test_expires(self, monkeypatch):
+        token = create_export_token()
+        now = auth_service.time.time()
+        monkeypatch.setattr(auth_service.time, "time", lambda: now + auth_service.EXPORT_TOKEN_DURATION.total_seconds() + 1)
+        assert not verify_export_token(token)
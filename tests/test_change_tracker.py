@@ -0,0 +1,71 @@
+import pytest
+from services import change_tracker
+from services.change_tracker import ChangeTracker, etag_matches
+
+
+@pytest.fixture
+def frozen_time(monkeypatch):
+    now = {"t": 1_800_000_000.0}
+    monkeypatch.setattr(change_tracker.time, "time", lambda: now["t"])
+    return now
+
+
+class TestEtagMatches:
+
+    def test_exact_and_weak(self):
+        assert etag_matches('W/"abc"', 'W/"abc"')
+        assert etag_matches('"abc"', 'W/"abc"')
+
+    def test_list_and_wildcard(self):
+        assert etag_matches('"x", W/"abc"', 'W/"abc"')
+        assert etag_matches("*", 'W/"abc"')
+
+    def test_no_match(self):
+        assert not etag_matches(None, 'W/"abc"')
+        assert not etag_matches('W/"abd"', 'W/"abc"')
+
+
+class TestChangeTracker:
+
+    def test_stable_without_changes(self, frozen_time):
+        tracker = ChangeTracker(60)
+        assert tracker.etag("devices", 0) == tracker.etag("devices", 0)
+
+    def test_ingest_changes_only_affected_scope(self, frozen_time):
+        tracker = ChangeTracker(60)
+        tracker.record_ingest([("dev1", "switch:0")])
+        before = {
+            "channel": tracker.ingest_marker("dev1", "switch:0"),
+            "other_channel": tracker.ingest_marker("dev1", "switch:1"),
+            "device": tracker.ingest_marker("dev1"),
+            "other_device": tracker.ingest_marker("dev2"),
+            "fleet": tracker.ingest_marker()
+        }
+        tracker.record_ingest([("dev1", "switch:0")])
+        assert tracker.ingest_marker("dev1", "switch:0") != before["channel"]
+        assert tracker.ingest_marker("dev1") != before["device"]
+        assert tracker.ingest_marker() != before["fleet"]
+        assert tracker.ingest_marker("dev1", "switch:1") == before["other_channel"]
+        assert tracker.ingest_marker("dev2") == before["other_device"]
+
+    def test_topology_changes_only_on_new_pair(self):
+        tracker = ChangeTracker(60)
+        tracker.record_ingest([("dev1", "switch:0")])
+        tracker.record_ingest([("dev1", "switch:0")])
+        assert tracker.topology_generation == 1
+        tracker.record_ingest([("dev1", "switch:1")])
+        assert tracker.topology_generation == 2
+
+    def test_empty_ingest_is_noop(self):
+        tracker = ChangeTracker(60)
+        tracker.record_ingest([])
+        assert tracker.ingest_generation == 0
+
+    def test_time_bucket_bounds_staleness(self, frozen_time):
+        tracker = ChangeTracker(60)
+        etag = tracker.etag("pump-cycles")
+        frozen_time["t"] += 61
+        assert tracker.etag("pump-cycles") != etag
+
+    def test_boot_id_differs_between_instances(self, frozen_time):
+        assert ChangeTracker(60).etag("devices") != ChangeTracker(60).etag("devices")
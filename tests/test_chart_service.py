@@ -0,0 +1,45 @@
+from datetime import datetime, timezone, timedelta
+from services.chart_service import enrich_with_gaps, floor_to_bucket, normalize_period
+
+
+START = datetime(2026, 2, 15, 10, 0, 0, tzinfo=timezone.utc)
+FIVE_MIN = timedelta(minutes=5)
+
+
+class TestChartService:
+
+    def test_floor_to_bucket_5_minutes(self):
+        ts = datetime(2026, 2, 15, 10, 17, 42, tzinfo=timezone.utc)
+        assert floor_to_bucket(ts, FIVE_MIN) == datetime(2026, 2, 15, 10, 15, tzinfo=timezone.utc)
+
+    def test_floor_to_bucket_6_hours(self):
+        ts = datetime(2026, 2, 15, 17, 5, tzinfo=timezone.utc)
+        assert floor_to_bucket(ts, timedelta(hours=6)) == datetime(2026, 2, 15, 12, 0, tzinfo=timezone.utc)
+
+    def test_unknown_period_falls_back_to_24h(self):
+        assert normalize_period("1y") == "24h"
+        assert normalize_period("7d") == "7d"
+
+    def test_contiguous_points_get_trailing_zero_only(self):
+        points = [(START + FIVE_MIN * i, 100.0, 1.0) for i in range(3)]
+        enriched = enrich_with_gaps(points, FIVE_MIN, START, START + timedelta(hours=1))
+        assert len(enriched) == 4
+        assert enriched[-1] == (START + FIVE_MIN * 3, 0, 0)
+
+    def test_gap_is_zero_filled_on_both_sides(self):
+        points = [(START, 100.0, 1.0), (START + FIVE_MIN * 6, 100.0, 1.0)]
+        enriched = enrich_with_gaps(points, FIVE_MIN, START, START + timedelta(hours=1))
+        timestamps = [p[0] for p in enriched]
+        assert START + FIVE_MIN in timestamps
+        assert START + FIVE_MIN * 5 in timestamps
+
+    def test_delta_fetch_boundary_treated_as_gap(self):
+        fetch_from = START
+        points = [(START + FIVE_MIN * 4, 100.0, 1.0)]
+        enriched = enrich_with_gaps(points, FIVE_MIN, START - timedelta(hours=1), START + timedelta(hours=1), fetch_from)
+        assert enriched[0] == (START + FIVE_MIN * 3, 0, 0)
+
+    def test_delta_fetch_boundary_close_point_not_zero_filled(self):
+        points = [(START + FIVE_MIN, 100.0, 1.0)]
+        enriched = enrich_with_gaps(points, FIVE_MIN, START - timedelta(hours=1), START + timedelta(hours=1), START)
+        assert enriched[0] == (START + FIVE_MIN, 100.0, 1.0)
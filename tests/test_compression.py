@@ -0,0 +1,101 @@
+import gzip
+import json
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from api.middleware import CompressionMiddleware
+from services.compression import CompressionStats, choose_encoding, is_compressible
+
+CYCLES = {"cycles": [{"device_id": "dev1", "channel": "switch:0", "duration_minutes": i} for i in range(500)]}
+
+
+def build_app(stats):
+    async def cycles(request):
+        return JSONResponse(CYCLES)
+
+    async def ack(request):
+        return JSONResponse({"status": "ok"})
+
+    async def image(request):
+        return Response(b"\x89PNG" + bytes(4000), media_type="image/png")
+
+    async def export(request):
+        async def rows():
+            for i in range(200):
+                yield f"{i};dev1;switch:0;12.5\n".encode()
+        return StreamingResponse(rows(), media_type="text/csv")
+
+    async def precompressed(request):
+        return PlainTextResponse(gzip.compress(b"x" * 5000), headers={"Content-Encoding": "gzip"})
+
+    app = Starlette(routes=[
+        Route("/cycles", cycles), Route("/ack", ack), Route("/image", image),
+        Route("/export", export), Route("/precompressed", precompressed)
+    ])
+    app.add_middleware(CompressionMiddleware, stats=stats, minimum_size=1024, gzip_level=6)
+    return app
+
+
+@pytest.fixture
+def stats():
+    return CompressionStats()
+
+
+@pytest.fixture
+def client(stats):
+    return TestClient(build_app(stats))
+
+
+class TestNegotiation:
+
+    def test_prefers_gzip_without_brotli_module(self):
+        assert choose_encoding("gzip, deflate", available=("gzip",)) == "gzip"
+
+    def test_none_when_not_accepted(self):
+        assert choose_encoding("identity") is None
+        assert choose_encoding("gzip;q=0") is None
+
+    def test_compressible_types(self):
+        assert is_compressible("application/json")
+        assert is_compressible("text/csv; charset=utf-8")
+        assert not is_compressible("image/png")
+
+
+class TestCompressionMiddleware:
+
+    def test_large_json_gzipped(self, client, stats):
+        response = client.get("/cycles", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "accept-encoding" in response.headers["vary"].lower()
+        assert response.headers["server-timing"].startswith("compress;dur=")
+        assert response.json() == CYCLES
+        assert stats.responses == 1
+        assert stats.bytes_out < stats.bytes_in
+
+    def test_small_response_skipped(self, client, stats):
+        response = client.get("/ack", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert stats.skipped_small == 1
+
+    def test_not_accepted(self, client):
+        response = client.get("/cycles", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert json.loads(response.content) == CYCLES
+
+    def test_binary_not_compressed(self, client):
+        assert "content-encoding" not in client.get("/image", headers={"Accept-Encoding": "gzip"}).headers
+
+    def test_already_encoded_untouched(self, client, stats):
+        response = client.get("/precompressed", headers={"Accept-Encoding": "gzip"})
+        assert response.content == b"x" * 5000
+        assert stats.responses == 0
+
+    def test_streaming_response(self, client, stats):
+        response = client.get("/export", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert response.text.splitlines()[199] == "199;dev1;switch:0;12.5"
+        assert stats.responses == 1
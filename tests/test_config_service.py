@@ -0,0 +1,78 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from services.config_service import (
+    INSERT_DEVICE_NAME_SQL, UPSERT_CHANNELS_SQL, channel_columns,
+    upsert_device_name, upsert_device_with_channels
+)
+
+
+class FakeConnection:
+    def __init__(self, update_status="UPDATE 2"):
+        self.update_status = update_status
+        self.executed = []
+
+    async def execute(self, query, *args):
+        self.executed.append((query, args))
+        return self.update_status if query.strip().startswith("UPDATE") else "INSERT 0 1"
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+class TestChannelColumns:
+
+    def test_one_array_per_column(self):
+        channels, names, models, flow_rates, pump_types = channel_columns([
+            {"channel": "switch:0", "name": "Relevage", "pump_model_id": 1, "flow_rate": "3.5", "pump_type": "relevage"},
+            {"channel": "switch:1", "name": None, "flow_rate": ""}
+        ])
+        assert channels == ["switch:0", "switch:1"]
+        assert names == ["Relevage", None]
+        assert models == [1, None]
+        assert flow_rates == [3.5, None]
+        assert pump_types == ["relevage", "relevage"]
+
+    def test_repeated_channel_keeps_last_entry(self):
+        channels, names, _, _, _ = channel_columns([
+            {"channel": "switch:0", "name": "A"},
+            {"channel": "switch:0", "name": "B"}
+        ])
+        assert channels == ["switch:0"] and names == ["B"]
+
+    def test_empty(self):
+        assert channel_columns([]) == ([], [], [], [], [])
+
+
+class TestDeviceWrites:
+
+    def test_device_name_always_inserts_logged_channels(self):
+        # One channel already configured, one only seen in power_logs: the
+        # UPDATE matching the first must not skip the insert for the second.
+        for update_status in ("UPDATE 1", "UPDATE 0"):
+            conn = FakeConnection(update_status)
+            asyncio.run(upsert_device_name(FakePool(conn), "shelly-1", "Station"))
+            assert conn.executed[0] == (INSERT_DEVICE_NAME_SQL, ("shelly-1", "Station"))
+            assert "ON CONFLICT (device_id, channel)" in INSERT_DEVICE_NAME_SQL
+            assert len(conn.executed) == 2
+
+    def test_channels_saved_in_one_statement(self):
+        conn = FakeConnection()
+        asyncio.run(upsert_device_with_channels(FakePool(conn), "shelly-1", "Station", [
+            {"channel": "switch:0", "name": "A", "pump_type": "sortie"},
+            {"channel": "switch:1", "name": "B", "flow_rate": 2}
+        ]))
+        assert len(conn.executed) == 2
+        query, args = conn.executed[1]
+        assert query == UPSERT_CHANNELS_SQL
+        assert args[5] == ["switch:0", "switch:1"] and args[8] == [None, 2.0]
@@ -0,0 +1,107 @@
+import pytest
+from datetime import date
+
+from services.config_versions_service import (
+    parse_config_versions_csv, validate_config_versions, plan_config_import
+)
+
+
+def version(device_id="dev1", channel="switch:0", effective_from="2026-03-01", **fields):
+    item = {"device_id": device_id, "channel": channel, "effective_from": effective_from}
+    item.update(fields)
+    return validate_config_versions([item], 10)[0]
+
+
+def open_row(row_id=7, effective_from=date(2026, 1, 1), version=1, **fields):
+    row = {
+        "id": row_id, "channel_name": "Pompe 1", "pump_model_id": 1, "flow_rate": 3.0,
+        "pump_type": "relevage", "dbo5": 570, "dco": 1250, "mes": 650,
+        "effective_from": effective_from, "version": version
+    }
+    row.update(fields)
+    return row
+
+
+class TestParseAndValidate:
+
+    def test_csv_semicolon_and_empty_cells(self):
+        rows = parse_config_versions_csv(
+            "﻿device_id;channel;effective_from;dbo5;flow_rate\n"
+            "dev1;switch:0;2026-03-01;600;\n"
+        )
+        assert rows == [{"device_id": "dev1", "channel": "switch:0", "effective_from": "2026-03-01", "dbo5": "600", "flow_rate": None}]
+
+    def test_csv_comma(self):
+        rows = parse_config_versions_csv("device_id,channel,effective_from\ndev1,switch:1,2026-03-01\n")
+        assert rows[0]["channel"] == "switch:1"
+
+    def test_csv_missing_columns(self):
+        with pytest.raises(ValueError, match="manquantes: effective_from"):
+            parse_config_versions_csv("device_id;channel\ndev1;switch:0\n")
+
+    def test_values_converted(self):
+        v = version(dbo5="600", flow_rate="4.5", pump_model_id=2, pump_type="sortie")
+        assert v["effective_from"] == date(2026, 3, 1)
+        assert v["dbo5"] == 600 and v["flow_rate"] == 4.5 and v["pump_model_id"] == 2
+        assert v["dco"] is None
+
+    def test_all_errors_reported_with_line_numbers(self):
+        with pytest.raises(ValueError) as e:
+            validate_config_versions([
+                {"device_id": "dev1", "channel": "switch:0", "effective_from": "2026-03-01"},
+                {"device_id": "dev1", "channel": "switch:0", "effective_from": "01/03/2026"},
+                {"device_id": "dev1", "channel": "switch:0", "effective_from": "2026-03-01", "flow_rate": -1},
+                {"device_id": "dev1", "effective_from": "2026-03-01"},
+                {"device_id": "dev1", "channel": "switch:0", "effective_from": "2026-03-01", "pump_type": "x"}
+            ], 10)
+        message = str(e.value)
+        assert message.startswith("Import invalide")
+        assert "Ligne 2" in message and "Ligne 3" in message and "Ligne 4" in message and "Ligne 5" in message
+        assert "Ligne 1" not in message
+
+    def test_limits(self):
+        with pytest.raises(ValueError):
+            validate_config_versions([], 10)
+        with pytest.raises(ValueError, match="maximum 1"):
+            validate_config_versions([{}, {}], 1)
+
+
+class TestPlanImport:
+
+    def test_new_channel_starts_at_version_one(self):
+        plan = plan_config_import([version(dbo5=600)], {})
+        assert plan["deletes"] == [] and plan["closes"] == []
+        row = plan["inserts"][0]
+        assert row["version"] == 1 and row["pump_type"] == "relevage" and row["dbo5"] == 600
+        assert plan["final"] == [row]
+
+    def test_later_version_closes_current_and_inherits(self):
+        plan = plan_config_import([version(dbo5=600)], {("dev1", "switch:0"): open_row()})
+        assert plan["closes"] == [(7, date(2026, 2, 28))]
+        row = plan["inserts"][0]
+        assert row["version"] == 1 and row["dbo5"] == 600 and row["flow_rate"] == 3.0 and row["channel_name"] == "Pompe 1"
+
+    def test_same_or_earlier_date_replaces_current(self):
+        for effective_from in ("2026-01-01", "2025-12-01"):
+            plan = plan_config_import(
+                [version(effective_from=effective_from, mes=700)],
+                {("dev1", "switch:0"): open_row(version=3)}
+            )
+            assert plan["deletes"] == [7] and plan["closes"] == []
+            assert plan["inserts"][0]["version"] == 4 and plan["inserts"][0]["mes"] == 700
+
+    def test_versions_in_one_import_chain(self):
+        plan = plan_config_import([
+            version(effective_from="2026-01-10", dbo5=500),
+            version(effective_from="2026-02-10", dbo5=510),
+            version(effective_from="2026-02-01", dbo5=520)
+        ], {})
+        assert [(r["effective_from"], r["effective_to"], r["version"], r["dbo5"]) for r in plan["inserts"]] == [
+            (date(2026, 1, 10), date(2026, 2, 9), 1, 500),
+            (date(2026, 2, 1), None, 2, 520)
+        ]
+        assert plan["final"][0]["dbo5"] == 520
+
+    def test_next_day_version_rejected(self):
+        with pytest.raises(ValueError, match="au moins 2 jours"):
+            plan_config_import([version(effective_from="2026-01-02")], {("dev1", "switch:0"): open_row()})
@@ -1,6 +1,6 @@
 import pytest
 from datetime import datetime, timezone, timedelta
-from services.cycle_detector import detect_cycles
+from services.cycle_detector import detect_cycles, StreamingCycleDetector
 from tests.fixtures import (
     sample_power_logs_single_cycle,
     sample_power_logs_two_cycles,
@@ -95,3 +95,41 @@ class TestCycleDetection:
         non_ongoing = [c for c in cycles if not c["is_ongoing"]]
         for c in non_ongoing:
             assert c["duration_minutes"] >= 3
+
+
+def stream_detect(records):
+    detector = StreamingCycleDetector(gap_threshold_minutes=4, min_duration_minutes=2)
+    cycles = []
+    for record in sorted(records, key=lambda r: (r[3], r[1], r[0])):
+        cycles.extend(detector.feed(*record))
+    cycles.extend(detector.finish())
+    return cycles
+
+
+def by_start(cycles):
+    return sorted(cycles, key=lambda c: (c["start_time"], c["device_id"], c["channel"]))
+
+
+class TestStreamingCycleDetection:
+
+    @pytest.mark.parametrize("records", [
+        sample_power_logs_single_cycle(),
+        sample_power_logs_two_cycles(),
+        sample_power_logs_short_cycle(),
+        sample_power_logs_multi_channel(),
+        sample_power_logs_two_cycles() + [make_record(r[0], r[1], r[2], device_id="other") for r in sample_power_logs_single_cycle()],
+    ])
+    def test_matches_detect_cycles(self, records):
+        expected = detect_cycles(records, gap_threshold_minutes=4, min_duration_minutes=2)
+        assert by_start(stream_detect(records)) == by_start(expected)
+
+    def test_recent_fragment_is_ongoing(self):
+        now = datetime.now(timezone.utc)
+        records = [make_record(now - timedelta(minutes=10 - i), "PR 1", 1000.0) for i in range(10)]
+        cycles = stream_detect(records)
+        assert len(cycles) == 1
+        assert cycles[0]["is_ongoing"] is True
+        assert cycles[0]["end_time"] is None
+
+    def test_empty_stream(self):
+        assert StreamingCycleDetector().finish() == []
@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from datetime import datetime, timezone, timedelta
+from services.cycles_service import (
+    last_fragment_starts, detect_cycles_cooperatively, parse_fields, normalize_cycles, CYCLE_FIELDS
+)
+from services.cycle_detector import detect_cycles
+from tests.fixtures import make_record, sample_power_logs_two_cycles, sample_power_logs_multi_channel
+
+
+class TestCyclesWatermark:
+
+    def test_last_fragment_start_after_gap(self):
+        records = sample_power_logs_two_cycles()
+        starts = last_fragment_starts(records, gap_threshold_minutes=4)
+        assert starts[("test_device", "PR 1")] == datetime(2026, 2, 15, 10, 15, tzinfo=timezone.utc)
+
+    def test_last_fragment_start_per_channel(self):
+        records = sample_power_logs_multi_channel()
+        starts = last_fragment_starts(records, gap_threshold_minutes=4)
+        assert set(starts) == {("test_device", "PR 1"), ("test_device", "PR 2")}
+
+    def test_short_trailing_fragment_counts(self):
+        start = datetime(2026, 2, 15, 10, 0, tzinfo=timezone.utc)
+        records = [make_record(start + timedelta(minutes=i), "PR 1", 1200.0) for i in range(10)]
+        records.append(make_record(start + timedelta(minutes=30), "PR 1", 1200.0))
+        starts = last_fragment_starts(records, gap_threshold_minutes=4)
+        assert starts[("test_device", "PR 1")] == start + timedelta(minutes=30)
+
+    def test_empty_records(self):
+        assert last_fragment_starts([], gap_threshold_minutes=4) == {}
+
+
+class TestCooperativeDetection:
+
+    def test_matches_detect_cycles(self):
+        records = sample_power_logs_multi_channel() + [
+            make_record(r[0], r[1], r[2], device_id="other_device") for r in sample_power_logs_two_cycles()
+        ]
+        records.sort(key=lambda r: (r[3], r[1], r[0]))
+        expected = detect_cycles(records, gap_threshold_minutes=4, min_duration_minutes=2)
+        assert asyncio.run(detect_cycles_cooperatively(records)) == expected
+
+    def test_empty_records(self):
+        assert asyncio.run(detect_cycles_cooperatively([])) == []
+
+
+def make_cycle(device_id, channel, minute):
+    return {
+        "device_id": device_id,
+        "channel": channel,
+        "start_time": datetime(2026, 2, 15, 10, minute, tzinfo=timezone.utc),
+        "duration_minutes": 5.0,
+        "volume_m3": 1.2
+    }
+
+
+class TestParseFields:
+
+    def test_empty_means_all(self):
+        assert parse_fields(None) is None
+        assert parse_fields("") is None
+
+    def test_parses_cycle_and_section_fields(self):
+        assert parse_fields("start_time, volume_m3,stats") == {"start_time", "volume_m3", "stats"}
+
+    def test_rejects_unknown_fields(self):
+        with pytest.raises(ValueError, match="bogus"):
+            parse_fields("start_time,bogus")
+
+
+class TestNormalizeCycles:
+
+    def test_dictionary_encodes_device_and_channel(self):
+        result = {
+            "mode": "full",
+            "total": 3,
+            "configs": {"dev1": {}},
+            "stats": {"max_power": 1},
+            "cycles": [make_cycle("dev1", "switch:0", 0), make_cycle("dev1", "switch:1", 10), make_cycle("dev1", "switch:0", 20)]
+        }
+        fields = parse_fields("device_id,channel,start_time,volume_m3,stats")
+        normalized = normalize_cycles(result, fields)
+
+        assert normalized["layout"] == "normalized"
+        assert normalized["columns"] == ["device_id", "channel", "start_time", "volume_m3"]
+        assert normalized["dictionaries"] == {"device_id": ["dev1"], "channel": ["switch:0", "switch:1"]}
+        assert [row[:2] for row in normalized["cycles"]] == [[0, 0], [0, 1], [0, 0]]
+        assert normalized["stats"] == {"max_power": 1}
+        assert "configs" not in normalized
+
+    def test_all_columns_without_projection(self):
+        normalized = normalize_cycles({"cycles": [make_cycle("dev1", "switch:0", 0)]})
+        assert normalized["columns"] == list(CYCLE_FIELDS)
+        row = dict(zip(normalized["columns"], normalized["cycles"][0]))
+        assert row["records_count"] is None
+        assert row["volume_m3"] == 1.2
+
+    def test_does_not_mutate_input(self):
+        result = {"cycles": [make_cycle("dev1", "switch:0", 0)]}
+        normalize_cycles(result)
+        assert result["cycles"][0]["device_id"] == "dev1"
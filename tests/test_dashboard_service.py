@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from services import dashboard_service
+from services.dashboard_service import attach_device_names, build_dashboard_bootstrap
+
+CONFIGS = {
+    "dev1": {"device_name": "Poste Nord", "channels": {"switch:0": {"channel_name": "Pompe 1"}}}
+}
+
+
+@pytest.fixture
+def reference_data(monkeypatch):
+    calls = []
+
+    async def fake_devices(pool):
+        calls.append("devices")
+        return [{"device_id": "dev1"}, {"device_id": "dev2"}]
+
+    async def fake_configs(pool):
+        calls.append("configs")
+        return CONFIGS
+
+    monkeypatch.setattr(dashboard_service, "get_all_devices_from_logs", fake_devices)
+    monkeypatch.setattr(dashboard_service, "get_configs_map", fake_configs)
+    return calls
+
+
+class TestAttachDeviceNames:
+
+    def test_known_and_unknown_devices(self):
+        devices = attach_device_names([{"device_id": "dev1"}, {"device_id": "dev2"}], CONFIGS)
+        assert devices[0]["device_name"] == "Poste Nord"
+        assert devices[0]["channel_names"] == {"switch:0": "Pompe 1"}
+        assert devices[1]["device_name"] is None
+        assert devices[1]["channel_names"] == {}
+
+
+class TestDashboardBootstrap:
+
+    def test_cycles_receive_shared_config_snapshot(self, reference_data):
+        seen = []
+
+        async def load_cycles(configs):
+            seen.append(configs)
+            return {"cycles": []}
+
+        result = asyncio.run(build_dashboard_bootstrap(None, load_cycles))
+        assert seen == [CONFIGS]
+        assert reference_data.count("configs") == 1
+        assert result["chart"] is None
+        assert result["devices"][0]["device_name"] == "Poste Nord"
+
+    def test_chart_runs_concurrently_with_cycles(self, reference_data):
+        chart_started = None
+
+        async def load_chart():
+            chart_started.set()
+            return {"data": {}}
+
+        async def load_cycles(configs):
+            await asyncio.wait_for(chart_started.wait(), 1)
+            return {"cycles": []}
+
+        async def run():
+            nonlocal chart_started
+            chart_started = asyncio.Event()
+            return await build_dashboard_bootstrap(None, load_cycles, load_chart)
+
+        result = asyncio.run(run())
+        assert result["chart"] == {"data": {}}
+        assert result["cycles"] == {"cycles": []}
+
+    def test_failure_cancels_other_part(self, reference_data):
+        cancelled = []
+
+        async def load_chart():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def load_cycles(configs):
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(build_dashboard_bootstrap(None, load_cycles, load_chart))
+        assert cancelled == [True]
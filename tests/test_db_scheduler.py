@@ -0,0 +1,180 @@
+import asyncio
+import pytest
+from services.db_scheduler import (
+    PoolScheduler, AdmissionRejected, AdmissionTooCostly, estimate_cost,
+    LANE_INGEST, LANE_ANALYTICS, LANE_ADMIN
+)
+from services.error_handler import admission_rejected_handler
+
+
+class FakeAcquire:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def __aenter__(self):
+        await self.pool.slots.acquire()
+        self.pool.active += 1
+        return object()
+
+    async def __aexit__(self, *exc):
+        self.pool.active -= 1
+        self.pool.slots.release()
+
+
+class FakePool:
+    def __init__(self, size):
+        self.slots = asyncio.Semaphore(size)
+        self.active = 0
+
+    def acquire(self):
+        return FakeAcquire(self)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestCostEstimate:
+
+    def test_scope_weights(self):
+        assert estimate_cost(30, "dev", "switch:0") == 30
+        assert estimate_cost(30, "dev") == 120
+        assert estimate_cost(30) == 480
+
+    def test_minimum_cost_is_one(self):
+        assert estimate_cost(0.01, "dev", "switch:0") == 1
+
+
+class TestPoolScheduler:
+
+    def test_ingest_not_blocked_by_analytics(self):
+        async def scenario():
+            scheduler = PoolScheduler(FakePool(3), 3, ingest_reserved=1, analytics_max_concurrency=2, queue_timeout=1)
+            release = asyncio.Event()
+
+            async def hold(lane):
+                async with scheduler.lane(lane).acquire():
+                    await release.wait()
+
+            holders = [asyncio.ensure_future(hold(LANE_ANALYTICS)), asyncio.ensure_future(hold(LANE_ADMIN))]
+            await asyncio.sleep(0.01)
+            async with scheduler.lane(LANE_INGEST).acquire():
+                ingest_ok = True
+            release.set()
+            await asyncio.gather(*holders)
+            return ingest_ok, scheduler
+
+        ingest_ok, scheduler = run(scenario())
+        assert ingest_ok
+        assert scheduler.stats()["lanes"][LANE_INGEST]["acquired"] == 1
+
+    def test_analytics_concurrency_bounded(self):
+        async def scenario():
+            scheduler = PoolScheduler(FakePool(3), 3, ingest_reserved=1, analytics_max_concurrency=1, queue_timeout=1)
+            peak = 0
+
+            async def work():
+                nonlocal peak
+                async with scheduler.lane(LANE_ANALYTICS).acquire():
+                    peak = max(peak, scheduler.in_use[LANE_ANALYTICS])
+                    await asyncio.sleep(0.01)
+
+            await asyncio.gather(*[work() for _ in range(4)])
+            return peak
+
+        assert run(scenario()) == 1
+
+    def test_lane_wait_timeout_rejects(self):
+        async def scenario():
+            scheduler = PoolScheduler(FakePool(3), 3, ingest_reserved=1, analytics_max_concurrency=1, queue_timeout=0.05)
+            release = asyncio.Event()
+
+            async def hold():
+                async with scheduler.lane(LANE_ANALYTICS).acquire():
+                    await release.wait()
+
+            holder = asyncio.ensure_future(hold())
+            await asyncio.sleep(0.01)
+            with pytest.raises(AdmissionRejected):
+                async with scheduler.lane(LANE_ANALYTICS).acquire():
+                    pass
+            release.set()
+            await holder
+            return scheduler
+
+        scheduler = run(scenario())
+        assert scheduler.rejected == 1
+        assert scheduler.in_use[LANE_ANALYTICS] == 0
+
+    def test_over_max_cost_rejected(self):
+        async def scenario():
+            scheduler = PoolScheduler(FakePool(3), 3, analytics_max_cost=100)
+            with pytest.raises(AdmissionTooCostly):
+                async with scheduler.admit(101):
+                    pass
+
+        run(scenario())
+
+    def test_over_budget_request_queues_until_budget_frees(self):
+        async def scenario():
+            scheduler = PoolScheduler(FakePool(3), 3, analytics_cost_budget=100, queue_timeout=1)
+            order = []
+
+            async def request(name, cost, duration):
+                async with scheduler.admit(cost):
+                    order.append(name)
+                    await asyncio.sleep(duration)
+
+            first = asyncio.ensure_future(request("first", 80, 0.05))
+            await asyncio.sleep(0.01)
+            await request("second", 50, 0)
+            await first
+            return order, scheduler
+
+        order, scheduler = run(scenario())
+        assert order == ["first", "second"]
+        assert scheduler.queued == 1
+        assert scheduler.stats()["analytics_cost_in_use"] == 0
+
+    def test_budget_queue_timeout_rejects(self):
+        async def scenario():
+            scheduler = PoolScheduler(FakePool(3), 3, analytics_cost_budget=100, queue_timeout=0.02)
+            release = asyncio.Event()
+
+            async def hold():
+                async with scheduler.admit(90):
+                    await release.wait()
+
+            holder = asyncio.ensure_future(hold())
+            await asyncio.sleep(0.01)
+            with pytest.raises(AdmissionRejected):
+                async with scheduler.admit(20):
+                    pass
+            release.set()
+            await holder
+
+        run(scenario())
+
+
+class TestAdmissionRejectedHandler:
+
+    def handle(self, exc):
+        class FakeURL:
+            path = "/api/pump-cycles"
+
+        class FakeRequest:
+            method = "GET"
+            url = FakeURL()
+
+        return run(admission_rejected_handler(FakeRequest(), exc))
+
+    def test_too_costly_is_413_without_retry(self):
+        response = self.handle(AdmissionTooCostly("Request cost 500 exceeds limit 100"))
+        assert response.status_code == 413
+        assert "réduisez la période" in response.body.decode()
+        assert "retry-after" not in response.headers
+
+    def test_queue_timeout_is_503_with_retry(self):
+        response = self.handle(AdmissionRejected("Analytics budget exhausted"))
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "5"
@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+from services.disconnect_guard import ClientDisconnected, run_unless_disconnected
+
+
+class FakeRequest:
+    def __init__(self, disconnect_after_polls=None):
+        self.disconnect_after_polls = disconnect_after_polls
+        self.polls = 0
+
+    async def is_disconnected(self):
+        self.polls += 1
+        return self.disconnect_after_polls is not None and self.polls >= self.disconnect_after_polls
+
+
+class TestRunUnlessDisconnected:
+
+    def test_returns_result_when_connected(self):
+        async def work():
+            await asyncio.sleep(0.02)
+            return 42
+
+        request = FakeRequest()
+        assert asyncio.run(run_unless_disconnected(request, work(), poll_interval=0.005)) == 42
+        assert request.polls >= 1
+
+    def test_cancels_work_on_disconnect(self):
+        state = {"cancelled": False}
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                state["cancelled"] = True
+                raise
+
+        async def scenario():
+            with pytest.raises(ClientDisconnected):
+                await run_unless_disconnected(FakeRequest(disconnect_after_polls=2), work(), poll_interval=0.005)
+
+        asyncio.run(scenario())
+        assert state["cancelled"]
+
+    def test_propagates_work_errors(self):
+        async def work():
+            raise asyncio.TimeoutError()
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(run_unless_disconnected(FakeRequest(), work(), poll_interval=0.005))
@@ -0,0 +1,115 @@
+import asyncio
+import gzip
+import pytest
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from services import export_service
+from services.export_service import format_cycle_csv_row, stream_raw_copy, CYCLES_CSV_HEADER
+
+CONFIGS = {
+    "dev1": {"device_name": "Poste Nord", "channels": {"switch:0": {"channel_name": "Pompe 1"}}}
+}
+
+
+def make_cycle(**overrides):
+    cycle = {
+        "device_id": "dev1",
+        "channel": "switch:0",
+        "start_time": datetime(2026, 2, 15, 9, 5, tzinfo=timezone.utc),
+        "end_time": datetime(2026, 2, 15, 9, 17, tzinfo=timezone.utc),
+        "duration_minutes": 12.0,
+        "avg_power_w": 1234.56,
+        "avg_current_a": 5.37,
+        "avg_voltage_v": 231.4,
+        "is_ongoing": False
+    }
+    cycle.update(overrides)
+    return cycle
+
+
+class TestCyclesCsv:
+
+    def test_header_matches_dashboard_columns(self):
+        assert CYCLES_CSV_HEADER.count(";") == 9
+        assert CYCLES_CSV_HEADER.startswith("Device;Canal;Date;")
+
+    def test_completed_cycle_uses_configured_names(self):
+        row = format_cycle_csv_row(make_cycle(), CONFIGS)
+        assert row == "Poste Nord;Pompe 1;15/02/2026;09h05;09h17;12.0;1234.6;5.4;231.4;Termine\n"
+
+    def test_ongoing_cycle_and_unknown_device(self):
+        row = format_cycle_csv_row(
+            make_cycle(device_id="dev9", end_time=None, is_ongoing=True, avg_current_a=0, avg_voltage_v=None), CONFIGS
+        )
+        assert row == "dev9;switch:0;15/02/2026;09h05;-;12.0;1234.6;0.0;;En cours\n"
+
+
+class FakeCopyConnection:
+    def __init__(self, chunks, fail=False):
+        self.chunks = chunks
+        self.fail = fail
+        self.produced = 0
+        self.calls = []
+
+    async def copy_from_query(self, query, *args, output, **kwargs):
+        self.calls.append((query, args, kwargs))
+        for chunk in self.chunks:
+            await output(bytearray(chunk))
+            self.produced += 1
+        if self.fail:
+            raise RuntimeError("copy failed")
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+END = datetime(2025, 12, 31, tzinfo=timezone.utc)
+
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+
+class TestRawCopyStream:
+
+    def test_streams_copy_chunks_in_order(self):
+        conn = FakeCopyConnection([b"a,b\n", b"1,2\n", b"3,4\n"])
+        chunks = asyncio.run(collect(stream_raw_copy(FakePool(conn), "dev1", ["switch:0"], START, END)))
+        assert b"".join(chunks) == b"a,b\n1,2\n3,4\n"
+        assert all(isinstance(chunk, bytes) for chunk in chunks)
+        query, args, kwargs = conn.calls[0]
+        assert args == ("dev1", START, END, ["switch:0"])
+        assert kwargs["format"] == "csv" and kwargs["header"] is True
+
+    def test_gzip(self):
+        conn = FakeCopyConnection([b"x" * 1000] * 5)
+        chunks = asyncio.run(collect(stream_raw_copy(FakePool(conn), "dev1", None, START, END, "binary", 6)))
+        assert gzip.decompress(b"".join(chunks)) == b"x" * 5000
+        assert conn.calls[0][2]["header"] is None
+
+    def test_slow_reader_applies_backpressure(self, monkeypatch):
+        monkeypatch.setattr(export_service.config, "EXPORT_COPY_QUEUE_CHUNKS", 2)
+        conn = FakeCopyConnection([b"row\n"] * 50)
+
+        async def run():
+            stream = stream_raw_copy(FakePool(conn), "dev1", None, START, END)
+            await stream.__anext__()
+            for _ in range(10):
+                await asyncio.sleep(0)
+            ahead = conn.produced
+            await stream.aclose()
+            return ahead
+
+        assert asyncio.run(run()) <= 4
+
+    def test_copy_error_is_raised(self):
+        conn = FakeCopyConnection([b"row\n"], fail=True)
+        with pytest.raises(RuntimeError):
+            asyncio.run(collect(stream_raw_copy(FakePool(conn), "dev1", None, START, END)))
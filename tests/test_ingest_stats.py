@@ -0,0 +1,52 @@
+import asyncio
+from datetime import datetime, timezone
+
+from services.ingest_stats import QUEUE_STATS_SQL, RECORD_ROWS_SQL, load_queue_stats, record_ingest_rows
+
+
+class FakeConnection:
+    def __init__(self, row=None):
+        self.row = row
+        self.executed = []
+
+    async def execute(self, query, *args):
+        self.executed.append((query, args))
+
+    async def fetchrow(self, query, *args):
+        assert query == QUEUE_STATS_SQL
+        return self.row
+
+
+class TestRecordIngestRows:
+
+    def test_one_statement_per_batch(self):
+        conn = FakeConnection()
+        ts = datetime(2025, 6, 1, 10, 5, tzinfo=timezone.utc)
+        asyncio.run(record_ingest_rows(conn, [(ts, "dev-a"), (ts, "dev-a"), (ts, "dev-b")]))
+        assert conn.executed == [(RECORD_ROWS_SQL, ([ts, ts, ts], ["dev-a", "dev-a", "dev-b"]))]
+
+    def test_empty_batch_skipped(self):
+        conn = FakeConnection()
+        asyncio.run(record_ingest_rows(conn, iter(())))
+        assert conn.executed == []
+
+
+class TestLoadQueueStats:
+
+    def test_shape_matches_previous_scan(self):
+        last = datetime(2025, 6, 1, 10, 5, 30, tzinfo=timezone.utc)
+        conn = FakeConnection({"total": 42, "from_queue": 40, "last_insert": last, "devices": 2})
+        assert asyncio.run(load_queue_stats(conn)) == {
+            "period": "24h",
+            "total_logs": 42,
+            "from_queue": 40,
+            "devices": 2,
+            "last_insert": "2025-06-01T10:05:30Z",
+        }
+
+    def test_no_recent_rows(self):
+        conn = FakeConnection({"total": 0, "from_queue": 0, "last_insert": None, "devices": 0})
+        assert asyncio.run(load_queue_stats(conn))["last_insert"] is None
+
+    def test_reads_rollup_not_power_logs(self):
+        assert "power_logs" not in QUEUE_STATS_SQL
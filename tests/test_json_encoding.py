@@ -0,0 +1,70 @@
+import json
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from services import json_encoding
+from services.json_encoding import dumps, format_datetime
+
+PAYLOAD = {
+    "watermark": datetime(2026, 2, 15, 10, 15, 30, 123456, tzinfo=timezone.utc),
+    "day": date(2026, 2, 15),
+    "naive": datetime(2026, 2, 15, 10, 0),
+    "paris": datetime(2026, 7, 1, 8, 0, tzinfo=timezone(timedelta(hours=2))),
+    "flow_rate": Decimal("12.50"),
+    "count": Decimal("3"),
+    "label": "Poste de relevage é",
+    "values": [1.5, 0, None, True],
+    "nested": {1: "switch:0"}
+}
+
+
+@pytest.fixture
+def stdlib_only(monkeypatch):
+    monkeypatch.setattr(json_encoding, "orjson", None)
+
+
+class TestFormatDatetime:
+
+    def test_utc_uses_z_without_microseconds(self):
+        assert format_datetime(datetime(2026, 2, 15, 10, 0, 5, 999, tzinfo=timezone.utc)) == "2026-02-15T10:00:05Z"
+
+    def test_matches_legacy_cycle_format(self):
+        ts = datetime(2026, 2, 15, 10, 0, 5, tzinfo=timezone.utc)
+        assert format_datetime(ts) == ts.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    def test_offsets(self):
+        assert format_datetime(datetime(2026, 1, 1, tzinfo=timezone(timedelta(hours=-5, minutes=-30)))) == "2026-01-01T00:00:00-05:30"
+
+    def test_naive_is_utc(self):
+        naive = datetime(2026, 2, 1, 0, 0)
+        assert format_datetime(naive) == "2026-02-01T00:00:00Z" == naive.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class TestDumps:
+
+    def test_stdlib_fallback(self, stdlib_only):
+        decoded = json.loads(dumps(PAYLOAD))
+        assert decoded["watermark"] == "2026-02-15T10:15:30Z"
+        assert decoded["day"] == "2026-02-15"
+        assert decoded["naive"] == "2026-02-15T10:00:00Z"
+        assert decoded["paris"] == "2026-07-01T08:00:00+02:00"
+        assert decoded["flow_rate"] == 12.5
+        assert decoded["count"] == 3
+        assert decoded["label"] == "Poste de relevage é"
+        assert decoded["nested"] == {"1": "switch:0"}
+
+    def test_stdlib_rejects_nan(self, stdlib_only):
+        with pytest.raises(ValueError):
+            dumps({"x": float("nan")})
+
+    def test_orjson_matches_stdlib(self, monkeypatch):
+        if json_encoding.orjson is None:
+            pytest.skip("orjson not installed")
+        fast = dumps(PAYLOAD)
+        monkeypatch.setattr(json_encoding, "orjson", None)
+        assert json.loads(fast) == json.loads(dumps(PAYLOAD))
+
+    def test_unsupported_type(self, stdlib_only):
+        with pytest.raises(TypeError):
+            dumps({"x": object()})
@@ -0,0 +1,93 @@
+from datetime import datetime, timezone, timedelta
+from services.live_stream import LiveBroker, OpenCycleTracker
+
+
+START = datetime(2026, 2, 15, 10, 0, 0, tzinfo=timezone.utc)
+
+
+def make_reading(minute, device_id="test_device", channel="switch:0", apower=1200.0):
+    return (START + timedelta(minutes=minute), device_id, channel, apower, 230.0, 5.0)
+
+
+class TestOpenCycleTracker:
+
+    def test_readings_extend_open_cycle(self):
+        tracker = OpenCycleTracker(gap_threshold_minutes=4, min_duration_minutes=2)
+        for i in range(5):
+            events = tracker.update("dev", "switch:0", START + timedelta(minutes=i), 1200.0, 5.0)
+        assert len(events) == 1
+        assert events[0]["is_ongoing"] is True
+        assert events[0]["duration_minutes"] == 4.0
+        assert events[0]["records_count"] == 5
+        assert events[0]["start_time"] == "2026-02-15T10:00:00Z"
+
+    def test_gap_closes_cycle(self):
+        tracker = OpenCycleTracker(gap_threshold_minutes=4, min_duration_minutes=2)
+        for i in range(5):
+            tracker.update("dev", "switch:0", START + timedelta(minutes=i), 1200.0, 5.0)
+        events = tracker.update("dev", "switch:0", START + timedelta(minutes=20), 800.0, 3.0)
+        assert len(events) == 2
+        closed, opened = events
+        assert closed["is_ongoing"] is False
+        assert closed["end_time"] == "2026-02-15T10:04:00Z"
+        assert opened["start_time"] == "2026-02-15T10:20:00Z"
+        assert opened["records_count"] == 1
+
+    def test_short_closed_cycle_not_reported(self):
+        tracker = OpenCycleTracker(gap_threshold_minutes=4, min_duration_minutes=2)
+        tracker.update("dev", "switch:0", START, 1200.0, 5.0)
+        events = tracker.update("dev", "switch:0", START + timedelta(minutes=10), 1200.0, 5.0)
+        assert len(events) == 1
+        assert events[0]["is_ongoing"] is True
+
+    def test_out_of_order_reading_ignored(self):
+        tracker = OpenCycleTracker()
+        tracker.update("dev", "switch:0", START + timedelta(minutes=2), 1200.0, 5.0)
+        assert tracker.update("dev", "switch:0", START, 1200.0, 5.0) == []
+
+    def test_open_cycles_expire_after_gap(self):
+        tracker = OpenCycleTracker(gap_threshold_minutes=4)
+        tracker.update("dev", "switch:0", START, 1200.0, 5.0)
+        assert len(tracker.open_cycles(START + timedelta(minutes=1))) == 1
+        assert tracker.open_cycles(START + timedelta(minutes=5)) == []
+
+
+class TestLiveBroker:
+
+    def test_fan_out_per_device_and_channel(self):
+        broker = LiveBroker()
+        sub_ch0 = broker.subscribe("test_device", "switch:0")
+        sub_ch1 = broker.subscribe("test_device", "switch:1")
+        sub_all = broker.subscribe()
+        broker.publish_readings([make_reading(0), make_reading(1)])
+        assert sub_ch0.queue.qsize() == 1
+        assert sub_ch1.queue.qsize() == 0
+        assert sub_all.queue.qsize() == 1
+        message = sub_ch0.queue.get_nowait()
+        assert message["type"] == "update"
+        assert len(message["readings"]) == 2
+        assert len(message["cycles"]) == 1
+
+    def test_slow_consumer_dropped(self):
+        broker = LiveBroker(queue_max_size=2)
+        slow = broker.subscribe("test_device")
+        for i in range(3):
+            broker.publish_readings([make_reading(i)])
+        assert slow.dropped is True
+        assert broker.subscriber_count == 0
+        assert broker.dropped_total == 1
+        assert slow.queue.get_nowait() is None
+
+    def test_tracker_updated_without_subscribers(self):
+        broker = LiveBroker()
+        broker.publish_readings([make_reading(0), make_reading(1)])
+        open_cycles = broker.open_cycles(START + timedelta(minutes=2))
+        assert len(open_cycles) == 1
+        assert open_cycles[0]["records_count"] == 2
+
+    def test_unsubscribe_stops_delivery(self):
+        broker = LiveBroker()
+        sub = broker.subscribe("test_device")
+        broker.unsubscribe(sub)
+        broker.publish_readings([make_reading(0)])
+        assert sub.queue.qsize() == 0
@@ -0,0 +1,41 @@
+import pytest
+
+from services.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry:
+
+    def test_counter_by_labels(self):
+        registry = MetricsRegistry()
+        rows = registry.counter("ingest_rows_total", "Rows", ("device", "result"))
+        rows.inc(1, "a", "inserted")
+        rows.inc(2, "a", "inserted")
+        rows.inc(1, "b", "duplicate")
+        text = registry.render()
+        assert "# TYPE ingest_rows_total counter" in text
+        assert 'ingest_rows_total{device="a",result="inserted"} 3' in text
+        assert 'ingest_rows_total{device="b",result="duplicate"} 1' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value)
+        lines = registry.render().splitlines()
+        assert 'latency_seconds_bucket{le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{le="1"} 3' in lines
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+        assert "latency_seconds_sum 3.65" in lines
+        assert "latency_seconds_count 4" in lines
+
+    def test_label_values_escaped(self):
+        registry = MetricsRegistry()
+        registry.counter("c", "C", ("device",)).inc(1, 'we"ird\\')
+        assert 'c{device="we\\"ird\\\\"} 1' in registry.render()
+
+    def test_duplicate_name_rejected(self):
+        registry = MetricsRegistry()
+        registry.counter("c", "C")
+        with pytest.raises(ValueError):
+            registry.histogram("c", "C")
+
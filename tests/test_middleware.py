@@ -0,0 +1,159 @@
+import logging
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from api.middleware import AdminProtectionMiddleware, RequestLoggingMiddleware
+from services.auth_service import create_admin_session, revoke_admin_session
+from services.request_logging import logger as request_logger
+
+
+def build_app():
+    app = FastAPI()
+
+    @app.get("/admin")
+    async def admin_page():
+        return {"page": "login"}
+
+    @app.get("/admin/pumps")
+    async def admin_pumps():
+        return {"page": "pumps"}
+
+    @app.post("/api/admin/login")
+    async def login():
+        return {"ok": True}
+
+    @app.get("/api/config/devices")
+    async def config_devices():
+        return {"devices": []}
+
+    @app.get("/api/admin/metrics")
+    async def metrics():
+        return {"metrics": True}
+
+    @app.get("/api/stats/pool")
+    async def pool_stats():
+        return {"pool": {}}
+
+    @app.get("/api/stats/queue")
+    async def queue_stats():
+        return {"total": 0}
+
+    @app.get("/static/app.js")
+    async def static_file():
+        return JSONResponse({"js": True}, headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+    @app.get("/api/devices")
+    async def devices():
+        return {"devices": []}
+
+    app.add_middleware(AdminProtectionMiddleware)
+    app.add_middleware(RequestLoggingMiddleware)
+    return app
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def client():
+    return TestClient(build_app())
+
+
+@pytest.fixture
+def request_records():
+    handler = ListHandler()
+    previous = (request_logger.handlers, request_logger.level, request_logger.propagate)
+    request_logger.handlers = [handler]
+    request_logger.setLevel(logging.INFO)
+    request_logger.propagate = False
+    yield handler.records
+    request_logger.handlers, level, request_logger.propagate = previous
+    request_logger.setLevel(level)
+
+
+class TestAdminProtectionMiddleware:
+
+    def test_admin_api_requires_session(self, client):
+        response = client.get("/api/config/devices")
+        assert response.status_code == 401
+        assert response.json() == {"error": "Authentification admin requise"}
+
+    def test_admin_page_redirects_to_login(self, client):
+        response = client.get("/admin/pumps", follow_redirects=False)
+        assert response.status_code == 302
+        assert response.headers["location"] == "/admin"
+
+    def test_public_admin_endpoints_allowed(self, client):
+        assert client.get("/admin").status_code == 200
+        assert client.post("/api/admin/login").status_code == 200
+
+    def test_valid_session_allowed(self, client):
+        token = create_admin_session()
+        try:
+            client.cookies.set("admin_session", token)
+            assert client.get("/api/config/devices").status_code == 200
+        finally:
+            revoke_admin_session(token)
+
+    def test_public_route_untouched(self, client):
+        assert client.get("/api/devices").status_code == 200
+
+    def test_operational_stats_require_session(self, client):
+        assert client.get("/api/stats/pool").status_code == 401
+        assert client.get("/api/stats/queue").status_code == 200
+
+    def test_scrape_token_allowed_on_metrics_and_stats(self, client, monkeypatch):
+        monkeypatch.setenv("METRICS_SCRAPE_TOKEN", "scrape-secret")
+        headers = {"Authorization": "Bearer scrape-secret"}
+        assert client.get("/api/admin/metrics", headers=headers).status_code == 200
+        assert client.get("/api/stats/pool", headers=headers).status_code == 200
+
+    def test_scrape_token_rejected(self, client, monkeypatch):
+        monkeypatch.setenv("METRICS_SCRAPE_TOKEN", "scrape-secret")
+        assert client.get("/api/admin/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+        assert client.get("/api/admin/metrics", headers={"Authorization": "Basic scrape-secret"}).status_code == 401
+
+    def test_scrape_token_limited_to_scrape_routes(self, client, monkeypatch):
+        monkeypatch.setenv("METRICS_SCRAPE_TOKEN", "scrape-secret")
+        headers = {"Authorization": "Bearer scrape-secret"}
+        assert client.get("/api/config/devices", headers=headers).status_code == 401
+
+    def test_scrape_token_unset_disables_bearer(self, client, monkeypatch):
+        monkeypatch.delenv("METRICS_SCRAPE_TOKEN", raising=False)
+        assert client.get("/api/admin/metrics", headers={"Authorization": "Bearer "}).status_code == 401
+
+
+class TestRequestLoggingMiddleware:
+
+    def test_static_cache_header_preserved(self, client):
+        response = client.get("/static/app.js")
+        assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+    def test_other_routes_keep_headers(self, client):
+        assert "cache-control" not in client.get("/api/devices").headers
+
+    def test_logs_one_structured_record(self, client, request_records):
+        client.get("/api/devices")
+        assert len(request_records) == 1
+        fields = request_records[0].fields
+        assert fields["method"] == "GET"
+        assert fields["path"] == "/api/devices"
+        assert fields["status"] == 200
+        assert "headers" not in fields
+
+    def test_errors_logged_as_warning(self, client, request_records):
+        client.get("/api/config/devices")
+        assert request_records[0].levelno == logging.WARNING
+        assert request_records[0].fields["status"] == 401
+
+    def test_healthcheck_not_logged(self, client, request_records):
+        client.get("/api/devices", headers={"x-replit-healthcheck": "1"})
+        assert request_records == []
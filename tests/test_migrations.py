@@ -0,0 +1,102 @@
+import asyncio
+import asyncpg
+from contextlib import asynccontextmanager
+from services import migrations
+from services.migrations import run_migrations, LATEST_VERSION, MIGRATIONS
+
+
+class FakeConnection:
+    def __init__(self, version=None):
+        self.version = version
+        self.statements = []
+        self.applied = []
+
+    async def fetchval(self, query, *args):
+        self.statements.append(query)
+        if self.version is None:
+            raise asyncpg.UndefinedTableError("relation \"schema_version\" does not exist")
+        return self.version
+
+    async def execute(self, query, *args):
+        self.statements.append(query)
+        if "CREATE TABLE IF NOT EXISTS schema_version" in query and self.version is None:
+            self.version = 0
+        if query.startswith("INSERT INTO schema_version"):
+            self.applied.append(args)
+            self.version = args[0]
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+def fake_steps(monkeypatch, ran):
+    def make(version):
+        async def step(conn):
+            ran.append(version)
+        return step
+    steps = [(version, name, make(version)) for version, name, _ in MIGRATIONS]
+    monkeypatch.setattr(migrations, "MIGRATIONS", steps)
+
+
+class TestRunMigrations:
+
+    def test_up_to_date_is_single_query(self, monkeypatch):
+        ran = []
+        fake_steps(monkeypatch, ran)
+        conn = FakeConnection(version=LATEST_VERSION)
+        assert asyncio.run(run_migrations(FakePool(conn))) == LATEST_VERSION
+        assert len(conn.statements) == 1
+        assert ran == []
+
+    def test_fresh_database_applies_all_steps_in_order(self, monkeypatch):
+        ran = []
+        fake_steps(monkeypatch, ran)
+        conn = FakeConnection()
+        assert asyncio.run(run_migrations(FakePool(conn))) == LATEST_VERSION
+        assert ran == [version for version, _, _ in MIGRATIONS]
+        assert [args[0] for args in conn.applied] == ran
+
+    def test_only_pending_steps_run_under_advisory_lock(self, monkeypatch):
+        ran = []
+        fake_steps(monkeypatch, ran)
+        conn = FakeConnection(version=1)
+        asyncio.run(run_migrations(FakePool(conn)))
+        assert ran == [version for version, _, _ in MIGRATIONS if version > 1]
+        lock = [i for i, s in enumerate(conn.statements) if "pg_advisory_lock" in s]
+        unlock = [i for i, s in enumerate(conn.statements) if "pg_advisory_unlock" in s]
+        assert len(lock) == 1 and len(unlock) == 1 and lock[0] < unlock[0]
+
+    def test_versions_are_strictly_increasing(self):
+        versions = [version for version, _, _ in MIGRATIONS]
+        assert versions == sorted(set(versions))
+        assert versions[-1] == LATEST_VERSION
+
+
+class TestConfigVersionsValidity:
+
+    def test_validity_keeps_exclusive_end_and_existing_rows(self):
+        conn = FakeConnection(version=2)
+        asyncio.run(migrations._config_versions_validity(conn))
+        ddl = "\n".join(conn.statements)
+        assert "daterange(effective_from, effective_to, '[)')" in ddl
+        assert "DELETE" not in ddl and "UPDATE" not in ddl and "valid_date_range" not in ddl
+
+
+class TestIngestHourlyStats:
+
+    def test_backfill_bounded_to_retention(self):
+        conn = FakeConnection(version=3)
+        asyncio.run(migrations._ingest_hourly_stats(conn))
+        backfill = conn.statements[-1]
+        assert "INSERT INTO ingest_hourly_stats" in backfill
+        assert "NOW() - INTERVAL '48 hours'" in backfill
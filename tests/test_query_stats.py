@@ -0,0 +1,189 @@
+import asyncio
+import asyncpg
+from contextlib import asynccontextmanager
+
+from services.db_scheduler import PoolScheduler, LANE_ANALYTICS
+from services.query_stats import QueryStats, InstrumentedConnection, query_name
+from services.statements import register
+
+NAMED_SQL = register("tests.query_stats.named", "SELECT 1 FROM query_stats_test WHERE id = $1")
+
+
+class FakeConnection:
+    def __init__(self, rows=None, error=None, in_transaction=False, delay=0.0):
+        self.rows = rows if rows is not None else []
+        self.error = error
+        self.in_transaction = in_transaction
+        self.delay = delay
+        self.queries = []
+        self.readonly = None
+
+    async def fetch(self, query, *args, timeout=None):
+        self.queries.append(query)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        if query.startswith("EXPLAIN"):
+            return [("Seq Scan on query_stats_test  (cost=0.00..1.01 rows=1 width=4)",)]
+        return self.rows
+
+    async def execute(self, query, *args, timeout=None):
+        self.queries.append(query)
+        return "UPDATE 3"
+
+    def is_in_transaction(self):
+        return self.in_transaction
+
+    @asynccontextmanager
+    async def transaction(self, readonly=False):
+        self.readonly = readonly
+        yield
+
+    def get_server_pid(self):
+        return 42
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @asynccontextmanager
+    async def _acquire(self):
+        yield self.conn
+
+    def acquire(self):
+        return self._acquire()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestQueryNames:
+
+    def test_registered_statement_uses_its_name(self):
+        assert query_name(NAMED_SQL) == "tests.query_stats.named"
+
+    def test_adhoc_statement_named_by_verb_and_table(self):
+        assert query_name("SELECT id FROM pump_models ORDER BY id") == "select pump_models"
+        assert query_name("\n  UPDATE device_config SET x = 1") == "update device_config"
+        assert query_name("INSERT INTO power_logs VALUES ($1)") == "insert power_logs"
+        assert query_name("SELECT 1") == "select"
+
+
+class TestQueryStats:
+
+    def test_aggregates_per_name(self):
+        stats = QueryStats(slow_ms=1000)
+        stats.record("a", 0.010, rows=5)
+        stats.record("a", 0.030, rows=1)
+        stats.record("a", 0.002, failed=True)
+        a = stats.stats()["queries"]["a"]
+        assert a["count"] == 3 and a["rows"] == 6 and a["errors"] == 1
+        assert a["max_ms"] == 30.0 and a["total_ms"] == 42.0 and a["slow"] == 0
+
+    def test_slow_queries_logged(self):
+        stats = QueryStats(slow_ms=100, history=2)
+        assert stats.record("fast", 0.05) is False
+        for name in ("s1", "s2", "s3"):
+            assert stats.record(name, 0.2, rows=7) is True
+        log = stats.stats()["slow_log"]
+        assert [entry["name"] for entry in log] == ["s3", "s2"]
+        assert log[0]["rows"] == 7 and log[0]["duration_ms"] == 200.0
+
+    def test_explain_disabled_by_default(self):
+        stats = QueryStats()
+        assert stats.should_explain("a") is False
+
+    def test_explain_sampled_with_cooldown(self):
+        now = [0.0]
+        stats = QueryStats(explain_sample_rate=1.0, explain_cooldown=60, clock=lambda: now[0])
+        assert stats.should_explain("a") is True
+        assert stats.should_explain("a") is False
+        assert stats.should_explain("b") is True
+        now[0] = 61.0
+        assert stats.should_explain("a") is True
+
+    def test_reset(self):
+        stats = QueryStats(slow_ms=0)
+        stats.record("a", 0.1)
+        stats.record_wait("primary.ingest", 0.01)
+        stats.reset()
+        snapshot = stats.stats()
+        assert snapshot["queries"] == {} and snapshot["pool_wait"] == {} and snapshot["slow_log"] == []
+
+
+class TestInstrumentedConnection:
+
+    def test_times_and_counts_rows(self):
+        stats = QueryStats(slow_ms=1000)
+        conn = InstrumentedConnection(FakeConnection(rows=[1, 2, 3]), stats)
+        assert run(conn.fetch(NAMED_SQL, 1)) == [1, 2, 3]
+        assert run(conn.execute("UPDATE device_config SET x = 1")) == "UPDATE 3"
+        queries = stats.stats()["queries"]
+        assert queries["tests.query_stats.named"]["rows"] == 3
+        assert queries["update device_config"]["rows"] == 3
+
+    def test_errors_recorded_and_raised(self):
+        stats = QueryStats()
+        conn = InstrumentedConnection(FakeConnection(error=asyncpg.PostgresError("boom")), stats)
+        try:
+            run(conn.fetch(NAMED_SQL, 1))
+            assert False, "expected error"
+        except asyncpg.PostgresError:
+            pass
+        assert stats.stats()["queries"]["tests.query_stats.named"]["errors"] == 1
+
+    def test_other_attributes_pass_through(self):
+        conn = InstrumentedConnection(FakeConnection(), QueryStats())
+        assert conn.get_server_pid() == 42
+
+    def test_slow_read_planned_not_rerun(self):
+        stats = QueryStats(slow_ms=0, explain_sample_rate=1.0)
+        fake = FakeConnection(rows=[1])
+        run(InstrumentedConnection(fake, stats).fetch(NAMED_SQL, 1))
+        assert fake.queries == [NAMED_SQL, "EXPLAIN " + NAMED_SQL]
+        explain = stats.stats()["explains"][0]
+        assert explain["name"] == "tests.query_stats.named"
+        assert "Seq Scan" in explain["plan"]
+
+    def test_analyze_setting_reruns_read_only(self):
+        stats = QueryStats(slow_ms=0, explain_sample_rate=1.0, explain_analyze=True)
+        fake = FakeConnection(rows=[1])
+        run(InstrumentedConnection(fake, stats).fetch(NAMED_SQL, 1))
+        assert fake.queries == [NAMED_SQL, "EXPLAIN (ANALYZE, BUFFERS) " + NAMED_SQL]
+        assert fake.readonly is True
+        assert stats.stats()["explain_analyze"] is True
+
+    def test_writes_and_open_transactions_not_explained(self):
+        stats = QueryStats(slow_ms=0, explain_sample_rate=1.0)
+        fake = FakeConnection()
+        run(InstrumentedConnection(fake, stats).execute("UPDATE device_config SET x = 1"))
+        busy = FakeConnection(in_transaction=True)
+        run(InstrumentedConnection(busy, stats).fetch(NAMED_SQL, 1))
+        assert not any(q.startswith("EXPLAIN") for q in fake.queries + busy.queries)
+        assert stats.stats()["explains"] == []
+
+
+class TestSchedulerInstrumentation:
+
+    def test_lane_connections_instrumented(self):
+        async def scenario():
+            stats = QueryStats()
+            scheduler = PoolScheduler(FakePool(FakeConnection(rows=[1])), 3, query_stats=stats, name="replica")
+            async with scheduler.lane(LANE_ANALYTICS).acquire() as conn:
+                assert isinstance(conn, InstrumentedConnection)
+                await conn.fetch(NAMED_SQL, 1)
+            return stats.stats()
+        snapshot = run(scenario())
+        assert snapshot["pool_wait"]["replica.analytics"]["count"] == 1
+        assert snapshot["queries"]["tests.query_stats.named"]["count"] == 1
+
+    def test_plain_connections_without_stats(self):
+        async def scenario():
+            fake = FakeConnection()
+            scheduler = PoolScheduler(FakePool(fake), 3)
+            async with scheduler.lane(LANE_ANALYTICS).acquire() as conn:
+                return conn is fake
+        assert run(scenario()) is True
@@ -0,0 +1,83 @@
+import asyncio
+import asyncpg
+from contextlib import asynccontextmanager
+
+from services.replica_router import ReplicaRouter
+
+
+class FakeConnection:
+    def __init__(self, lag=0.0, error=None):
+        self.lag = lag
+        self.error = error
+
+    async def fetchval(self, query, *args, timeout=None):
+        if self.error is not None:
+            raise self.error
+        return self.lag
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @asynccontextmanager
+    async def acquire(self, timeout=None):
+        yield self.conn
+
+
+class FakeScheduler:
+    def __init__(self, name, conn=None):
+        self.name = name
+        self.pool = FakePool(conn)
+
+
+def make_router(lag=0.0, error=None, max_lag=30.0):
+    conn = FakeConnection(lag, error)
+    router = ReplicaRouter(FakeScheduler("primary"), max_lag_seconds=max_lag)
+    router.attach(FakeScheduler("replica", conn))
+    return router, conn
+
+
+class TestReplicaRouting:
+
+    def test_primary_without_replica(self):
+        router = ReplicaRouter(FakeScheduler("primary"))
+        assert router.scheduler().name == "primary"
+        assert router.fallbacks == 0 and router.stats()["configured"] is False
+
+    def test_replica_not_used_before_first_check(self):
+        router, _ = make_router()
+        assert router.scheduler().name == "primary"
+        assert router.fallbacks == 1
+
+    def test_fresh_replica_serves_reads(self):
+        router, _ = make_router(lag=1.5)
+        assert asyncio.run(router.check()) is True
+        assert router.scheduler().name == "replica"
+        assert router.stats()["lag_seconds"] == 1.5
+
+    def test_lagging_replica_falls_back(self):
+        router, conn = make_router(lag=0.0, max_lag=10)
+        asyncio.run(router.check())
+        conn.lag = 45.0
+        assert asyncio.run(router.check()) is False
+        assert router.scheduler().name == "primary"
+        assert router.reads_primary == 1 and router.fallbacks == 1
+
+    def test_nothing_replayed_is_stale(self):
+        router, _ = make_router(lag=None)
+        assert asyncio.run(router.check()) is False
+        assert router.last_error
+
+    def test_unreachable_replica_falls_back_then_recovers(self):
+        router, conn = make_router(error=ConnectionRefusedError("refused"))
+        assert asyncio.run(router.check()) is False
+        assert router.stats()["last_error"] == "refused"
+        conn.error = None
+        assert asyncio.run(router.check()) is True
+        assert router.scheduler().name == "replica"
+
+    def test_postgres_error_falls_back(self):
+        router, _ = make_router(error=asyncpg.PostgresError("boom"))
+        assert asyncio.run(router.check()) is False
+        assert router.scheduler().name == "primary"
@@ -0,0 +1,85 @@
+import json
+import logging
+import pytest
+from services.request_logging import JsonLineFormatter, RequestSampler, log_request, logger
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def records():
+    handler = ListHandler()
+    previous = (logger.handlers, logger.level, logger.propagate)
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    yield handler.records
+    logger.handlers, level, logger.propagate = previous
+    logger.setLevel(level)
+
+
+class TestRequestSampler:
+
+    def test_unmatched_path_always_logged(self):
+        sampler = RequestSampler({"/api/ingest/batch": 10})
+        assert all(sampler.sample("/api/devices") == 1 for _ in range(5))
+
+    def test_one_in_n(self):
+        sampler = RequestSampler({"/api/ingest/batch": 10})
+        decisions = [sampler.sample("/api/ingest/batch") for _ in range(30)]
+        assert decisions.count(10) == 3
+        assert decisions[0] == 10
+
+    def test_longest_prefix_wins(self):
+        sampler = RequestSampler({"/api/": 100, "/api/stats/": 1})
+        assert sampler.sample("/api/stats/pool") == 1
+
+
+class TestLogRequest:
+
+    def test_sampled_route_skipped(self, records):
+        sampler = RequestSampler({"/api/ingest/batch": 20})
+        for _ in range(40):
+            log_request(sampler, "POST", "/api/ingest/batch", 200, 1.0, "1.2.3.4", {})
+        assert len(records) == 2
+        assert records[0].fields["sample_every"] == 20
+
+    def test_errors_and_slow_requests_bypass_sampling(self, records):
+        sampler = RequestSampler({"/api/ingest/batch": 1000})
+        sampler.sample("/api/ingest/batch")
+        log_request(sampler, "POST", "/api/ingest/batch", 401, 1.0, None, {})
+        log_request(sampler, "POST", "/api/ingest/batch", 200, 5000.0, None, {}, slow_ms=1000)
+        assert [r.levelno for r in records] == [logging.WARNING, logging.WARNING]
+
+    def test_headers_only_at_debug(self, records):
+        sampler = RequestSampler()
+        log_request(sampler, "GET", "/api/devices", 200, 1.0, None, {"user-agent": "ua"})
+        logger.setLevel(logging.DEBUG)
+        log_request(sampler, "GET", "/api/devices", 200, 1.0, None, {"user-agent": "ua"})
+        assert "headers" not in records[0].fields
+        assert records[1].fields["headers"] == {"user-agent": "ua"}
+
+    def test_disabled_level_skips_record(self, records):
+        logger.setLevel(logging.ERROR)
+        log_request(RequestSampler(), "GET", "/api/devices", 200, 1.0, None, {})
+        assert records == []
+
+
+class TestJsonLineFormatter:
+
+    def test_single_json_line(self):
+        record = logging.LogRecord("shelly.requests", logging.INFO, __file__, 1, "http_request", None, None)
+        record.fields = {"path": "/api/devices", "status": 200}
+        line = JsonLineFormatter().format(record)
+        assert "\n" not in line
+        entry = json.loads(line)
+        assert entry["event"] == "http_request"
+        assert entry["status"] == 200
+        assert entry["ts"].endswith("Z")
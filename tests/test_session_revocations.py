@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+
+from services import auth_service
+from services.auth_service import create_admin_session, verify_admin_token, revoke_admin_session
+from services.session_revocations import (
+    CHANNEL, PUBLISH_SQL, LOAD_SQL, _on_notify, load_revocations, publish_revocation
+)
+
+
+@pytest.fixture(autouse=True)
+def session_secret(monkeypatch):
+    monkeypatch.setenv("ADMIN_SESSION_SECRET", "test-secret")
+    auth_service._revoked_nonces.clear()
+    yield
+    auth_service._revoked_nonces.clear()
+
+
+class FakeConnection:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.executed = []
+
+    async def execute(self, query, *args):
+        self.executed.append((query, args))
+
+    async def fetch(self, query, *args):
+        assert query == LOAD_SQL
+        return self.rows
+
+
+def other_instance_revokes(token):
+    # Parse on "another instance", then forget locally.
+    revoked = revoke_admin_session(token)
+    auth_service._revoked_nonces.clear()
+    return revoked
+
+
+class TestSessionRevocations:
+
+    def test_publish_stores_and_notifies(self):
+        token = create_admin_session()
+        revoked = revoke_admin_session(token)
+        conn = FakeConnection()
+        asyncio.run(publish_revocation(conn, revoked))
+        expires_at, nonce = revoked
+        assert conn.executed == [(PUBLISH_SQL, (nonce, expires_at))]
+        assert f"pg_notify('{CHANNEL}'" in PUBLISH_SQL
+
+    def test_notification_revokes_on_this_instance(self):
+        token = create_admin_session()
+        expires_at, nonce = other_instance_revokes(token)
+        assert verify_admin_token(token)
+        _on_notify(None, 1, CHANNEL, f"{nonce}:{expires_at}")
+        assert not verify_admin_token(token)
+
+    def test_malformed_notification_ignored(self):
+        _on_notify(None, 1, CHANNEL, "garbage")
+        assert auth_service._revoked_nonces == {}
+
+    def test_startup_loads_stored_revocations(self):
+        token = create_admin_session()
+        other = create_admin_session()
+        expires_at, nonce = other_instance_revokes(token)
+        conn = FakeConnection([{"nonce": nonce, "expires_at": expires_at}])
+        assert asyncio.run(load_revocations(conn)) == 1
+        assert not verify_admin_token(token)
+        assert verify_admin_token(other)
@@ -0,0 +1,115 @@
+import asyncio
+from services.single_flight import SingleFlight
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestSingleFlight:
+
+    def test_concurrent_identical_calls_share_one_execution(self):
+        async def scenario():
+            flight = SingleFlight()
+            calls = 0
+
+            async def compute():
+                nonlocal calls
+                calls += 1
+                await asyncio.sleep(0.01)
+                return {"value": 42}
+
+            results = await asyncio.gather(*[flight.run("key", compute) for _ in range(5)])
+            return flight, calls, results
+
+        flight, calls, results = run(scenario())
+        assert calls == 1
+        assert all(r == {"value": 42} for r in results)
+        assert flight.executions == 1
+        assert flight.coalesced == 4
+        assert flight.in_flight == 0
+
+    def test_distinct_keys_run_separately(self):
+        async def scenario():
+            flight = SingleFlight()
+
+            async def compute(v):
+                await asyncio.sleep(0.01)
+                return v
+
+            results = await asyncio.gather(
+                flight.run("a", lambda: compute(1)),
+                flight.run("b", lambda: compute(2))
+            )
+            return flight, results
+
+        flight, results = run(scenario())
+        assert results == [1, 2]
+        assert flight.executions == 2
+        assert flight.coalesced == 0
+
+    def test_sequential_calls_not_coalesced(self):
+        async def scenario():
+            flight = SingleFlight()
+
+            async def compute():
+                return 1
+
+            await flight.run("key", compute)
+            await flight.run("key", compute)
+            return flight
+
+        flight = run(scenario())
+        assert flight.executions == 2
+
+    def test_exception_propagates_to_all_waiters(self):
+        async def scenario():
+            flight = SingleFlight()
+
+            async def compute():
+                await asyncio.sleep(0.01)
+                raise ValueError("boom")
+
+            return await asyncio.gather(
+                flight.run("key", compute), flight.run("key", compute),
+                return_exceptions=True
+            )
+
+        results = run(scenario())
+        assert all(isinstance(r, ValueError) for r in results)
+
+    def test_cancelled_waiter_does_not_cancel_shared_work(self):
+        async def scenario():
+            flight = SingleFlight()
+
+            async def compute():
+                await asyncio.sleep(0.02)
+                return "done"
+
+            first = asyncio.ensure_future(flight.run("key", compute))
+            second = asyncio.ensure_future(flight.run("key", compute))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        assert run(scenario()) == "done"
+
+    def test_last_waiter_cancel_cancels_work(self):
+        async def scenario():
+            flight = SingleFlight()
+            finished = False
+
+            async def compute():
+                nonlocal finished
+                await asyncio.sleep(0.05)
+                finished = True
+
+            waiter = asyncio.ensure_future(flight.run("key", compute))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.sleep(0.1)
+            return finished, flight.in_flight
+
+        finished, in_flight = run(scenario())
+        assert finished is False
+        assert in_flight == 0
@@ -0,0 +1,146 @@
+import asyncio
+
+from services.database import warm_pool
+from services.startup_profile import StartupProfile
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_profile(pre_main_ms=50.0):
+    clock = FakeClock()
+    return StartupProfile(clock=clock, pre_main_ms=pre_main_ms), clock
+
+
+class TestStartupProfile:
+
+    def test_phases_are_relative_to_origin(self):
+        profile, clock = make_profile()
+        clock.now += 0.3
+        with profile.phase("pool connect"):
+            clock.now += 0.02
+        assert [(name, round(offset, 3), round(duration, 3)) for name, offset, duration in profile.phases] == [
+            ("pool connect", 300.0, 20.0)
+        ]
+
+    def test_phase_recorded_when_it_raises(self):
+        profile, clock = make_profile()
+        try:
+            with profile.phase("schema check"):
+                clock.now += 0.01
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        assert [name for name, _, _ in profile.phases] == ["schema check"]
+
+    def test_milestones_include_pre_main_time(self):
+        profile, clock = make_profile(pre_main_ms=120.0)
+        clock.now += 0.4
+        profile.mark_accepting()
+        assert not profile.ready
+        clock.now += 0.1
+        profile.mark_ready()
+        stats = profile.stats()
+        assert stats["ready"] is True
+        assert stats["accepting_ms"] == 520.0
+        assert stats["ready_ms"] == 620.0
+
+    def test_first_ingest_recorded_once(self):
+        profile, clock = make_profile(pre_main_ms=0.0)
+        clock.now += 0.25
+        assert profile.record_first_ingest() is True
+        clock.now += 1
+        assert profile.record_first_ingest() is False
+        assert profile.first_ingest_ms == 250.0
+
+
+class FakeConnection:
+    def __init__(self, prepared=False):
+        self.prepared = prepared
+        self.round_trips = 0
+
+
+class FakeAcquire:
+    def __init__(self, pool):
+        self.pool = pool
+        self.conn = None
+
+    def __await__(self):
+        return self.pool._acquire().__await__()
+
+    async def __aenter__(self):
+        self.conn = await self.pool._acquire()
+        return self.conn
+
+    async def __aexit__(self, *exc):
+        await self.pool.release(self.conn)
+
+
+class FakePool:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.idle = [FakeConnection()]
+        self.opened = 1
+        self.held = 0
+        self.max_held = 0
+
+    def get_max_size(self):
+        return self.max_size
+
+    def get_size(self):
+        return self.opened
+
+    def acquire(self):
+        return FakeAcquire(self)
+
+    async def _acquire(self):
+        self.held += 1
+        self.max_held = max(self.max_held, self.held)
+        if self.idle:
+            return self.idle.pop()
+        await asyncio.sleep(0.01)
+        self.opened += 1
+        return FakeConnection(prepared=True)
+
+    async def release(self, conn):
+        self.held -= 1
+        self.idle.append(conn)
+
+
+async def prepare(conn):
+    if not conn.prepared:
+        conn.round_trips += 1
+        await asyncio.sleep(0.001)
+        conn.prepared = True
+
+
+class TestPoolWarmUp:
+
+    def test_warm_pool_opens_every_slot(self):
+        pool = FakePool(3)
+        assert asyncio.run(warm_pool(pool)) == 3
+        assert pool.max_held == 3 and pool.held == 0
+
+    def test_idle_connection_released_before_new_ones_open(self):
+        pool = FakePool(3)
+
+        async def scenario():
+            warming = asyncio.ensure_future(warm_pool(pool))
+            await asyncio.sleep(0.001)
+            idle_during_warm_up = len(pool.idle)
+            await warming
+            return idle_during_warm_up
+
+        assert asyncio.run(scenario()) == 1
+
+    def test_top_up_prepares_connections_opened_earlier(self):
+        pool = FakePool(3)
+        first = pool.idle[0]
+        asyncio.run(warm_pool(pool, prepare))
+        assert first.prepared and first.round_trips == 1
+        assert all(conn.prepared for conn in pool.idle) and pool.held == 0
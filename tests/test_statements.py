@@ -0,0 +1,67 @@
+import asyncio
+import asyncpg
+import pytest
+
+from services import statements
+from services.statements import ConnectionPreparer, CRITICAL, STATEMENTS, prepare, register
+from services.chart_service import BUCKET_STATEMENTS, CHART_PERIODS
+from services.cycles_service import READINGS_STATEMENTS, readings_query
+
+
+class FakeConnection:
+    def __init__(self, failing=()):
+        self.failing = failing
+        self.prepared = []
+
+    async def executemany(self, sql, args):
+        assert args == []
+        if sql in self.failing:
+            raise asyncpg.UndefinedTableError('relation "power_logs" does not exist')
+        self.prepared.append(sql)
+
+
+class TestRegistry:
+
+    def test_duplicate_name_rejected(self):
+        with pytest.raises(ValueError):
+            register("configs.map", "SELECT 1")
+
+    def test_hot_paths_registered(self):
+        assert {"devices.channels", "configs.map", "cycles.readings.device_channel", "chart.buckets.24h.channel"} <= set(STATEMENTS)
+
+    def test_every_shape_has_a_statement(self):
+        assert len(READINGS_STATEMENTS) == 4
+        assert len(BUCKET_STATEMENTS) == 2 * len(CHART_PERIODS)
+        assert len(set(READINGS_STATEMENTS.values()) | set(BUCKET_STATEMENTS.values())) == 4 + 2 * len(CHART_PERIODS)
+
+    def test_readings_query_numbers_parameters_by_shape(self):
+        sql, params = readings_query(None, "switch:1", "start", "end")
+        assert params == ["start", "end", "switch:1"]
+        assert "channel = $3" in sql and "device_id" not in sql.split("WHERE")[1].split("ORDER")[0]
+        sql, params = readings_query("dev", "switch:1", "start", "end")
+        assert params == ["start", "end", "dev", "switch:1"]
+        assert "device_id = $3" in sql and "channel = $4" in sql
+
+
+class TestPrepare:
+
+    def test_failing_statement_skipped(self, monkeypatch):
+        monkeypatch.setattr(statements, "STATEMENTS", {"a": "SELECT a", "b": "SELECT b"})
+        conn = FakeConnection(failing={"SELECT a"})
+        assert asyncio.run(prepare(conn, ["a", "b"])) == 1
+        assert conn.prepared == ["SELECT b"]
+
+    def test_preparer_critical_until_full(self):
+        preparer = ConnectionPreparer()
+        assert preparer.names() == list(CRITICAL)
+        preparer.full = True
+        assert preparer.names() == list(STATEMENTS)
+        conn = FakeConnection()
+        asyncio.run(preparer(conn))
+        assert len(conn.prepared) == len(STATEMENTS)
+
+    def test_read_only_preparer_skips_writes(self, monkeypatch):
+        monkeypatch.setattr(statements, "STATEMENTS", {"read": "SELECT 1", "write": "INSERT INTO t VALUES (1)"})
+        monkeypatch.setattr(statements, "WRITES", ["write"])
+        assert ConnectionPreparer(read_only=True, full=True).names() == ["read"]
+        assert ConnectionPreparer(full=True).names() == ["read", "write"]
@@ -0,0 +1,104 @@
+import gzip
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from services.compression import accepted_encodings
+from services.static_assets import (
+    StaticAssetManifest, hashed_name,
+    IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL
+)
+
+SCRIPT = ("function refresh() { return fetch('/api/pump-cycles'); }\n" * 40).encode()
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "dashboard.js").write_bytes(SCRIPT)
+    (tmp_path / "tiny.css").write_bytes(b"body{}")
+    return StaticAssetManifest(str(tmp_path), "/static")
+
+
+@pytest.fixture
+def client(manifest):
+    return TestClient(Starlette(routes=[Mount("/static", app=manifest)]))
+
+
+class TestManifest:
+
+    def test_hashed_name(self):
+        assert hashed_name("js/dashboard.js", "abc123") == "js/dashboard.abc123.js"
+
+    def test_url_is_content_hashed(self, manifest, tmp_path):
+        url = manifest.url("js/dashboard.js")
+        assert url.startswith("/static/js/dashboard.") and url.endswith(".js")
+        (tmp_path / "js" / "dashboard.js").write_bytes(SCRIPT + b"// changed\n")
+        manifest.build()
+        assert manifest.url("js/dashboard.js") != url
+
+    def test_unknown_asset_url_falls_back(self, manifest):
+        assert manifest.url("img/missing.png") == "/static/img/missing.png"
+
+    def test_small_files_not_compressed(self, manifest):
+        assert set(manifest.assets["tiny.css"].variants) == {"identity"}
+
+    def test_lazy_manifest_builds_on_first_use(self, tmp_path):
+        (tmp_path / "app.js").write_bytes(SCRIPT)
+        lazy = StaticAssetManifest(str(tmp_path), "/static", eager=False)
+        assert not lazy.built and lazy.assets == {}
+        assert lazy.url("app.js") != "/static/app.js"
+        assert lazy.built
+
+    def test_lazy_manifest_serves_before_warm_up(self, tmp_path):
+        (tmp_path / "app.js").write_bytes(SCRIPT)
+        lazy = StaticAssetManifest(str(tmp_path), "/static", eager=False)
+        client = TestClient(Starlette(routes=[Mount("/static", app=lazy)]))
+        assert client.get("/static/app.js").content == SCRIPT
+
+
+class TestAcceptEncoding:
+
+    def test_parses_qvalues(self):
+        assert accepted_encodings("gzip, deflate, br;q=0") == {"gzip", "deflate"}
+
+    def test_empty(self):
+        assert accepted_encodings(None) == set()
+
+
+class TestServing:
+
+    def test_hashed_url_is_immutable_and_gzipped(self, manifest, client):
+        response = client.get(manifest.url("js/dashboard.js"), headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) == len(gzip.compress(SCRIPT, compresslevel=9, mtime=0))
+        assert response.content == SCRIPT
+
+    def test_identity_when_not_accepted(self, manifest, client):
+        response = client.get(manifest.url("js/dashboard.js"), headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert response.content == SCRIPT
+
+    def test_logical_path_revalidates(self, manifest, client):
+        response = client.get("/static/js/dashboard.js")
+        assert response.headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+        etag = response.headers["etag"]
+        assert client.get("/static/js/dashboard.js", headers={"If-None-Match": etag}).status_code == 304
+
+    def test_if_none_match_compares_whole_etags(self, manifest, client):
+        etag = client.get("/static/js/dashboard.js").headers["etag"]
+        opaque = etag[2:] if etag.startswith("W/") else etag
+        for header in ('"other", W/' + opaque, "*"):
+            assert client.get("/static/js/dashboard.js", headers={"If-None-Match": header}).status_code == 304
+        for header in (opaque[:-1] + 'x"', opaque + "-gzip", '"v1"' + opaque):
+            assert client.get("/static/js/dashboard.js", headers={"If-None-Match": header}).status_code == 200
+
+    def test_unknown_path_404(self, client):
+        assert client.get("/static/js/nope.js").status_code == 404
+
+    def test_post_not_allowed(self, manifest, client):
+        assert client.post(manifest.url("js/dashboard.js")).status_code == 405
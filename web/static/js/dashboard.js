@@ -12,10 +12,51 @@ document.addEventListener('DOMContentLoaded', () => {
     document.getElementById('start-date').value = toYMD(startDate);
     document.getElementById('end-date').value = toYMD(today);
 
-    loadCycles();
-    loadDevices();
+    bootstrapDashboard();
 });
 
+async function bootstrapDashboard() {
+    syncChartDateWithMainFilter();
+    const cyclesKey = cyclesUrl();
+    const deviceId = document.getElementById('device-filter').value;
+    let url = '/api/dashboard/bootstrap?' + cyclesKey.split('?')[1];
+    let chartKey = null;
+    if (deviceId) {
+        chartKey = chartUrl(currentChartPeriod);
+        url += 'chart_period=' + currentChartPeriod + '&';
+        if (userPickedDate) url += 'chart_end_date=' + encodeURIComponent(document.getElementById('chart-end-date').value) + '&';
+    }
+
+    document.getElementById('loading').style.display = 'block';
+    document.getElementById('table-wrapper').style.display = 'none';
+    document.getElementById('empty').style.display = 'none';
+
+    let data;
+    try {
+        const responses = await Promise.all([fetch(url), loadConfigs()]);
+        if (!responses[0].ok) throw new Error(`HTTP ${responses[0].status}`);
+        data = await responses[0].json();
+    } catch (error) {
+        console.error('Bootstrap indisponible, chargement séparé:', error);
+        loadCycles();
+        loadDevices();
+        return;
+    }
+
+    populateDevices(data.devices);
+    currentData = expandCycles(data.cycles);
+    cyclesQueryKey = cyclesKey;
+    originalCycles = currentData.cycles.slice();
+    showCycles();
+    if (data.chart) {
+        document.getElementById('chart-section').style.display = 'block';
+        await applyChartResult(data.chart, chartKey, currentChartPeriod);
+    } else {
+        loadChartData();
+    }
+    connectLiveStream();
+}
+
 function getDeviceName(deviceId) {
     var configs = (currentData && currentData.configs) || {};
     var cfg = configs[deviceId];
@@ -40,26 +81,29 @@ async function loadDevices() {
         const response = await fetch('/api/devices');
         if (!response.ok) return;
         const data = await response.json();
-
-        allDevicesData = data.devices || [];
-
-        if (allDevicesData.length > 0) {
-            const select = document.getElementById('device-filter');
-            allDevicesData.forEach(device => {
-                const option = document.createElement('option');
-                option.value = device.device_id;
-                option.textContent = device.device_name || device.device_id;
-                select.appendChild(option);
-            });
-        }
-
-        loadChannelOptions();
+        populateDevices(data.devices);
         loadChartData();
     } catch (e) {
         console.error('Error loading devices:', e);
     }
 }
 
+function populateDevices(devices) {
+    allDevicesData = devices || [];
+
+    if (allDevicesData.length > 0) {
+        const select = document.getElementById('device-filter');
+        allDevicesData.forEach(device => {
+            const option = document.createElement('option');
+            option.value = device.device_id;
+            option.textContent = device.device_name || device.device_id;
+            select.appendChild(option);
+        });
+    }
+
+    loadChannelOptions();
+}
+
 function loadChannelOptions() {
     const select = document.getElementById('channel-filter');
     const selectedDeviceId = document.getElementById('device-filter').value;
@@ -87,45 +131,83 @@ function loadChannelOptions() {
     });
 }
 
-async function loadCycles() {
-    syncChartDateWithMainFilter();
+let cyclesQueryKey = null;
+let cachedConfigs = {};
+
+const CYCLE_FIELDS = [
+    'device_id', 'channel', 'start_time', 'end_time', 'duration_minutes', 'avg_power_w',
+    'avg_current_a', 'avg_voltage_v', 'records_count', 'is_ongoing', 'pump_type',
+    'volume_m3', 'co2e_avoided_kg', 'ch4_avoided_kg',
+    'stats', 'treatment_stats', 'co2e_impact'
+].join(',');
+
+async function loadConfigs() {
+    const response = await fetch('/api/configs');
+    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+    cachedConfigs = (await response.json()).configs || {};
+}
+
+function expandCycles(data) {
+    if (data.layout !== 'normalized') return data;
+    const columns = data.columns;
+    const dictionaries = data.dictionaries || {};
+    data.cycles = data.cycles.map(function(row) {
+        const cycle = {};
+        columns.forEach(function(column, i) {
+            cycle[column] = dictionaries[column] ? dictionaries[column][row[i]] : row[i];
+        });
+        return cycle;
+    });
+    data.configs = cachedConfigs;
+    return data;
+}
+
+function cyclesUrl() {
     const channel = document.getElementById('channel-filter').value;
     const deviceId = document.getElementById('device-filter').value;
     const startDate = document.getElementById('start-date').value;
     const endDate = document.getElementById('end-date').value;
 
-    document.getElementById('loading').style.display = 'block';
-    document.getElementById('table-wrapper').style.display = 'none';
-    document.getElementById('empty').style.display = 'none';
+    let url = '/api/pump-cycles?';
+    if (deviceId) url += `device_id=${deviceId}&`;
+    if (channel) url += `channel=${channel}&`;
+    if (startDate) url += `start_date=${startDate}T00:00:00Z&`;
+    if (endDate) url += `end_date=${endDate}T23:59:59Z&`;
+    url += `fields=${CYCLE_FIELDS}&layout=normalized&`;
+    return url;
+}
 
-    try {
-        let url = '/api/pump-cycles?';
-        if (deviceId) url += `device_id=${deviceId}&`;
-        if (channel) url += `channel=${channel}&`;
-        if (startDate) url += `start_date=${startDate}T00:00:00Z&`;
-        if (endDate) url += `end_date=${endDate}T23:59:59Z&`;
+async function loadCycles() {
+    syncChartDateWithMainFilter();
+    let url = cyclesUrl();
+    const queryKey = url;
+    const isDelta = currentData && currentData.watermark && cyclesQueryKey === queryKey;
+    if (isDelta) {
+        url += 'since=' + encodeURIComponent(currentData.watermark) + '&';
+    } else {
+        document.getElementById('loading').style.display = 'block';
+        document.getElementById('table-wrapper').style.display = 'none';
+        document.getElementById('empty').style.display = 'none';
+    }
 
-        const response = await fetch(url);
+    try {
+        const responses = await Promise.all([fetch(url), isDelta ? null : loadConfigs()]);
+        const response = responses[0];
         if (!response.ok) {
             throw new Error(`HTTP ${response.status}`);
         }
-        const data = await response.json();
-
-        currentData = data;
-        originalCycles = data.cycles.slice();
+        const data = expandCycles(await response.json());
 
-        document.getElementById('loading').style.display = 'none';
-
-        if (data.cycles.length === 0) {
-            document.getElementById('empty').style.display = 'block';
-            updateStats([]);
-            return;
+        if (data.mode === 'delta') {
+            mergeCyclesDelta(data);
+        } else {
+            currentData = data;
         }
+        cyclesQueryKey = queryKey;
+        originalCycles = currentData.cycles.slice();
 
-        document.getElementById('table-wrapper').style.display = 'block';
-        renderTable(data.cycles);
-        updateStats(data.cycles);
-        loadChartData();
+        if (showCycles()) loadChartData();
+        connectLiveStream();
 
     } catch (error) {
         console.error('Erreur:', error);
@@ -134,6 +216,156 @@ async function loadCycles() {
     }
 }
 
+function showCycles() {
+    document.getElementById('loading').style.display = 'none';
+
+    if (currentData.cycles.length === 0) {
+        document.getElementById('table-wrapper').style.display = 'none';
+        document.getElementById('empty').style.display = 'block';
+        updateStats([]);
+        return false;
+    }
+
+    document.getElementById('empty').style.display = 'none';
+    document.getElementById('table-wrapper').style.display = 'block';
+    renderTable(currentData.cycles);
+    updateStats(currentData.cycles);
+    return true;
+}
+
+function mergeCyclesDelta(delta) {
+    const kept = currentData.cycles.filter(function(c) { return c.start_time < delta.since; });
+    currentData.cycles = delta.cycles.concat(kept);
+    currentData.total = currentData.cycles.length;
+    currentData.watermark = delta.watermark;
+    recomputeCycleTotals(currentData);
+}
+
+function recomputeCycleTotals(data) {
+    var stats = { max_current: 0, min_current: Infinity, max_power: 0, min_power: Infinity };
+    var treated = 0, co2e = 0, ch4 = 0;
+
+    data.cycles.forEach(function(c) {
+        if (c.avg_power_w != null) {
+            stats.max_power = Math.max(stats.max_power, c.avg_power_w);
+            stats.min_power = Math.min(stats.min_power, c.avg_power_w);
+        }
+        if (c.avg_current_a != null) {
+            stats.max_current = Math.max(stats.max_current, c.avg_current_a);
+            stats.min_current = Math.min(stats.min_current, c.avg_current_a);
+        }
+        if (!c.is_ongoing && c.volume_m3) {
+            treated += c.volume_m3;
+            co2e += c.co2e_avoided_kg || 0;
+            ch4 += c.ch4_avoided_kg || 0;
+        }
+    });
+    if (stats.min_current === Infinity) stats.min_current = 0;
+    if (stats.min_power === Infinity) stats.min_power = 0;
+    data.stats = stats;
+
+    if (data.treatment_stats) {
+        var numDays = data.treatment_stats.num_days;
+        data.treatment_stats.treated_water_m3 = Math.round(treated * 100) / 100;
+        data.treatment_stats.treated_water_per_day = numDays > 0 ? Math.round(treated / numDays * 100) / 100 : 0;
+    }
+    if (data.co2e_impact && treated > 0) {
+        data.co2e_impact.co2e_avoided_kg = Math.round(co2e * 100) / 100;
+        data.co2e_impact.ch4_avoided_kg = Math.round(ch4 * 100) / 100;
+        data.co2e_impact.reduction_percent = 94.0;
+    }
+}
+
+let liveSocket = null;
+let liveSocketKey = null;
+
+function isViewIncludingToday() {
+    const endDate = document.getElementById('end-date').value;
+    const today = new Date().toISOString().split('T')[0];
+    return !endDate || endDate >= today;
+}
+
+function connectLiveStream() {
+    const deviceId = document.getElementById('device-filter').value;
+    const channel = document.getElementById('channel-filter').value;
+    const key = deviceId + '|' + channel;
+
+    if (!isViewIncludingToday()) {
+        closeLiveStream();
+        return;
+    }
+    if (liveSocket && liveSocketKey === key && liveSocket.readyState <= 1) return;
+    closeLiveStream();
+
+    let url = (location.protocol === 'https:' ? 'wss://' : 'ws://') + location.host + '/api/live?';
+    if (deviceId) url += 'device_id=' + encodeURIComponent(deviceId) + '&';
+    if (channel) url += 'channel=' + encodeURIComponent(channel) + '&';
+
+    const socket = new WebSocket(url);
+    liveSocket = socket;
+    liveSocketKey = key;
+
+    socket.onmessage = function(event) {
+        const message = JSON.parse(event.data);
+        if (message.type === 'snapshot' || message.type === 'update') {
+            applyLiveCycles(message.cycles || []);
+        }
+    };
+    socket.onclose = function(event) {
+        if (liveSocket !== socket) return;
+        liveSocket = null;
+        setTimeout(function() {
+            if (!liveSocket && liveSocketKey === key) connectLiveStream();
+        }, event.code === 1013 ? 1000 : 5000);
+    };
+}
+
+function closeLiveStream() {
+    if (liveSocket) {
+        const socket = liveSocket;
+        liveSocket = null;
+        socket.close();
+    }
+    liveSocketKey = null;
+}
+
+function applyLiveCycles(updates) {
+    if (!currentData || !updates.length) return;
+    const cycles = currentData.cycles;
+    let changed = false;
+
+    updates.forEach(function(update) {
+        const idx = cycles.findIndex(function(c) {
+            return c.device_id === update.device_id && c.channel === update.channel &&
+                (c.start_time === update.start_time || (c.is_ongoing && update.start_time >= c.start_time));
+        });
+
+        if (idx >= 0) {
+            const existing = cycles[idx];
+            if (existing.start_time === update.start_time) {
+                existing.avg_power_w = update.avg_power_w;
+                existing.avg_current_a = update.avg_current_a;
+                existing.records_count = update.records_count;
+            }
+            existing.is_ongoing = update.is_ongoing;
+            existing.end_time = update.end_time;
+            existing.duration_minutes = Math.round((new Date(update.last_seen) - new Date(existing.start_time)) / 6000) / 10;
+            changed = true;
+        } else if (update.is_ongoing) {
+            cycles.unshift(Object.assign({}, update));
+            if (originalCycles) originalCycles.unshift(cycles[0]);
+            changed = true;
+        }
+    });
+
+    if (changed) {
+        document.getElementById('empty').style.display = 'none';
+        document.getElementById('table-wrapper').style.display = 'block';
+        renderTable(cycles);
+        updateStats(cycles);
+    }
+}
+
 function formatDate(isoStr) {
     try {
         const d = new Date(isoStr);
@@ -323,59 +555,47 @@ async function exportCSV() {
         return;
     }
 
-    var pwd = prompt("Mot de passe requis pour l'export CSV :");
-    if (!pwd) return;
     try {
-        var res = await fetch('/api/verify-export-password', {
-            method: 'POST',
-            headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({password: pwd})
-        });
-        if (!res.ok) {
-            alert('Mot de passe incorrect');
-            return;
+        var session = await fetch('/api/admin/check-session');
+        if (!session.ok) {
+            var pwd = prompt("Mot de passe requis pour l'export CSV :");
+            if (!pwd) return;
+            var res = await fetch('/api/verify-export-password', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({password: pwd})
+            });
+            if (!res.ok) {
+                alert('Mot de passe incorrect');
+                return;
+            }
         }
     } catch(e) {
         alert('Erreur de vérification');
         return;
     }
 
-    let csv = 'Device;Canal;Date;Heure démarrage;Heure arrêt;Durée (min);Puissance moyenne (W);Courant moyen (A);Voltage moyen (V);Statut\n';
-
-    currentData.cycles.forEach(cycle => {
-        const deviceId = cycle.device_id || 'N/A';
-        const deviceName = getDeviceName(deviceId);
-        const channelName = getChannelName(deviceId, cycle.channel);
-        const dateStr = formatDate(cycle.start_time);
-        const startTimeStr = formatTime(cycle.start_time);
-
-        let endTimeStr = '';
-        let status = 'Termine';
-        if (cycle.is_ongoing) {
-            endTimeStr = '-';
-            status = 'En cours';
-        } else if (cycle.end_time) {
-            endTimeStr = formatTime(cycle.end_time);
-        } else {
-            endTimeStr = '-';
-        }
+    const channel = document.getElementById('channel-filter').value;
+    const deviceId = document.getElementById('device-filter').value;
+    const startDate = document.getElementById('start-date').value;
+    const endDate = document.getElementById('end-date').value;
 
-        var powerW = cycle.avg_power_w != null ? parseFloat(cycle.avg_power_w).toFixed(1) : '';
-        var currentA = cycle.avg_current_a ? parseFloat(cycle.avg_current_a).toFixed(1) : '';
-        var voltageV = cycle.avg_voltage_v != null ? parseFloat(cycle.avg_voltage_v).toFixed(1) : '';
-        csv += deviceName + ';' + channelName + ';' + dateStr + ';' + startTimeStr + ';' + endTimeStr + ';' + cycle.duration_minutes + ';' + powerW + ';' + currentA + ';' + voltageV + ';' + status + '\n';
-    });
+    let url = '/api/export/cycles.csv?';
+    if (deviceId) url += 'device_id=' + encodeURIComponent(deviceId) + '&';
+    if (channel) url += 'channel=' + encodeURIComponent(channel) + '&';
+    if (startDate) url += 'start_date=' + startDate + 'T00:00:00Z&';
+    if (endDate) url += 'end_date=' + endDate + 'T23:59:59Z&';
 
-    const blob = new Blob([csv], { type: 'text/csv;charset=utf-8;' });
     const link = document.createElement('a');
-    link.href = URL.createObjectURL(blob);
-    link.download = 'cycles_pompes_filtreplante_' + new Date().toISOString().split('T')[0] + '.csv';
+    link.href = url;
     link.click();
 }
 let powerChart = null;
 let currentChartPeriod = '24h';
 let currentChartType = 'power';
 let lastChartData = null;
+let lastChartResult = null;
+let lastChartKey = null;
 let userPickedDate = false;
 let chartTimeBounds = null;
 const channelColors = [
@@ -487,12 +707,10 @@ async function loadChartData(periodOverride) {
     section.style.display = 'block';
 
     const period = periodOverride || currentChartPeriod;
-    const channel = document.getElementById('channel-filter').value;
-    let url = '/api/power-chart-data?device_id=' + encodeURIComponent(deviceId) + '&period=' + period;
-    if (channel) url += '&channel=' + encodeURIComponent(channel);
-    if (userPickedDate) {
-        const endDate = document.getElementById('chart-end-date').value;
-        if (endDate) url += '&end_date=' + encodeURIComponent(endDate);
+    let url = chartUrl(period);
+    const chartKey = url;
+    if (lastChartResult && lastChartKey === chartKey && lastChartResult.watermark) {
+        url += '&since=' + encodeURIComponent(lastChartResult.watermark);
     }
 
     console.log('Chart request:', url, 'userPickedDate:', userPickedDate);
@@ -500,44 +718,92 @@ async function loadChartData(periodOverride) {
     try {
         const response = await fetch(url);
         if (!response.ok) throw new Error('HTTP ' + response.status);
-        const result = await response.json();
-
-        const hasData = Object.values(result.data || {}).some(function(ch) {
-            return ch.timestamps && ch.timestamps.length > 1;
-        });
-
-        if (!hasData) {
-            if (!periodOverride && currentChartPeriod === '24h') {
-                console.log('Aucune donnée sur 24h, fallback vers 7 jours');
-                showInfoMessage('ℹ️ Aucune donnée sur les dernières 24h. Affichage étendu à 7 jours.', false);
-                document.querySelectorAll('.period-btn').forEach(function(b) { b.classList.remove('active'); });
-                var btn7d = document.querySelector('.period-btn[data-period="7d"]');
-                if (btn7d) btn7d.classList.add('active');
-                currentChartPeriod = '7d';
-                return await loadChartData('7d');
-            }
-            if (period === '7d') {
-                console.log('Aucune donnée sur 7 jours');
-                showInfoMessage('ℹ️ Aucune donnée sur les 7 derniers jours.', true);
-            }
-        } else {
-            hideInfoMessage();
+        let result = await response.json();
+        if (result.mode === 'delta') {
+            result = mergeChartDelta(lastChartResult, result);
         }
-
-        updateChartTitle(result.start_date, result.end_date);
-        chartTimeBounds = {
-            min: new Date(result.start_time_iso),
-            max: new Date(result.end_time_iso)
-        };
-        console.log('Chart bounds:', chartTimeBounds.min.toISOString(), '->', chartTimeBounds.max.toISOString());
-        lastChartData = result.data;
-        renderChart(result.data);
+        await applyChartResult(result, chartKey, period, periodOverride);
     } catch (e) {
         console.error('Chart error:', e);
         showInfoMessage('Erreur de chargement des données', false);
     }
 }
 
+function chartUrl(period) {
+    const deviceId = document.getElementById('device-filter').value;
+    const channel = document.getElementById('channel-filter').value;
+    let url = '/api/power-chart-data?device_id=' + encodeURIComponent(deviceId) + '&period=' + period;
+    if (channel) url += '&channel=' + encodeURIComponent(channel);
+    if (userPickedDate) {
+        const endDate = document.getElementById('chart-end-date').value;
+        if (endDate) url += '&end_date=' + encodeURIComponent(endDate);
+    }
+    return url;
+}
+
+async function applyChartResult(result, chartKey, period, periodOverride) {
+    lastChartResult = result;
+    lastChartKey = chartKey;
+
+    const hasData = Object.values(result.data || {}).some(function(ch) {
+        return ch.timestamps && ch.timestamps.length > 1;
+    });
+
+    if (!hasData) {
+        if (!periodOverride && currentChartPeriod === '24h') {
+            console.log('Aucune donnée sur 24h, fallback vers 7 jours');
+            showInfoMessage('ℹ️ Aucune donnée sur les dernières 24h. Affichage étendu à 7 jours.', false);
+            document.querySelectorAll('.period-btn').forEach(function(b) { b.classList.remove('active'); });
+            var btn7d = document.querySelector('.period-btn[data-period="7d"]');
+            if (btn7d) btn7d.classList.add('active');
+            currentChartPeriod = '7d';
+            return await loadChartData('7d');
+        }
+        if (period === '7d') {
+            console.log('Aucune donnée sur 7 jours');
+            showInfoMessage('ℹ️ Aucune donnée sur les 7 derniers jours.', true);
+        }
+    } else {
+        hideInfoMessage();
+    }
+
+    updateChartTitle(result.start_date, result.end_date);
+    chartTimeBounds = {
+        min: new Date(result.start_time_iso),
+        max: new Date(result.end_time_iso)
+    };
+    console.log('Chart bounds:', chartTimeBounds.min.toISOString(), '->', chartTimeBounds.max.toISOString());
+    lastChartData = result.data;
+    renderChart(result.data);
+}
+
+function mergeChartDelta(previous, delta) {
+    const merged = Object.assign({}, delta, { mode: 'full', data: {} });
+    const windowStart = new Date(delta.start_time_iso).getTime();
+    const replaceFrom = new Date(delta.replace_from).getTime();
+    const channels = new Set(Object.keys(previous.data || {}).concat(Object.keys(delta.data || {})));
+
+    channels.forEach(function(ch) {
+        const old = (previous.data || {})[ch] || { timestamps: [], power_w: [], current_a: [] };
+        const fresh = (delta.data || {})[ch];
+        const out = { timestamps: [], power_w: [], current_a: [] };
+        old.timestamps.forEach(function(t, i) {
+            const ms = new Date(t).getTime();
+            if (ms < windowStart || (fresh && ms >= replaceFrom)) return;
+            out.timestamps.push(t);
+            out.power_w.push(old.power_w[i]);
+            out.current_a.push(old.current_a[i]);
+        });
+        if (fresh) {
+            out.timestamps = out.timestamps.concat(fresh.timestamps);
+            out.power_w = out.power_w.concat(fresh.power_w);
+            out.current_a = out.current_a.concat(fresh.current_a);
+        }
+        merged.data[ch] = out;
+    });
+    return merged;
+}
+
 function renderChart(data) {
     const canvas = document.getElementById('powerChart');
     if (powerChart) {